@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import time
 
 from json.decoder import JSONDecodeError
 from starlette.applications import Starlette
@@ -6,12 +8,31 @@ from starlette.middleware.cors import CORSMiddleware
 
 from marshmallow.exceptions import ValidationError
 
-from aioli.exceptions import HTTPException, AioliException, BootstrapError
+from aioli.exceptions import HTTPException, AioliException, BootstrapError, ServiceUnavailable
 
 from .config import ApplicationConfigSchema
+from .context import set_request_cache, reset_request_cache
 from .registry import ImportRegistry
 from .errors import http_error, validation_error, decode_error
 from .datastores import MemoryStore
+from .engines import set_json_engine
+from .compression import Compressor, CompressionMiddleware
+from .batch import BatchDispatcher
+from .router import RadixRouter
+from .concurrency import ProcessPool
+from .metrics import (
+    MetricsRegistry,
+    collect_caches,
+    collect_limiters,
+    collect_memos,
+    collect_executors,
+    collect_processes,
+    collect_shedding,
+)
+from .service import uses_processes
+from .shedding import LoadShedder
+from .profiler import Profiler, ProfileOptions
+from .utils import format_path
 
 
 class Application(Starlette):
@@ -23,10 +44,27 @@ class Application(Starlette):
     :var log: Aioli Application logger
     :var registry: ImportRegistry instance
     :var config: Application config
+    :var compressor: Compressor instance, if compression is enabled
+    :var batch: BatchDispatcher instance, if the batch route is enabled
+    :var metrics: MetricsRegistry instance, if metrics are enabled
+    :var shedder: LoadShedder instance, if load shedding is enabled
+    :var processes: ProcessPool running Service methods offloaded using `@offload(process=True)`
+    :var profiler: Profiler instance, if the profiler routes or a startup profile are enabled
+    :var exception_handlers: Exception handlers by exception class
+    :var in_flight: Number of HTTP requests being handled
+    :var draining: Whether the Application is shutting down, rejecting new requests
     """
 
     log = logging.getLogger("aioli.core")
     state = MemoryStore("app")
+    compressor = None
+    batch = None
+    metrics = None
+    shedder = None
+    profiler = None
+    in_flight = 0
+    draining = False
+    _drained = None
 
     def __init__(self, units, **kwargs):
         if not isinstance(units, list):
@@ -36,6 +74,7 @@ class Application(Starlette):
 
         config = kwargs.pop("config", {})
         self.__units = units
+        self.exception_handlers = {}
 
         try:
             self.config = ApplicationConfigSchema().load(config.get("aioli-core", {}))
@@ -44,11 +83,44 @@ class Application(Starlette):
         except ValidationError as e:
             raise BootstrapError(f"Configuration validation error: {e.messages}")
 
+        # Encode and decode JSON using the configured engine throughout
+        set_json_engine(self.config["json_engine"])
+
+        if self.config["metrics"]:
+            self.metrics = MetricsRegistry()
+            self.metrics.register_collector("caches", collect_caches(self))
+            self.metrics.register_collector("limiters", collect_limiters(self))
+            self.metrics.register_collector("executors", collect_executors(self))
+            self.metrics.register_collector("memos", collect_memos(self))
+
+        self.processes = ProcessPool(self.config["process_workers"], self.config["process_max_queue"])
+
+        if self.metrics:
+            self.metrics.register_collector("processes", collect_processes(self.processes))
+
+        if self.config["load_shedding"]:
+            self.shedder = LoadShedder(self.config["shedding_lag_target"], self.config["shedding_interval"])
+
+            if self.metrics:
+                self.metrics.register_collector("shedding", collect_shedding(self.shedder))
+
+        if self.config["profile"] is not None:
+            try:
+                ProfileOptions().load(self.config["profile"])
+            except ValidationError as e:
+                raise BootstrapError(f"Invalid `profile` options: {e.messages}")
+
+        if self.config["profiler_token"] or self.config["profile"] is not None:
+            self.profiler = Profiler(self, self.config["profiler_dir"], token=self.config["profiler_token"])
+
         self.registry = ImportRegistry(self, config)
 
         # Apply known settings from environment or provided `config`
         super(Application, self).__init__(debug=self.config["debug"], **kwargs)
 
+        if self.config["router"] == "radix":
+            self.router = self.exception_middleware.app = RadixRouter(self.router.routes)
+
         # Error handlers
         self.add_exception_handler(AioliException, http_error)
         self.add_exception_handler(HTTPException, http_error)
@@ -58,20 +130,95 @@ class Application(Starlette):
         # Middleware
         self.add_middleware(CORSMiddleware, allow_origins=self.config["allow_origins"])
 
+        if self.config["compression"]:
+            self.compressor = Compressor(
+                self.config["compression_encodings"],
+                minimum_size=self.config["compression_min_size"],
+            )
+            self.add_middleware(CompressionMiddleware, compressor=self.compressor)
+
         # Lifespan handlers
         self.router.lifespan.add_event_handler("startup", self._startup)
         self.router.lifespan.add_event_handler("shutdown", self._shutdown)
 
+    def add_exception_handler(self, exc_class_or_status_code, handler):
+        if isinstance(exc_class_or_status_code, type):
+            self.exception_handlers[exc_class_or_status_code] = handler
+
+        super(Application, self).add_exception_handler(exc_class_or_status_code, handler)
+
     def load_units(self):
         self.log.info("Commencing countdown, engines on")
         self.registry.register_units(self.__units)
 
+        if self.config["batch"]:
+            self.batch = BatchDispatcher(
+                self,
+                max_operations=self.config["batch_max_operations"],
+                concurrency=self.config["batch_concurrency"],
+            )
+            self.add_route(format_path(self.config["api_base"], "batch"), self.batch.endpoint, ["POST"], "batch")
+
+        if self.metrics:
+            self.add_route(self.config["metrics_path"], self.metrics.endpoint, ["GET"], "metrics")
+
+        if self.profiler and self.profiler.token:
+            path = self.config["profiler_path"]
+            self.add_route(path, self.profiler.start_endpoint, ["POST"], "profile_start")
+            self.add_route(path, self.profiler.status_endpoint, ["GET"], "profile_status")
+            self.add_route(format_path(path, "{name}"), self.profiler.result_endpoint, ["GET"], "profile_result")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await super(Application, self).__call__(scope, receive, send)
+
+        if self.draining:
+            # Clients may still send requests over kept-alive connections once shutdown has begun
+            response = await http_error(None, ServiceUnavailable(message="Shutting down"))
+            return await response(scope, receive, send)
+
+        self.in_flight += 1
+        token = set_request_cache()
+
+        try:
+            await super(Application, self).__call__(scope, receive, send)
+        finally:
+            reset_request_cache(token)
+            self.in_flight -= 1
+
+            if self.draining and not self.in_flight:
+                self._drained.set()
+
+    async def _drain(self, timeout):
+        self.draining = True
+        self._drained = asyncio.Event()
+
+        if not self.in_flight:
+            return
+
+        self.log.info(f"Waiting for {self.in_flight} in-flight requests")
+
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.log.warning(f"Drain timed out after {timeout}s, {self.in_flight} requests still in flight")
+
     async def _startup(self):
+        if any(uses_processes(svc) for unit in self.registry.imported for svc in unit.services):
+            # Fork worker processes before Units open connections, which they would otherwise inherit
+            await self.processes.start()
+
+        if self.shedder:
+            self.shedder.start()
+
+        if self.config["profile"] is not None:
+            self.profiler.start(**self.config["profile"])
+
         if not self.__units:
             self.log.warning(f"No Units loaded")
             return
 
-        total, failed = await self.registry.call_startup_handlers()
+        total, failed = await self.registry.call_startup_handlers(self.config["startup_timeout"])
 
         if failed > 0:
             self.log.warning(f"Application degraded")
@@ -79,5 +226,18 @@ class Application(Starlette):
             self.log.info(f"Application ready: {total} Units loaded")
 
     async def _shutdown(self):
-        for unit in self.registry.imported:
-            await unit.detach_services()
+        started = time.perf_counter()
+        await self._drain(self.config["drain_timeout"])
+        drained = time.perf_counter()
+
+        if self.shedder:
+            self.shedder.stop()
+
+        await self.registry.call_shutdown_handlers(self.config["shutdown_timeout"])
+        await self.processes.shutdown()
+        finished = time.perf_counter()
+
+        self.log.info(
+            f"Application shut down in {finished - started:.3f}s: "
+            f"drain {drained - started:.3f}s, shutdown handlers {finished - drained:.3f}s"
+        )
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+
+from urllib.parse import urlencode
+
+from marshmallow import Schema, fields, validate
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import compile_path
+
+from .controller.consts import Method
+from .engines import get_json_engine
+from .errors import server_error
+from .exceptions import AioliException
+
+
+class BatchOperation(Schema):
+    method = fields.String(missing=Method.GET.value, validate=validate.OneOf([m.value for m in Method]))
+    path = fields.String(required=True)
+    query = fields.Dict(keys=fields.String(), missing=dict)
+    body = fields.Raw(missing=None)
+
+
+class BatchTooLarge(AioliException):
+    def __init__(self, limit):
+        super(BatchTooLarge, self).__init__(
+            status=413,
+            message=f"Batch exceeds the limit of {limit} operations"
+        )
+
+
+# Parent request headers not passed on to operations
+SKIP_HEADERS = {b"content-length", b"content-type", b"transfer-encoding", b"accept-encoding"}
+
+
+class BatchDispatcher:
+    """Runs a batch of operations against the Application's route handlers, in-process
+
+    Operations are dispatched directly to the compiled Handler pipelines, bypassing the
+    ASGI, routing and middleware stack, and run concurrently up to `concurrency`.
+    Errors are handled by the Application's `exception_handlers`.
+
+    :param app: Application instance
+    :param max_operations: Max number of operations in a batch
+    :param concurrency: Max number of operations running concurrently
+    """
+
+    log = logging.getLogger("aioli.batch")
+
+    def __init__(self, app, max_operations=50, concurrency=8):
+        self.app = app
+        self.max_operations = max_operations
+        self.concurrency = concurrency
+        self.routes = []
+
+        for unit in app.registry.imported:
+            for controller in unit.controllers:
+                for _, handler in controller.handlers:
+                    path_regex, _, convertors = compile_path(handler.path_full)
+                    self.routes.append((path_regex, convertors, handler.method, handler.endpoint))
+
+    def match(self, method, path):
+        """Returns an (endpoint, path params) pair for the given method and path
+
+        :param method: HTTP method
+        :param path: Request path
+        :return: Tuple of endpoint and path params
+        :raise AioliException: No route matched the path and method
+        """
+
+        path_matched = False
+
+        for path_regex, convertors, route_method, endpoint in self.routes:
+            match = path_regex.match(path)
+
+            if not match:
+                continue
+            elif route_method != method:
+                path_matched = True
+                continue
+
+            params = {name: convertors[name].convert(value) for name, value in match.groupdict().items()}
+            return endpoint, params
+
+        if path_matched:
+            raise AioliException(status=405, message="Method Not Allowed")
+
+        raise AioliException(status=404, message="Not Found")
+
+    def _get_scope(self, parent, operation, params, endpoint):
+        headers = [(k, v) for k, v in parent.scope["headers"] if k not in SKIP_HEADERS]
+
+        if operation["body"] is not None:
+            headers.append((b"content-type", b"application/json"))
+
+        return {
+            "type": "http",
+            "http_version": parent.scope.get("http_version", "1.1"),
+            "method": operation["method"],
+            "scheme": parent.scope.get("scheme", "http"),
+            "server": parent.scope.get("server"),
+            "client": parent.scope.get("client"),
+            "root_path": parent.scope.get("root_path", ""),
+            "path": operation["path"],
+            "query_string": urlencode(operation["query"], doseq=True).encode("latin-1"),
+            "headers": headers,
+            "app": self.app,
+            "endpoint": endpoint,
+            "path_params": params,
+        }
+
+    async def _handle_error(self, request, exc):
+        # Use the Application's exception handlers, as registered in Application.__init__
+        for exc_class in type(exc).__mro__:
+            handler = self.app.exception_handlers.get(exc_class)
+
+            if handler:
+                break
+        else:
+            self.log.exception("Unhandled exception in batch operation")
+            handler = server_error
+
+        return await handler(request, exc)
+
+    async def dispatch(self, parent, operation):
+        """Runs a single operation
+
+        :param parent: Batch Request
+        :param operation: Validated BatchOperation
+        :return: Tuple of status code and encoded JSON body
+        """
+
+        body = operation["body"]
+        encoded = b"" if body is None else get_json_engine().dumps(body)
+
+        async def receive():
+            return {"type": "http.request", "body": encoded, "more_body": False}
+
+        request = parent
+
+        try:
+            endpoint, params = self.match(operation["method"], operation["path"])
+            request = Request(self._get_scope(parent, operation, params, endpoint), receive)
+            response = await endpoint(request)
+
+            if hasattr(response, "body_iterator"):
+                chunks = [chunk async for chunk in response.body_iterator]
+                content = b"".join(c if isinstance(c, bytes) else c.encode("utf8") for c in chunks)
+            else:
+                content = response.body
+        except Exception as exc:
+            response = await self._handle_error(request, exc)
+            content = response.body
+
+        if not content:
+            return response.status_code, b"null"
+
+        media_type = response.headers.get("content-type", "").partition(";")[0]
+
+        if media_type == "application/json":
+            return response.status_code, content
+
+        return response.status_code, get_json_engine().dumps(content.decode("utf8", errors="replace"))
+
+    async def endpoint(self, request):
+        data = get_json_engine().loads(await request.body())
+
+        if isinstance(data, list) and len(data) > self.max_operations:
+            raise BatchTooLarge(self.max_operations)
+
+        operations = BatchOperation(many=True).load(data)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(operation):
+            async with semaphore:
+                return await self.dispatch(request, operation)
+
+        results = await asyncio.gather(*[run(operation) for operation in operations])
+
+        # Splice the encoded bodies into the result, rather than decoding and encoding them again
+        content = b",".join(b'{"status":%d,"body":%s}' % result for result in results)
+
+        return Response(b"[" + content + b"]", headers={"content-type": "application/json"})
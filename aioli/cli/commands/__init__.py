@@ -1,4 +1,8 @@
 from .root import cli_root
 from .repositories import cli_unit
+from .metrics import show_metrics
+from .profile import profile
 
 cli_root.add_command(cli_unit)
+cli_root.add_command(show_metrics)
+cli_root.add_command(profile)
@@ -0,0 +1,68 @@
+from urllib.error import URLError
+from urllib.request import urlopen
+
+import click
+
+from aioli.cli import table
+from aioli.exceptions import CommandError
+from aioli.metrics import parse_samples
+
+
+class MetricsTable(table.BaseTable):
+    def get_row(self, item):
+        for c in self.columns:
+            value = item.get(c, 0)
+            yield f"{value * 1e3:.2f}" if c.endswith(("p50", "p99")) else value
+
+
+def get_routes(samples):
+    routes = {}
+
+    for name, labels, value in samples:
+        if "handler" not in labels:
+            continue
+
+        key = (labels["unit"], labels["controller"], labels["handler"])
+        route = routes.setdefault(key, dict(zip(["unit", "controller", "handler"], key)))
+
+        if name == "aioli_requests_total":
+            route["requests"] = int(value)
+        elif name == "aioli_request_errors_total":
+            route["errors"] = int(value)
+        elif name == "aioli_requests_in_flight":
+            route["in flight"] = int(value)
+        elif name == "aioli_request_duration_seconds" and labels["quantile"] in ["0.5", "0.99"]:
+            quantile = "p50" if labels["quantile"] == "0.5" else "p99"
+            route[f"{labels['phase']} {quantile}"] = value
+
+    return sorted(routes.values(), key=lambda route: route.get("requests", 0), reverse=True)
+
+
+@click.command("metrics", short_help="Show route metrics")
+@click.option(
+    "--url",
+    help="Metrics route of a running application",
+    default="http://127.0.0.1:5000/metrics",
+    show_default=True
+)
+def show_metrics(url):
+    """Shows request counts and latencies (ms) per route handler, fetched from a running application
+    with `metrics` enabled"""
+
+    try:
+        with urlopen(url, timeout=10) as response:
+            text = response.read().decode("utf8")
+    except (URLError, ValueError) as e:
+        raise CommandError(f"Unable to fetch metrics from {url}: {e}")
+
+    routes = get_routes(parse_samples(text))
+
+    if not routes:
+        raise CommandError("No route metrics found")
+
+    columns = ["unit", "controller", "handler", "requests", "errors", "in flight"]
+
+    for phase in ["takes", "handler", "returns"]:
+        columns.extend([f"{phase} p50", f"{phase} p99"])
+
+    click.echo(MetricsTable(columns, routes, max_width=0).draw())
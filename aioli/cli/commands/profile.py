@@ -0,0 +1,60 @@
+import json
+import os
+import time
+
+from urllib.error import URLError, HTTPError
+from urllib.request import urlopen, Request
+
+import click
+
+from aioli.exceptions import CommandError
+
+
+def request(url, token, data=None):
+    headers = {"authorization": f"Bearer {token}", "content-type": "application/json"}
+    body = json.dumps(data).encode() if data is not None else None
+
+    try:
+        with urlopen(Request(url, data=body, headers=headers), timeout=30) as response:
+            return response.read()
+    except HTTPError as e:
+        raise CommandError(f"Profiler request failed: {e.code} {e.read().decode('utf8', 'replace')}")
+    except (URLError, ValueError) as e:
+        raise CommandError(f"Unable to reach profiler at {url}: {e}")
+
+
+@click.command("profile", short_help="Profile a running application")
+@click.option(
+    "--url",
+    help="Profiler route of a running application",
+    default="http://127.0.0.1:5000/_profile",
+    show_default=True
+)
+@click.option("--token", help="Profiler token", envvar="AIOLI_PROFILER_TOKEN", required=True)
+@click.option("--mode", type=click.Choice(["sample", "cprofile"]), default="sample", show_default=True)
+@click.option("--seconds", type=float, help="Stop after this many seconds")
+@click.option("--requests", type=int, help="Stop after this many requests")
+@click.option("--unit", help="Only profile handlers of this Unit")
+@click.option("--handler", help="Only profile this handler, e.g. VisitsController.visits_get")
+@click.option("--output", help="Directory to save the result in", default=".", show_default=True)
+def profile(url, token, mode, seconds, requests, unit, handler, output):
+    """Profiles requests of a running application with `profiler_token` set, and downloads the result:
+    collapsed stacks (.folded) for use with flamegraph tools, or pstats (.prof) in cprofile mode"""
+
+    if seconds is None and requests is None:
+        raise CommandError("Either --seconds or --requests must be provided")
+
+    options = dict(mode=mode, seconds=seconds, requests=requests, unit=unit, handler=handler)
+    session = json.loads(request(url, token, {k: v for k, v in options.items() if v is not None}))
+    click.echo(f"Profiling started, mode: {mode}")
+
+    while not session["done"]:
+        time.sleep(0.5)
+        session = json.loads(request(url, token))["session"]
+
+    path = os.path.join(output, session["result"])
+
+    with open(path, "wb") as fh:
+        fh.write(request(f"{url.rstrip('/')}/{session['result']}", token))
+
+    click.echo(f"Profiled {session['requests_profiled']} requests, saved to: {path}")
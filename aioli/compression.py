@@ -0,0 +1,286 @@
+import abc
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class Encoder(abc.ABC):
+    """Compresses response bodies using a specific content-coding
+
+    Whole bodies, e.g. cached responses, are compressed once at a higher level than
+    streamed chunks, which are flushed as they're written.
+    """
+
+    name = None
+    available = True
+
+    @abc.abstractmethod
+    def compress(self, data, static=False):
+        """Compresses a whole body, harder if it's `static`, i.e. compressed once and served many times"""
+
+    @abc.abstractmethod
+    def stream(self):
+        """Returns a (compress, finish) pair of functions for compressing chunks of a body"""
+
+
+class GzipEncoder(Encoder):
+    name = "gzip"
+
+    def compress(self, data, static=False):
+        compressor = zlib.compressobj(9 if static else 6, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+        def compress(chunk):
+            return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        return compress, compressor.flush
+
+
+class BrotliEncoder(Encoder):
+    name = "br"
+    available = brotli is not None
+
+    def compress(self, data, static=False):
+        return brotli.compress(data, quality=9 if static else 4)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=4)
+
+        def compress(chunk):
+            return compressor.process(chunk) + compressor.flush()
+
+        return compress, compressor.finish
+
+
+class ZstdEncoder(Encoder):
+    name = "zstd"
+    available = zstandard is not None
+
+    def compress(self, data, static=False):
+        return zstandard.ZstdCompressor(level=10 if static else 3).compress(data)
+
+    def stream(self):
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+        def compress(chunk):
+            return compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        return compress, compressor.flush
+
+
+ENCODERS = {encoder.name: encoder for encoder in [BrotliEncoder, ZstdEncoder, GzipEncoder]}
+
+
+def parse_accept_encoding(value):
+    """Returns a dictionary of content-codings and their quality values
+
+    :param value: Accept-Encoding header value
+    :return: Dictionary of coding names and q-values
+    """
+
+    codings = {}
+
+    for item in value.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+
+        if not name:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+
+        codings[name] = quality
+
+    return codings
+
+
+class Compressor:
+    """Negotiates and applies response compression
+
+    :param encodings: Content-codings in order of preference, unavailable ones are skipped
+    :param minimum_size: Don't compress bodies smaller than this many bytes
+    """
+
+    # Max number of distinct Accept-Encoding values to remember negotiation results for
+    max_negotiated = 256
+
+    def __init__(self, encodings, minimum_size=500):
+        self.encoders = {
+            name: ENCODERS[name]() for name in encodings if ENCODERS[name].available
+        }
+        self.minimum_size = minimum_size
+        self._negotiated = {}
+
+    def negotiate(self, accept_encoding):
+        """Returns the preferred content-coding acceptable to the client, or None
+
+        :param accept_encoding: Accept-Encoding header value
+        :return: Content-coding name or None
+        """
+
+        if not accept_encoding:
+            return None
+        elif accept_encoding in self._negotiated:
+            return self._negotiated[accept_encoding]
+
+        codings = parse_accept_encoding(accept_encoding)
+        wildcard = codings.get("*", 0.0)
+        selected, best = None, 0.0
+
+        # Encoders are ordered by preference, only replace the selection if the client prefers another
+        for name in self.encoders:
+            quality = codings.get(name, wildcard)
+
+            if quality > best:
+                selected, best = name, quality
+
+        if len(self._negotiated) < self.max_negotiated:
+            self._negotiated[accept_encoding] = selected
+
+        return selected
+
+    def select(self, headers, size):
+        """Returns the content-coding to use for a body of `size` bytes, or None
+
+        :param headers: Request headers
+        :param size: Body size in bytes
+        :return: Content-coding name or None
+        """
+
+        if size < self.minimum_size:
+            return None
+
+        return self.negotiate(headers.get("accept-encoding"))
+
+    def compress(self, data, encoding, static=False):
+        return self.encoders[encoding].compress(data, static)
+
+    def stream(self, encoding):
+        return self.encoders[encoding].stream()
+
+
+def set_encoding_headers(raw_headers, encoding, length=None):
+    """Updates response headers for a body compressed using `encoding`
+
+    :param raw_headers: List of raw header pairs, modified in-place
+    :param encoding: Content-coding name
+    :param length: Compressed body length, or None if streamed
+    """
+
+    headers = MutableHeaders(raw=raw_headers)
+    headers["content-encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+
+    if length is None:
+        del headers["content-length"]
+    else:
+        headers["content-length"] = str(length)
+
+    # The compressed representation is no longer byte-for-byte identical
+    etag = headers.get("etag")
+
+    if etag and not etag.startswith("W/"):
+        headers["etag"] = "W/" + etag
+
+
+class CompressionMiddleware:
+    """Compresses responses using the content-coding negotiated with the client
+
+    Responses that already have a Content-Encoding, e.g. precompressed cached responses,
+    and responses of route handlers opting out using `@route(..., compress=False)` pass through.
+
+    :param app: ASGI application
+    :param compressor: Compressor instance
+    """
+
+    def __init__(self, app, compressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            encoding = self.compressor.negotiate(Headers(scope=scope).get("accept-encoding"))
+
+            if encoding:
+                responder = CompressionResponder(self.app, self.compressor, encoding)
+                await responder(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app, compressor, encoding):
+        self.app = app
+        self.compressor = compressor
+        self.encoding = encoding
+        self.scope = None
+        self.send = None
+        self.start_message = None
+        self.compress = None
+        self.finish = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        self.scope = scope
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            # Hold on to headers until the first body message tells how to handle the response
+            self.start_message = message
+            return
+        elif message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compress:
+            message["body"] = self.compress(body) + (b"" if more_body else self.finish())
+            await self.send(message)
+            return
+
+        start_message = self.start_message
+        headers = Headers(raw=start_message["headers"])
+
+        if (
+            "content-encoding" in headers
+            or self.scope.get("aioli.compress") is False
+            or not more_body and len(body) < self.compressor.minimum_size
+        ):
+            self.passthrough = True
+        elif not more_body:
+            body = self.compressor.compress(body, self.encoding)
+            set_encoding_headers(start_message["headers"], self.encoding, len(body))
+            message["body"] = body
+        else:
+            # Streamed response: compress and flush each chunk as it arrives
+            self.compress, self.finish = self.compressor.stream(self.encoding)
+            set_encoding_headers(start_message["headers"], self.encoding)
+            message["body"] = self.compress(body)
+
+        await self.send(start_message)
+        await self.send(message)
@@ -0,0 +1,364 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .context import check_deadline
+from .exceptions import ServiceUnavailable
+from .metrics import Histogram
+
+
+class SingleFlight:
+    """Ensures only one call per key is in flight; concurrent callers using the
+    same key await the first call and share its result, or exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    @property
+    def in_flight(self):
+        """Number of keys with a call in flight"""
+
+        return len(self._calls)
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    async def run(self, key, func, *args, **kwargs):
+        """Calls and awaits `func`, unless a call using `key` is already in flight
+
+        :param key: Hashable call identifier
+        :param func: Coroutine function
+        :return: Result of the call
+        """
+
+        future = self._calls.get(key)
+
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+                # The first caller was cancelled, rather than this one: try again
+                return await self.run(key, func, *args, **kwargs)
+
+        future = self._calls[key] = asyncio.get_event_loop().create_future()
+
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+
+            # Mark as retrieved, in case there were no other callers
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+class ConcurrencyLimiter:
+    """Limits the number of concurrent calls, queueing excess calls in FIFO order, up to `max_queue`.
+    Calls arriving when the queue is full are rejected with a 503 Service Unavailable.
+
+    :param max_concurrency: Max number of calls in progress
+    :param max_queue: Max number of calls waiting, None for no limit
+    :param retry_after: Retry-After seconds sent when rejecting a call
+
+    :var active: Number of calls in progress
+    :var admitted: Number of calls admitted, immediately or after waiting
+    :var shed: Number of calls rejected
+    """
+
+    def __init__(self, max_concurrency, max_queue=None, retry_after=1):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.active = self.admitted = self.shed = 0
+        self._waiters = deque()
+
+    @property
+    def queued(self):
+        """Number of calls waiting"""
+
+        return len(self._waiters)
+
+    @property
+    def stats(self):
+        return dict(
+            active=self.active,
+            queued=self.queued,
+            admitted=self.admitted,
+            shed=self.shed,
+        )
+
+    async def acquire(self):
+        """Waits for a slot to become available, or raises ServiceUnavailable if the queue is full"""
+
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise ServiceUnavailable(retry_after=self.retry_after)
+
+        future = asyncio.get_event_loop().create_future()
+        self._waiters.append(future)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                if future in self._waiters:
+                    self._waiters.remove(future)
+            else:
+                # The slot was handed over before the cancellation took effect
+                self.release()
+
+            raise
+
+        self.admitted += 1
+
+    def release(self):
+        """Hands the slot over to the next waiting call, if any"""
+
+        while self._waiters:
+            future = self._waiters.popleft()
+
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self.active -= 1
+
+
+class BlockingPool:
+    """Runs blocking calls in a thread pool of its own, keeping track of calls waiting for a thread.
+    Calls arriving when `max_queue` calls are waiting are rejected with a 503 Service Unavailable.
+
+    :param name: Pool name, used as thread name prefix
+    :param max_workers: Number of threads
+    :param max_queue: Max number of calls waiting for a thread, None for no limit
+
+    :var submitted: Number of calls submitted
+    :var completed: Number of calls completed, successfully or not
+    :var rejected: Number of calls rejected
+    :var wait_time: Histogram of time calls spent waiting for a thread, in microseconds
+    """
+
+    def __init__(self, name, max_workers, max_queue=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.submitted = self.completed = self.rejected = 0
+        self.wait_time = Histogram()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._started = self._dropped = self._active = 0
+        self._waits = []
+        self._futures = set()
+
+    @property
+    def queued(self):
+        """Number of calls waiting for a thread"""
+
+        return self.submitted - self._dropped - self._started
+
+    @property
+    def stats(self):
+        self.fold()
+
+        return dict(
+            active=self._active,
+            queued=self.queued,
+            completed=self.completed,
+            rejected=self.rejected,
+        )
+
+    def fold(self):
+        """Records pending wait time samples in the histogram"""
+
+        if self._waits:
+            samples = self._waits[:]
+            del self._waits[:len(samples)]
+            self.wait_time.record_many(samples)
+
+    def _call(self, ctx, submitted, func, args):
+        # Runs in a worker thread: list appends are atomic, counters are shared between threads
+        self._waits.append((time.perf_counter_ns() - submitted) // 1000)
+
+        with self._lock:
+            self._started += 1
+            self._active += 1
+
+        try:
+            return ctx.run(self._run_before_deadline, func, args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self.completed += 1
+
+    @staticmethod
+    def _run_before_deadline(func, args):
+        # Calls that waited past the deadline of their request are skipped
+        check_deadline()
+        return func(*args)
+
+    async def run(self, func, *args):
+        """Calls `func` in a thread of the pool, in a copy of the current context
+
+        :param func: Blocking function
+        :param args: Positional arguments
+        :return: Return value of the call
+        :raises: ServiceUnavailable if the queue is full, GatewayTimeout if the request deadline has passed
+        """
+
+        if self.max_queue is not None and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ServiceUnavailable()
+
+        check_deadline()
+        self.submitted += 1
+        future = self._executor.submit(self._call, contextvars.copy_context(), time.perf_counter_ns(), func, args)
+        self._futures.add(future)
+        future.add_done_callback(self._done)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Calls still waiting for a thread are dropped, rather than run for a caller that's gone
+            future.cancel()
+            raise
+
+    def _done(self, future):
+        # Futures are only cancelled on the event loop thread
+        self._futures.discard(future)
+
+        if future.cancelled():
+            self._dropped += 1
+
+    def shutdown(self):
+        """Drops waiting calls and stops threads once running calls complete"""
+
+        # Executor.shutdown(cancel_futures=True) requires Python 3.9
+        for future in list(self._futures):
+            future.cancel()
+
+        self._executor.shutdown(wait=False)
+
+
+def _get_pid():
+    return os.getpid()
+
+
+class ProcessPool:
+    """Runs CPU-bound calls in worker processes, created on demand or when started.
+    Calls arriving when `max_queue` calls are waiting for a process are rejected with a 503 Service Unavailable.
+
+    Functions and arguments are sent to workers by pickling: functions are pickled by reference, and must
+    be importable by their qualified name.
+
+    :param max_workers: Number of processes, None for the number of CPUs
+    :param max_queue: Max number of calls waiting for a process, None for no limit
+
+    :var in_flight: Number of calls awaited
+    :var completed: Number of calls completed, successfully or not
+    :var rejected: Number of calls rejected
+    """
+
+    def __init__(self, max_workers=None, max_queue=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.in_flight = self.completed = self.rejected = 0
+        self._executor = None
+        self._futures = set()
+
+    @property
+    def queued(self):
+        """Number of calls waiting for a process"""
+
+        return max(0, self.in_flight - self.max_workers)
+
+    @property
+    def stats(self):
+        return dict(
+            in_flight=self.in_flight,
+            queued=self.queued,
+            completed=self.completed,
+            rejected=self.rejected,
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers)
+
+        return self._executor
+
+    async def start(self):
+        """Starts all worker processes, rather than as the first calls arrive
+
+        :return: Worker process IDs
+        """
+
+        executor = self._get_executor()
+
+        # Each call submitted while no worker is idle starts a new one, up to `max_workers`
+        return await asyncio.gather(*[asyncio.wrap_future(executor.submit(_get_pid)) for _ in range(self.max_workers)])
+
+    async def run(self, func, *args):
+        """Calls `func` in a worker process
+
+        :param func: Module-level function
+        :param args: Picklable positional arguments
+        :return: Return value of the call
+        :raises: ServiceUnavailable if the queue is full, GatewayTimeout if the request deadline has passed
+        """
+
+        if self.max_queue is not None and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ServiceUnavailable()
+
+        check_deadline()
+        future = self._get_executor().submit(func, *args)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        self.in_flight += 1
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Calls still waiting for a process are dropped; running ones can't be interrupted
+            future.cancel()
+            raise
+        finally:
+            self.in_flight -= 1
+
+            if future.done() and not future.cancelled():
+                self.completed += 1
+
+    async def shutdown(self):
+        """Drops waiting calls, and stops worker processes once running calls complete"""
+
+        # Executor.shutdown(cancel_futures=True) requires Python 3.9
+        for future in list(self._futures):
+            future.cancel()
+
+        executor, self._executor = self._executor, None
+
+        if executor is not None:
+            # Waits in a thread: before Python 3.9, shutdown(wait=False) can break the executor's management thread
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
@@ -1,6 +1,9 @@
 from os import environ as env
 
-from marshmallow import fields, post_load, schema
+from marshmallow import fields, post_load, schema, validate
+
+from .compression import ENCODERS
+from .engines import JSON_ENGINES
 
 
 class ConfigMeta(schema.SchemaMeta):
@@ -21,9 +24,12 @@ class BaseConfigSchema(schema.Schema, metaclass=ConfigMeta):
             env_param = self.prefix + param.upper()
 
             if env_param in env:  # Prefer environ
+                field = self.fields.get(param)
                 value = env.get(env_param)
                 if isinstance(field, fields.Integer):
                     value = int(value)
+                if isinstance(field, fields.Float):
+                    value = float(value)
                 if isinstance(field, fields.Boolean):
                     value = str(value).strip().lower() in ["1", "true", "yes"]
             else:
@@ -41,6 +47,16 @@ class UnitConfigSchema(BaseConfigSchema):
     :var path: Unit path, uses Unit name if empty
     :var should_import_services: Setting to False skips Service registration for this Unit
     :var should_import_controllers: Setting to False skips Controller registration for this Unit
+    :var max_body_size: Reject request bodies larger than this many bytes, None for no limit
+    :var cache_max_entries: Max number of responses kept in the Unit's response cache
+    :var max_concurrency: Max number of requests handled concurrently by the Unit, None for no limit
+    :var max_queue: Max number of requests waiting for `max_concurrency`, beyond which they're rejected
+        with a 503 response, None for no limit
+    :var executor_workers: Number of threads in the Unit's pool for blocking calls, see `BaseService.run_blocking`
+    :var executor_max_queue: Max number of blocking calls waiting for a thread, beyond which they're rejected
+        with a 503 response, None for no limit
+    :var timeout: Seconds the Unit's route handlers may take before they're cancelled and a 504 response is
+        returned, None for no limit
     """
 
     def __init__(self, *args, **kwargs):
@@ -50,6 +66,13 @@ class UnitConfigSchema(BaseConfigSchema):
     path = fields.String(required=False, missing=None)
     should_import_controllers = fields.Bool(missing=True)
     should_import_services = fields.Bool(missing=True)
+    max_body_size = fields.Integer(missing=None, allow_none=True, validate=validate.Range(min=0))
+    cache_max_entries = fields.Integer(missing=1024, validate=validate.Range(min=0))
+    max_concurrency = fields.Integer(missing=None, allow_none=True, validate=validate.Range(min=1))
+    max_queue = fields.Integer(missing=None, allow_none=True, validate=validate.Range(min=0))
+    executor_workers = fields.Integer(missing=4, validate=validate.Range(min=1))
+    executor_max_queue = fields.Integer(missing=None, allow_none=True, validate=validate.Range(min=0))
+    timeout = fields.Float(missing=None, allow_none=True, validate=validate.Range(min=0))
 
 
 class ApplicationConfigSchema(BaseConfigSchema):
@@ -59,12 +82,60 @@ class ApplicationConfigSchema(BaseConfigSchema):
     :var dev_port: Development server listen port
     :var debug: Debug mode
     :var path: Application base path
+    :var json_engine: JSON engine used for requests, responses and schemas: json, ujson or orjson
+    :var compression: Compress responses using a content-coding accepted by the client
+    :var compression_encodings: Content-codings in order of preference, unavailable ones are skipped
+    :var compression_min_size: Don't compress response bodies smaller than this many bytes
+    :var router: Route matching strategy: linear, trying each route in turn, or radix, using a prefix tree
+    :var metrics: Record per-route latency histograms and counters, and serve them in the Prometheus format
+    :var metrics_path: Path of the metrics route
+    :var batch: Enable the batch route at `api_base`/batch, for running multiple operations in one request
+    :var batch_max_operations: Max number of operations in a batch
+    :var batch_concurrency: Max number of operations of a batch running concurrently
+    :var profiler_token: Enable the profiler routes at `profiler_path`, authorized using this bearer token
+    :var profiler_path: Path of the profiler routes
+    :var profiler_dir: Directory profiling results are written to
+    :var load_shedding: Reject requests to low priority routes while the event loop lags behind
+    :var shedding_lag_target: Acceptable event loop lag in seconds, before shedding load
+    :var shedding_interval: Seconds between event loop lag measurements
+    :var profile: Options of a profiling session to start with the Application, e.g. {"seconds": 30}
+    :var process_workers: Number of worker processes running Service methods offloaded using
+        `@offload(process=True)`, None for the number of CPUs
+    :var process_max_queue: Max number of offloaded calls waiting for a worker process, beyond which they're
+        rejected with a 503 response, None for no limit
+    :var startup_timeout: Seconds each Service and Controller `on_startup` may take, None for no limit
+    :var drain_timeout: Seconds to wait for in-flight requests when shutting down, before calling shutdown handlers
+    :var shutdown_timeout: Seconds each Service and Controller `on_shutdown` may take, None for no limit
     """
 
     def __init__(self, *args, **kwargs):
         super(ApplicationConfigSchema, self).__init__("AIOLI_", *args, **kwargs)
 
     pretty_json = fields.Bool(missing=False)
+    json_engine = fields.String(missing="ujson", validate=validate.OneOf(list(JSON_ENGINES)))
     allow_origins = fields.List(fields.String(), missing=["*"])
+    compression = fields.Bool(missing=False)
+    compression_encodings = fields.List(
+        fields.String(validate=validate.OneOf(list(ENCODERS))), missing=["br", "zstd", "gzip"]
+    )
+    compression_min_size = fields.Integer(missing=500, validate=validate.Range(min=0))
+    router = fields.String(missing="linear", validate=validate.OneOf(["linear", "radix"]))
+    metrics = fields.Bool(missing=False)
+    metrics_path = fields.String(missing="/metrics")
+    batch = fields.Bool(missing=False)
+    batch_max_operations = fields.Integer(missing=50, validate=validate.Range(min=1))
+    batch_concurrency = fields.Integer(missing=8, validate=validate.Range(min=1))
+    load_shedding = fields.Bool(missing=False)
+    shedding_lag_target = fields.Float(missing=0.05, validate=validate.Range(min=0, min_inclusive=False))
+    shedding_interval = fields.Float(missing=0.1, validate=validate.Range(min=0.001))
+    profiler_token = fields.String(missing=None, allow_none=True, validate=validate.Length(min=16))
+    profiler_path = fields.String(missing="/_profile")
+    profiler_dir = fields.String(missing="profiles")
+    profile = fields.Dict(missing=None, allow_none=True)
+    process_workers = fields.Integer(missing=None, allow_none=True, validate=validate.Range(min=1))
+    process_max_queue = fields.Integer(missing=None, allow_none=True, validate=validate.Range(min=0))
+    startup_timeout = fields.Float(missing=60.0, allow_none=True, validate=validate.Range(min=0, min_inclusive=False))
+    drain_timeout = fields.Float(missing=30.0, validate=validate.Range(min=0))
+    shutdown_timeout = fields.Float(missing=30.0, allow_none=True, validate=validate.Range(min=0, min_inclusive=False))
     debug = fields.Bool(missing=False)
     api_base = fields.String(missing="/api")
@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import time
+
+from .exceptions import GatewayTimeout
+
+# Deadline of the request being handled, in time.monotonic() seconds
+_deadline = contextvars.ContextVar("aioli_deadline", default=None)
+
+# Values cached for the duration of the request being handled, by owner, e.g. a DataLoader
+_request_cache = contextvars.ContextVar("aioli_request_cache", default=None)
+
+
+def get_request_cache():
+    """Returns the cache of the request being handled, or None outside of requests"""
+
+    return _request_cache.get()
+
+
+def set_request_cache():
+    """Starts an empty cache for the request being handled
+
+    :return: Token for reset_request_cache
+    """
+
+    return _request_cache.set({})
+
+
+def reset_request_cache(token):
+    """Restores the cache replaced by set_request_cache
+
+    :param token: Token returned by set_request_cache
+    """
+
+    _request_cache.reset(token)
+
+
+def get_deadline():
+    """Returns the deadline of the current request, in `time.monotonic()` seconds, or None"""
+
+    return _deadline.get()
+
+
+def set_deadline(timeout):
+    """Sets the deadline of the current context to `timeout` seconds from now, unless an earlier one is set
+
+    :param timeout: Timeout in seconds
+    :return: Token for reset_deadline
+    """
+
+    deadline = time.monotonic() + timeout
+    current = _deadline.get()
+
+    if current is not None and current < deadline:
+        deadline = current
+
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token):
+    """Restores the deadline replaced by set_deadline
+
+    :param token: Token returned by set_deadline
+    """
+
+    _deadline.reset(token)
+
+
+def remaining():
+    """Returns the number of seconds left before the deadline of the current request, or None if it has none"""
+
+    deadline = _deadline.get()
+
+    if deadline is None:
+        return None
+
+    return max(0.0, deadline - time.monotonic())
+
+
+def budget(timeout=None):
+    """Shrinks a downstream timeout to the time left before the deadline of the current request
+
+    :param timeout: Timeout in seconds, None for no timeout
+    :return: The smallest of `timeout` and the remaining time, None if neither is set
+    """
+
+    left = remaining()
+
+    if left is None:
+        return timeout
+    elif timeout is None:
+        return left
+
+    return min(timeout, left)
+
+
+def check_deadline():
+    """Raises GatewayTimeout if the deadline of the current request has passed"""
+
+    if remaining() == 0.0:
+        raise GatewayTimeout()
+
+
+def _call_before_deadline(func, args):
+    # Calls still queued in the executor once the deadline has passed are skipped, rather than started
+    check_deadline()
+    return func(*args)
+
+
+async def run_in_executor(executor, func, *args):
+    """Runs `func` in an executor, in a copy of the current context, so that it can read the deadline
+
+    :param executor: concurrent.futures.Executor, None for the loop's default executor
+    :param func: Blocking function
+    :param args: Positional arguments
+    :return: Return value of the call
+    :raises: GatewayTimeout if the deadline passed before the call started
+    """
+
+    check_deadline()
+    ctx = contextvars.copy_context()
+
+    return await asyncio.get_running_loop().run_in_executor(executor, ctx.run, _call_before_deadline, func, args)
@@ -1,4 +1,4 @@
 from .base import BaseHttpController, BaseWebSocketController
-from .decorators import route, takes, returns
-from .consts import RequestProp, Method
+from .decorators import route, takes, returns, cached
+from .consts import RequestProp, Method, StreamFormat, Priority
 
@@ -4,10 +4,17 @@ from aioli.component import Component, ComponentMeta
 from aioli.exceptions import BootstrapError
 from aioli.utils import format_path
 
-from .registry import handlers
+from .pipeline import Pipeline
+from .registry import index_handlers
 
 
 class HttpControllerMeta(ComponentMeta):
+    def __init__(cls, name, bases, namespace):
+        super(HttpControllerMeta, cls).__init__(name, bases, namespace)
+
+        # Index route handlers once, when the Controller class is defined
+        cls.handler_index = index_handlers(cls)
+
     def __call__(cls, unit, *args, **kwargs):
         if cls not in cls._instances:
             cls._instances[cls] = super(ComponentMeta, cls).__call__(unit, *args, **kwargs)
@@ -28,12 +35,20 @@ class BaseHttpController(Component, metaclass=HttpControllerMeta):
     :var unit: Parent Unit
     :var config: Unit configuration
     :var log: Controller logger
+    :var handler_index: Route handlers of this Controller class, keyed by qualified name
     """
 
     async def on_request(self, *args):
         """Called on request arrival for this Controller"""
 
     def register_routes(self, api_base):
+        # Skip the `on_request` call altogether unless the Controller implements it
+        on_request = (
+            self.on_request
+            if type(self).on_request is not BaseHttpController.on_request
+            else None
+        )
+
         for func, handler in self.handlers:
             handler_addr = hex(id(func))
             handler_name = f"{self.__class__.__name__}.{handler.name}"
@@ -50,15 +65,17 @@ class BaseHttpController(Component, metaclass=HttpControllerMeta):
 
             methods = [handler.method]
 
-            self.unit.app.add_route(path_full, func, methods, handler_name)
+            # Compile the Handler and its transformation stack into a single coroutine
+            endpoint = Pipeline(self, handler).compile(on_request)
+
+            self.unit.app.add_route(path_full, endpoint, methods, handler_name)
             handler.path_full = path_full
+            handler.endpoint = endpoint
 
     @property
     def handlers(self):
-        for handler in handlers.values():
-            # Yield only if the stack belongs to the Controller being iterated on
-            if handler.func.__module__ == self.__module__:
-                yield getattr(self, handler.name), handler
+        for handler in self.handler_index.values():
+            yield getattr(self, handler.name), handler
 
 
 class BaseWebSocketController(WebSocketEndpoint, Component, metaclass=ComponentMeta):
@@ -0,0 +1,258 @@
+import codecs
+import re
+
+from json.decoder import JSONDecoder, JSONDecodeError
+
+from aioli.exceptions import AioliException
+
+
+class BodyTooLarge(AioliException):
+    def __init__(self, limit):
+        super(BodyTooLarge, self).__init__(
+            status=413,
+            message=f"Request body exceeds the limit of {limit} bytes"
+        )
+
+
+async def iter_body(request, limit=None):
+    """Yields chunks of the request body, raising BodyTooLarge as soon as `limit` is crossed
+
+    :param request: Starlette Request
+    :param limit: Max body size in bytes, or None for no limit
+    """
+
+    if limit is None:
+        async for chunk in request.stream():
+            yield chunk
+
+        return
+
+    # Reject early if the client announced a body that's too large
+    content_length = request.headers.get("content-length")
+
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise BodyTooLarge(limit)
+
+    received = 0
+
+    async for chunk in request.stream():
+        received += len(chunk)
+
+        if received > limit:
+            raise BodyTooLarge(limit)
+
+        yield chunk
+
+
+async def read_body(request, limit=None):
+    """Reads and returns the request body, raising BodyTooLarge as soon as `limit` is crossed
+
+    :param request: Starlette Request
+    :param limit: Max body size in bytes, or None for no limit
+    :return: Body bytes
+    """
+
+    if hasattr(request, "_body"):
+        body = request._body
+    else:
+        body = bytearray()
+
+        async for chunk in iter_body(request, limit):
+            body += chunk
+
+        body = request._body = bytes(body)
+
+    if limit is not None and len(body) > limit:
+        raise BodyTooLarge(limit)
+
+    return body
+
+
+class JsonArrayParser:
+    """Incremental parser for JSON arrays, returning items as soon as they're complete
+
+    Items are decoded using the standard library's `json`, whichever JSON engine is selected, as it can decode
+    an item in place and report where it ends. Items split across chunks are scanned for their end as chunks
+    arrive, and decoded once complete, rather than decoded again from their start on every chunk.
+    """
+
+    WHITESPACE = " \t\n\r"
+
+    # A string, complete if the closing quote is matched, or a bracket
+    TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[\[\]{}]', re.DOTALL)
+    # Remainder of a string whose start was in a previous chunk
+    STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*(")?', re.DOTALL)
+    # Characters ending a scalar, e.g. a number
+    SCALAR_END = re.compile(r"[ \t\n\r,\]]")
+
+    # Parser states
+    START, FIRST, VALUE, SEPARATOR, DONE = range(5)
+
+    def __init__(self):
+        self._decoder = JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = self.START
+        self._reset_scan()
+
+    def _reset_scan(self):
+        # Progress of the scan of an incomplete item, relative to its start
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+
+    def _skip_whitespace(self):
+        buffer, pos = self._buffer, self._pos
+
+        while pos < len(buffer) and buffer[pos] in self.WHITESPACE:
+            pos += 1
+
+        self._pos = pos
+
+    def _error(self, message):
+        return JSONDecodeError(message, self._buffer, self._pos)
+
+    def _scan_item(self, final):
+        """Scans the item at the current position
+
+        :param final: Whether the buffer holds the rest of the body
+        :return: End of the item, or None if it's incomplete
+        """
+
+        buffer, start = self._buffer, self._pos
+        pos = start + self._scanned
+
+        if buffer[start] not in '"[{':
+            # Scalars end at the first delimiter, or with the body
+            match = self.SCALAR_END.search(buffer, pos)
+
+            if match:
+                return match.start()
+
+            self._scanned = len(buffer) - start
+            return len(buffer) if final else None
+
+        depth = self._depth
+
+        if self._in_string:
+            match = self.STRING_REST.match(buffer, pos)
+            pos = match.end()
+
+            if match.group(1) is None:
+                self._scanned = pos - start
+                return None
+
+            self._in_string = False
+
+            if depth == 0:
+                return pos
+
+        while True:
+            match = self.TOKEN.search(buffer, pos)
+
+            if not match:
+                pos = len(buffer)
+                break
+
+            token, pos = match.group(), match.end()
+
+            if token[0] == '"':
+                if match.group(1) is None:
+                    # Resume within the string, which stops short of a trailing backslash
+                    self._in_string = True
+                    break
+            elif token in "[{":
+                depth += 1
+                continue
+            else:
+                depth -= 1
+
+            if depth == 0:
+                return pos
+
+        self._scanned, self._depth = pos - start, depth
+        return None
+
+    def feed(self, chunk, final=False):
+        """Feeds a chunk of bytes to the parser
+
+        :param chunk: Bytes
+        :param final: Whether this is the last chunk
+        :return: List of items completed by this chunk
+        """
+
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk, final)
+        self._pos = 0
+        items = []
+
+        while self._state != self.DONE:
+            self._skip_whitespace()
+
+            if self._pos == len(self._buffer):
+                break
+
+            char = self._buffer[self._pos]
+
+            if self._state == self.START:
+                if char != "[":
+                    raise self._error("Expecting JSON array")
+
+                self._pos += 1
+                self._state = self.FIRST
+            elif self._state == self.SEPARATOR or self._state == self.FIRST and char == "]":
+                if char not in ",]":
+                    raise self._error("Expecting ',' delimiter")
+
+                self._pos += 1
+                self._state = self.VALUE if char == "," else self.DONE
+            else:
+                if not self._scanned:
+                    try:
+                        item, end = self._decoder.raw_decode(self._buffer, self._pos)
+                    except JSONDecodeError:
+                        if final:
+                            raise
+
+                        end = None
+
+                    # Values ending at the buffer boundary, e.g. numbers, may continue in the next chunk
+                    if end is not None and (end < len(self._buffer) or final):
+                        items.append(item)
+                        self._pos = end
+                        self._state = self.SEPARATOR
+                        continue
+
+                if self._scan_item(final) is None:
+                    break
+
+                item, end = self._decoder.raw_decode(self._buffer, self._pos)
+                items.append(item)
+                self._reset_scan()
+                self._pos = end
+                self._state = self.SEPARATOR
+
+        if final:
+            self._skip_whitespace()
+
+            if self._state != self.DONE or self._pos != len(self._buffer):
+                raise self._error("Incomplete JSON array, or trailing data")
+
+        return items
+
+
+async def iter_json_array(request, limit=None):
+    """Yields items of a JSON array request body as they arrive
+
+    :param request: Starlette Request
+    :param limit: Max body size in bytes, or None for no limit
+    """
+
+    parser = JsonArrayParser()
+
+    async for chunk in iter_body(request, limit):
+        for item in parser.feed(chunk):
+            yield item
+
+    for item in parser.feed(b"", final=True):
+        yield item
@@ -0,0 +1,155 @@
+from operator import itemgetter
+from urllib.parse import urlencode
+
+from starlette.responses import Response
+
+from aioli.compression import set_encoding_headers
+from aioli.datastores import LRUStore
+
+# Headers identifying the user making a request
+CREDENTIAL_HEADERS = ["authorization", "cookie"]
+
+
+def get_cache_key(method, headers=None):
+    """Returns a function creating cache keys from the method, path, query and selected headers of a request
+
+    :param method: HTTP method
+    :param headers: List of header names to include in the key
+    :return: Key function
+    """
+
+    header_names = [name.lower() for name in headers or []]
+
+    def get_key(request, kwargs):
+        query = kwargs.get("query") if kwargs else None
+
+        if query is None:
+            items = sorted(request.query_params.multi_items())
+        else:
+            items = [(name, str(value)) for name, value in sorted(query.items(), key=itemgetter(0))]
+
+        key = f"{method} {request.scope['path']}"
+
+        if items:
+            key += "?" + urlencode(items)
+
+        if header_names:
+            key += "|" + "|".join(request.headers.get(name, "") for name in header_names)
+
+        return key
+
+    return get_key
+
+
+class CachedResponse:
+    __slots__ = ["body", "status", "headers", "tags", "variants"]
+
+    def __init__(self, body, status, headers, tags):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.tags = tags
+        self.variants = {}
+
+    @classmethod
+    def from_response(cls, response, tags=None):
+        return cls(response.body, response.status_code, list(response.raw_headers), tags)
+
+    def to_response(self):
+        response = Response(self.body, status_code=self.status)
+        response.raw_headers = list(self.headers)
+
+        return response
+
+    def to_compressed_response(self, compressor, encoding):
+        """Returns a Response with the body compressed using `encoding`, compressing it only once
+
+        :param compressor: Application Compressor
+        :param encoding: Content-coding name
+        :return: Starlette Response
+        """
+
+        body = self.variants.get(encoding)
+
+        if body is None:
+            body = self.variants[encoding] = compressor.compress(self.body, encoding, static=True)
+
+        response = Response(body, status_code=self.status)
+        response.raw_headers = list(self.headers)
+        set_encoding_headers(response.raw_headers, encoding, len(body))
+
+        return response
+
+
+class ResponseCache:
+    """Per-Unit cache of encoded responses, used by handlers decorated with @cached
+
+    Keys are made up of the request method, path, query and selected headers, in the form
+    "GET /api/guestbook/visitors?limit=10", making it possible to invalidate by prefix.
+
+    :param max_entries: Max number of cached responses, least recently used are evicted first
+    """
+
+    def __init__(self, max_entries=1024):
+        self.store = LRUStore(max_entries)
+        self._tags = {}
+
+    def get(self, key):
+        """Returns the CachedResponse for `key`, or None"""
+
+        return self.store.get(key)
+
+    def put(self, key, response, ttl=None, tags=None):
+        """Caches a successful, non-streaming Response
+
+        :param key: Cache key
+        :param response: Starlette Response
+        :param ttl: Lifetime in seconds
+        :param tags: List of tags, for use with invalidate()
+        :return: CachedResponse, or None if the response wasn't cached
+        """
+
+        if not 200 <= response.status_code < 300 or not hasattr(response, "body"):
+            return None
+
+        entry = CachedResponse.from_response(response, tags)
+        self.store.set(key, entry, ttl=ttl)
+
+        for tag in tags or []:
+            keys = self._tags.setdefault(tag, set())
+            keys.add(key)
+
+            # Forget keys that have since been evicted
+            if len(keys) > self.store.max_entries:
+                keys.intersection_update(self.store.keys())
+
+        return entry
+
+    def invalidate(self, prefix=None, tags=None):
+        """Removes entries matching the given key prefix, or any of the given tags.
+        Removes all entries if neither is provided.
+
+        :param prefix: Key prefix, e.g. "GET /api/guestbook/visitors"
+        :param tags: List of tags
+        :return: Number of removed entries
+        """
+
+        if prefix is None and tags is None:
+            count = len(self.store)
+            self.store.clear()
+            self._tags.clear()
+            return count
+
+        keys = set()
+
+        if prefix is not None:
+            keys.update(key for key in self.store.keys() if key.startswith(prefix))
+
+        for tag in tags or []:
+            keys.update(self._tags.pop(tag, set()))
+
+        return len([key for key in keys if self.store.delete(key)])
+
+    @property
+    def stats(self):
+        return self.store.stats
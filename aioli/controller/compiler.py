@@ -0,0 +1,256 @@
+from collections.abc import Mapping
+
+from marshmallow import fields, missing
+from marshmallow.schema import Schema
+from marshmallow.utils import get_value, set_value, ensure_text_type
+from marshmallow.exceptions import ValidationError
+
+
+# Code objects are cached per Schema class and field selection, while the
+# functions themselves are bound to the field instances of each Schema object.
+_factories = {}
+
+
+def _is_plain(field):
+    """Whether the value lookup of this field can be inlined"""
+
+    cls = type(field)
+
+    return (
+        field._CHECK_ATTRIBUTE
+        and cls.serialize is fields.Field.serialize
+        and cls.get_value is fields.Field.get_value
+    )
+
+
+def _dump_value_expr(field, idx):
+    """Returns an expression converting `v` into its serialized form"""
+
+    cls = type(field)
+
+    if cls is fields.String:
+        return "v if v is None or v.__class__ is str else ensure_text_type(v)"
+    elif cls is fields.Integer and not field.as_string:
+        return "v if v is None or v.__class__ is int else int(v)"
+    elif cls is fields.Float and not field.as_string:
+        return "v if v is None or v.__class__ is float else float(v)"
+    elif cls is fields.Boolean:
+        return f"v if v is None or v is True or v is False else f{idx}._serialize(v, a{idx}, obj)"
+    elif cls is fields.Raw:
+        return "v"
+
+    return f"f{idx}._serialize(v, a{idx}, obj)"
+
+
+def _load_fast_check(field):
+    """Returns a condition under which `v` is already in its deserialized form"""
+
+    if field.validators:
+        return None
+
+    cls = type(field)
+
+    if cls is fields.String:
+        return "v.__class__ is str"
+    elif cls is fields.Integer:
+        return "v.__class__ is int"
+    elif cls is fields.Boolean:
+        return "v is True or v is False"
+    elif cls is fields.Raw:
+        # None is left to the field, which rejects it unless `allow_none` is set
+        return "v is not None"
+
+    return None
+
+
+class SchemaCompiler:
+    """Generates Python source for loading and dumping objects using a specific
+    Schema class and field selection.
+
+    :param schema: Schema instance to compile
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+
+    @property
+    def dumpable(self):
+        schema = self.schema
+
+        return (
+            schema.dict_class is dict
+            and type(schema).get_attribute is Schema.get_attribute
+        )
+
+    @property
+    def loadable(self):
+        return self.schema.dict_class is dict
+
+    def _dump_source(self, items):
+        lines = ["def dump(obj):", "    ret = {}"]
+        modes = [
+            ("    if obj.__class__ is dict:", "dict"),
+            ("    elif not hasattr(obj, '__getitem__'):", "attr"),
+            ("    else:", "item"),
+        ]
+
+        for branch, mode in modes:
+            lines.append(branch)
+
+            for idx, (attr_name, field) in enumerate(items):
+                key = field.data_key if field.data_key is not None else attr_name
+                lines.extend(self._dump_field(idx, field, mode, key))
+
+            if not items:
+                lines.append("        pass")
+
+        lines.append("    return ret")
+
+        return lines
+
+    def _dump_field(self, idx, field, mode, key):
+        pad = " " * 8
+
+        if not _is_plain(field):
+            return [
+                f"{pad}v = f{idx}.serialize(a{idx}, obj, accessor=get_value)",
+                f"{pad}if v is not M:",
+                f"{pad}    ret[{key!r}] = v",
+            ]
+
+        check_key = field.attribute if field.attribute is not None else None
+        lookup = f"k{idx}"
+
+        if check_key is not None and "." in check_key or mode == "item":
+            lines = [f"{pad}v = get_value(obj, {lookup}, M)"]
+        elif mode == "dict":
+            lines = [
+                f"{pad}v = obj.get({lookup}, M)",
+                f"{pad}if v is M:",
+                f"{pad}    v = getattr(obj, {lookup}, M)",
+            ]
+        else:
+            lines = [f"{pad}v = getattr(obj, {lookup}, M)"]
+
+        if field.default is not missing:
+            default = f"d{idx}()" if callable(field.default) else f"d{idx}"
+            lines.extend([
+                f"{pad}if v is M:",
+                f"{pad}    v = {default}",
+            ])
+
+        lines.extend([
+            f"{pad}if v is not M:",
+            f"{pad}    ret[{key!r}] = {_dump_value_expr(field, idx)}",
+        ])
+
+        return lines
+
+    def _load_source(self, items):
+        lines = [
+            "def load(data, error_store, index):",
+            "    ret = {}",
+            "    if not isinstance(data, Mapping):",
+            "        error_store.store_error([type_error], index=index)",
+            "        return ret",
+            "    get = data.get",
+        ]
+
+        for idx, (attr_name, field) in enumerate(items):
+            lines.extend(self._load_field(idx, attr_name, field))
+
+        lines.append("    return ret")
+
+        return lines
+
+    def _load_field(self, idx, attr_name, field):
+        field_name = field.data_key if field.data_key is not None else attr_name
+        target = field.attribute or attr_name
+        store = f"set_value(ret, {target!r}, v)" if "." in target else f"ret[{target!r}] = v"
+        kwargs = ", partial=False" if isinstance(field, fields.Nested) else ""
+
+        # Missing values need deserializing only if they're required or have a default
+        skip_missing = not field.required and field.missing is missing
+        fast_check = _load_fast_check(field)
+
+        deserialize = [
+            "try:",
+            f"    v = f{idx}.deserialize(v, {field_name!r}, data{kwargs})",
+            "except ValidationError as error:",
+            f"    error_store.store_error(error.messages, {field_name!r}, index=index)",
+            "    v = error.valid_data or M",
+            "if v is not M:",
+            f"    {store}",
+        ]
+
+        if fast_check and skip_missing:
+            block = ["if v is not M:", f"    if {fast_check}:", f"        {store}", "    else:"]
+            block.extend(" " * 8 + line for line in deserialize)
+        elif fast_check:
+            block = [f"if v is not M and ({fast_check}):", f"    {store}", "else:"]
+            block.extend(" " * 4 + line for line in deserialize)
+        elif skip_missing:
+            block = ["if v is not M:"]
+            block.extend(" " * 4 + line for line in deserialize)
+        else:
+            block = deserialize
+
+        return [f"    v = get({field_name!r}, M)"] + ["    " + line for line in block]
+
+    def _get_factory(self, kind, items, source):
+        cache_key = (type(self.schema), kind, tuple(items))
+
+        if cache_key not in _factories:
+            names = []
+
+            for idx in range(len(items)):
+                names.extend([f"f{idx}", f"a{idx}", f"k{idx}", f"d{idx}"])
+
+            body = "\n".join("    " + line for line in source)
+            code = "def factory({0}):\n{1}\n    return {2}".format(", ".join(names), body, kind)
+            namespace = dict(
+                M=missing,
+                Mapping=Mapping,
+                ValidationError=ValidationError,
+                get_value=get_value,
+                set_value=set_value,
+                ensure_text_type=ensure_text_type,
+                type_error=self.schema.error_messages["type"],
+            )
+
+            exec(compile(code, f"<aioli.schema:{type(self.schema).__name__}.{kind}>", "exec"), namespace)
+            _factories[cache_key] = namespace["factory"]
+
+        return _factories[cache_key]
+
+    @staticmethod
+    def _get_bindings(fields_items):
+        bindings = []
+
+        for attr_name, field in fields_items:
+            check_key = attr_name if field.attribute is None else field.attribute
+            bindings.extend([field, attr_name, check_key, field.default])
+
+        return bindings
+
+    def compile_dump(self):
+        """Returns a function dumping a single object, or None if unsupported"""
+
+        if not self.dumpable:
+            return None
+
+        items = list(self.schema.dump_fields.items())
+        factory = self._get_factory("dump", [name for name, _ in items], self._dump_source(items))
+
+        return factory(*self._get_bindings(items))
+
+    def compile_load(self):
+        """Returns a function loading a single object, or None if unsupported"""
+
+        if not self.loadable:
+            return None
+
+        items = list(self.schema.load_fields.items())
+        factory = self._get_factory("load", [name for name, _ in items], self._load_source(items))
+
+        return factory(*self._get_bindings(items))
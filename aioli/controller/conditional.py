@@ -0,0 +1,84 @@
+import hashlib
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from starlette.responses import Response
+
+
+def strong_etag(body):
+    """Returns a strong ETag computed over the given body"""
+
+    return '"{0}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def get_validators(version):
+    """Returns an (ETag, Last-Modified) pair for a handler-supplied version
+
+    :param version: Version identifier, or datetime of the last modification
+    :return: Tuple of weak ETag and HTTP-date, either may be None
+    """
+
+    if version is None:
+        return None, None
+    elif isinstance(version, datetime):
+        if version.tzinfo is None:
+            version = version.replace(tzinfo=timezone.utc)
+
+        version = version.astimezone(timezone.utc).replace(microsecond=0)
+        return f'W/"{int(version.timestamp())}"', format_datetime(version, usegmt=True)
+
+    return f'W/"{version}"', None
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(headers, etag=None, last_modified=None):
+    """Evaluates If-None-Match and If-Modified-Since request headers against the given validators
+
+    :param headers: Request headers
+    :param etag: Current ETag of the resource
+    :param last_modified: Current Last-Modified HTTP-date of the resource
+    :return: True if the client's representation is up-to-date
+    """
+
+    if_none_match = headers.get("if-none-match")
+
+    if if_none_match is not None:
+        if not etag:
+            return False
+        elif if_none_match.strip() == "*":
+            return True
+
+        # Weak comparison, as per RFC 7232 section 3.2
+        current = _strip_weak(etag)
+        return any(_strip_weak(tag.strip()) == current for tag in if_none_match.split(","))
+
+    if_modified_since = headers.get("if-modified-since")
+
+    if if_modified_since is not None and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def not_modified(etag=None, last_modified=None):
+    """Returns a bodyless 304 Response carrying the given validators"""
+
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+
+    return response
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response.headers["etag"] = etag
+
+    if last_modified:
+        response.headers["last-modified"] = last_modified
@@ -15,3 +15,16 @@ class Method(Enum):
     CONNECT = "CONNECT"
     OPTIONS = "OPTIONS"
     TRACE = "TRACE"
+
+
+class StreamFormat(Enum):
+    JSON = "application/json"
+    NDJSON = "application/x-ndjson"
+
+
+class Priority(Enum):
+    """Route priority, used by load shedding: lower priority requests are rejected first"""
+
+    LOW = 0
+    NORMAL = 1
+    CRITICAL = 2
@@ -1,147 +1,154 @@
-from functools import wraps
-
-from starlette.requests import Request
-from starlette.responses import Response
-
 from aioli.exceptions import AioliException
-from aioli.utils import jsonify
 
-from .consts import Method, RequestProp
+from .consts import Method, RequestProp, StreamFormat, Priority
 from .registry import Handler
 
 
-def route(path, method, description=None):
+def route(
+    path,
+    method,
+    description=None,
+    coalesce=False,
+    compress=True,
+    max_concurrency=None,
+    max_queue=None,
+    priority=Priority.NORMAL,
+    timeout=None,
+):
     """Prepares route registration, and performs handler injection.
 
     :param path: Handler path, relative to application and unit paths
     :param method: HTTP Method
     :param description: Endpoint description
+    :param coalesce: Let concurrent GET or HEAD requests with the same method, path, query and credentials
+        (`Authorization` and `Cookie` headers) share the Response of the first one, rather than
+        calling the handler again
+    :param compress: Setting to False excludes responses of this handler from compression
+    :param max_concurrency: Max number of requests handled concurrently, using a limit of its own rather
+        than the Unit's
+    :param max_queue: Max number of requests waiting for `max_concurrency`, None for no limit
+    :param priority: Priority used by load shedding: LOW requests are rejected first, CRITICAL never
+    :param timeout: Seconds the handler may take before it's cancelled and a 504 response is returned,
+        replacing the Unit's `timeout`
     :return: Route handler
     """
 
     def wrapper(fn):
-        @wraps(fn)
-        async def handler_fn(*args, **kwargs):
-            return await fn(*args, **kwargs)
-
         if not isinstance(method, Method):
             raise AioliException(
-                f"Invalid HTTP method supplied in @route for handler: {handler_fn}. "
+                f"Invalid HTTP method supplied in @route for handler: {fn}. "
                 f"Must be of type: {Method.__module__}.{Method.__name__}"
             )
+        elif not isinstance(priority, Priority):
+            raise AioliException(
+                f"Invalid priority supplied in @route for handler: {fn}. "
+                f"Must be of type: {Priority.__module__}.{Priority.__name__}"
+            )
 
-        handler = Handler(handler_fn)
+        handler = Handler(fn)
 
         # Adds the handler for registration once the loop is ready.
-        handler.register_route(path, method.value, description)
-
-        return handler_fn
+        handler.register_route(
+            path,
+            method.value,
+            description,
+            coalesce=coalesce,
+            compress=compress,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            priority=priority,
+            timeout=timeout,
+        )
+
+        return fn
 
     return wrapper
 
 
-def takes(props=None, **schemas):
+def takes(props=None, max_body_size=None, stream_body=False, **schemas):
     """Takes a list of schemas used to validate and transform parts of a request object.
     The selected parts are injected into the route handler as arguments.
 
     :param props: List of `Pluck` targets
+    :param max_body_size: Reject bodies larger than this many bytes, overrides the Unit's `max_body_size`
+    :param stream_body: Parse a JSON array body incrementally, injecting `body` as an
+        async iterator of items validated using the body schema. Items are decoded using the standard
+        library's `json`, regardless of the selected JSON engine
     :param schemas: list of schemas (kwargs)
     :return: Route handler
     """
 
-    header = schemas.get("header")
-    body = schemas.get("body")
-    path = schemas.get("path")
-    query = schemas.get("query")
-
     def wrapper(fn):
-        @wraps(fn)
-        async def handler_fn(*args, **kwargs):
-            args_new = list(args)
-            request = kwargs["request"] if "request" in kwargs else args_new.pop(1)
-
-            for prop in props or []:
-                value = RequestProp(prop).value
-                assert "." in value
-
-                target = request
-
-                for member in value.split("."):
-                    target = getattr(target, member)
-
-                kwargs.update({RequestProp(prop).name: target})
-
-            if header:
-                kwargs.update({"header": header().load(request.headers)})
-
-            if path:
-                kwargs.update(path().load(request.path_params))
-
-            if body:
-                payload = await request.json()
-                kwargs.update({"body": body().load(payload)})
-
-            if query:
-                kwargs.update({"query": query().load(request.query_params)})
-
-            return await fn(*args_new, **kwargs)
+        handler = Handler(fn)
 
-        handler = Handler(handler_fn)
-
-        # Add the provided schemas to the RouteStack
+        # Add the provided schemas and props to the Handler, for use when compiling its Pipeline
         handler.schemas.from_dict(**schemas)
+        handler.props = [RequestProp(prop) for prop in props or []]
+        handler.max_body_size = max_body_size
+        handler.stream_body = stream_body
 
-        return handler_fn
+        return fn
 
     return wrapper
 
 
-def returns(schema_cls=None, status=200, many=False):
+def returns(schema_cls=None, status=200, many=False, stream=False, etag=False, version=None):
     """Returns a transformed and serialized Response
 
     :param schema_cls: Marshmallow.Schema class
     :param status: Return status (on success)
     :param many: Whether to return a list or single object
+    :param stream: Stream items yielded by an async generator or iterator, either as
+        a JSON array (True or StreamFormat.JSON), or newline delimited (StreamFormat.NDJSON)
+    :param etag: Add a strong ETag computed over the serialized body, and respond
+        with 304 Not Modified to matching If-None-Match requests
+    :param version: Use a weak ETag, and Last-Modified if the version is a datetime, taken either from
+        a function called with the handler's arguments before the handler, or from an attribute of its return value
     :return: Response
     """
 
-    schema = schema_cls(many=many) if schema_cls else None
+    if stream is True:
+        stream = StreamFormat.JSON
 
     def wrapper(fn):
-        @wraps(fn)
-        async def handler_fn(unit, *args, **kwargs):
-            args_new = list(args)
+        if stream and not isinstance(stream, StreamFormat):
+            raise AioliException(
+                f"Invalid stream format supplied in @returns for handler: {fn}. "
+                f"Must be a bool, or of type: {StreamFormat.__module__}.{StreamFormat.__name__}"
+            )
 
-            # Remove `Request` object from args (in case it wasn't consumed by an `input_local`).
-            if len(args) > 1 and isinstance(args[1], Request):
-                args_new.pop(1)
+        handler = Handler(fn)
 
-            rv = await fn(unit, *args_new, **kwargs)
+        # Add the `response` schema to this handler
+        handler.schemas.response = schema_cls
+        handler.status = status
+        handler.many = many
+        handler.stream = stream or None
+        handler.etag = etag
+        handler.version = version
 
-            indent = 4 if unit.app.config["pretty_json"] else 0
+        return fn
 
-            if not schema:
-                return jsonify(rv, status, indent=indent)
+    return wrapper
 
-            data = (
-                schema.dumps(rv, indent=indent, ensure_ascii=False).encode("utf8")
-                if schema
-                else rv
-            )
 
-            # Return HTTP encoded JSON response
-            return Response(
-                content=data,
-                status_code=status,
-                headers={"content-type": "application/json"},
-            )
+def cached(ttl=60, key=None, headers=None, tags=None):
+    """Caches the encoded Response of a GET or HEAD route handler in its Unit's response cache.
 
-        handler = Handler(handler_fn)
+    Entries are keyed by method, path, validated query and the selected headers, and
+    can be invalidated from Services using :meth:`aioli.service.BaseService.invalidate_cache`.
 
-        # Add the `response` schema to this handler
-        handler.schemas.response = schema_cls
-        handler.status = status
+    :param ttl: Entry lifetime in seconds
+    :param key: Function taking the Request and handler arguments, returning a custom cache key
+    :param headers: List of header names to include in the key
+    :param tags: List of tags, for invalidating groups of entries
+    :return: Route handler
+    """
+
+    def wrapper(fn):
+        handler = Handler(fn)
+        handler.cache = dict(ttl=ttl, key=key, headers=headers, tags=tags)
 
-        return handler_fn
+        return fn
 
     return wrapper
@@ -0,0 +1,660 @@
+import asyncio
+import inspect
+import time
+
+from operator import attrgetter
+
+from marshmallow.exceptions import ValidationError
+from marshmallow.utils import get_value
+from starlette.responses import Response, StreamingResponse
+
+from aioli.concurrency import SingleFlight, ConcurrencyLimiter
+from aioli.context import set_deadline, reset_deadline, get_deadline, remaining
+from aioli.engines import get_json_engine
+from aioli.exceptions import BootstrapError, GatewayTimeout
+from aioli.utils import jsonify
+
+from .body import read_body, iter_json_array
+from .cache import CachedResponse, CREDENTIAL_HEADERS, get_cache_key
+from .conditional import strong_etag, get_validators, is_not_modified, not_modified, set_validators
+from .consts import Method, StreamFormat, Priority
+
+
+# Streamed items are buffered up to this size before being sent
+STREAM_CHUNK_SIZE = 16384
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _enumerate(items):
+    idx = 0
+
+    async for item in items:
+        yield idx, item
+        idx += 1
+
+
+class StreamedBody:
+    """Iterates over the chunks of a streamed body, which is sent after the handler pipeline has returned
+
+    Stages holding on to something for the duration of a request, e.g. a limiter slot, add callbacks to
+    `on_close`, which are called with whether sending failed once the body is sent, fails or is abandoned.
+
+    :param chunks: Async iterator of chunks
+
+    :var deadline: Chunks not produced before this `time.monotonic()` deadline raise GatewayTimeout, None for no deadline
+    :var on_close: List of functions taking whether sending the body failed
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.deadline = None
+        self.on_close = []
+
+    def __aiter__(self):
+        return self
+
+    async def _next_before_deadline(self):
+        left = self.deadline - time.monotonic()
+
+        if left <= 0:
+            raise GatewayTimeout()
+
+        # Calls made while producing the body see the deadline of the request
+        token = set_deadline(left)
+
+        try:
+            return await asyncio.wait_for(self.chunks.__anext__(), left)
+        except asyncio.TimeoutError:
+            raise GatewayTimeout()
+        finally:
+            reset_deadline(token)
+
+    async def __anext__(self):
+        try:
+            if self.deadline is None:
+                return await self.chunks.__anext__()
+
+            return await self._next_before_deadline()
+        except StopAsyncIteration:
+            self.close(False)
+            raise
+        except BaseException:
+            self.close(True)
+            raise
+
+    def close(self, failed):
+        """Calls the `on_close` callbacks, once
+
+        :param failed: Whether sending the body failed
+        """
+
+        callbacks, self.on_close = self.on_close, []
+
+        for callback in callbacks:
+            callback(failed)
+
+
+class StreamedResponse(StreamingResponse):
+    """StreamingResponse of a StreamedBody, closing it once sent, even if sending fails"""
+
+    def __init__(self, chunks, **kwargs):
+        super(StreamedResponse, self).__init__(chunks, **kwargs)
+        self.body_iterator = StreamedBody(chunks)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super(StreamedResponse, self).__call__(scope, receive, send)
+        finally:
+            self.body_iterator.close(True)
+
+
+class Pipeline:
+    """Compiles a Handler and its transformation stack into a single request coroutine.
+
+    Schemas are instantiated, props resolved and settings looked up once, when
+    the Pipeline is compiled, leaving only the per-request work in the returned coroutine.
+
+    :param controller: Controller instance the Handler is bound to
+    :param handler: Handler to compile
+    """
+
+    def __init__(self, controller, handler):
+        self.controller = controller
+        self.handler = handler
+        self.func = getattr(controller, handler.name)
+        self.metrics = None
+
+        registry = controller.unit.app.metrics
+
+        if registry is not None:
+            self.metrics = registry.route(
+                unit=controller.unit.name,
+                controller=type(controller).__name__,
+                handler=handler.name,
+            )
+
+    def _get_body_loader(self):
+        handler = self.handler
+
+        if not handler.schemas.body:
+            return None
+
+        load = handler.schemas.body().load
+        decode = get_json_engine().loads
+        limit = handler.max_body_size
+
+        if limit is None:
+            limit = self.controller.config["max_body_size"]
+
+        if not handler.stream_body:
+            async def load_body(request):
+                return load(decode(await read_body(request, limit)))
+
+            return load_body
+
+        async def load_items(request):
+            async for idx, item in _enumerate(iter_json_array(request, limit)):
+                try:
+                    yield load(item)
+                except ValidationError as e:
+                    raise ValidationError({idx: e.messages})
+
+        async def load_body(request):
+            return load_items(request)
+
+        return load_body
+
+    def _get_loaders(self):
+        schemas = self.handler.schemas
+
+        return (
+            schemas.header().load if schemas.header else None,
+            schemas.path().load if schemas.path else None,
+            self._get_body_loader(),
+            schemas.query().load if schemas.query else None,
+        )
+
+    def _get_props(self):
+        return [(prop.name, attrgetter(prop.value)) for prop in self.handler.props or []]
+
+    def _get_stream_renderer(self):
+        handler = self.handler
+        schema_cls = handler.schemas.response
+        media_type = handler.stream.value
+        ndjson = handler.stream == StreamFormat.NDJSON
+        encode = get_json_engine().dumps
+
+        if schema_cls:
+            dump = schema_cls().dump
+
+            def dumps(item):
+                return encode(dump(item))
+        else:
+            dumps = encode
+
+        async def iterate(items):
+            if not hasattr(items, "__aiter__"):
+                items = _aiter(items)
+
+            buffer = bytearray() if ndjson else bytearray(b"[")
+            separator = b"\n" if ndjson else b","
+            first = True
+
+            async for item in items:
+                if ndjson:
+                    buffer += dumps(item) + separator
+                elif first:
+                    buffer += dumps(item)
+                    first = False
+                else:
+                    buffer += separator + dumps(item)
+
+                if len(buffer) >= STREAM_CHUNK_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+
+            if not ndjson:
+                buffer += b"]"
+
+            if buffer:
+                yield bytes(buffer)
+
+        def render(rv):
+            return StreamedResponse(iterate(rv), status_code=handler.status, media_type=media_type)
+
+        return render
+
+    def _get_renderer(self):
+        handler = self.handler
+        status = handler.status
+        schema_cls = handler.schemas.response
+        indent = 4 if self.controller.app.config["pretty_json"] else 0
+
+        if not handler.has_response:
+            return None
+        elif handler.stream:
+            if handler.etag or handler.version:
+                raise BootstrapError(f"Streaming handler {handler.name} cannot use ETags")
+
+            return self._get_stream_renderer()
+        elif not schema_cls:
+            def render(rv):
+                return jsonify(rv, status, indent=indent)
+        else:
+            dump = schema_cls(many=handler.many).dump
+            encode = get_json_engine().dumps
+            headers = {"content-type": "application/json"}
+
+            def render(rv):
+                return Response(
+                    content=encode(dump(rv), indent=indent),
+                    status_code=status,
+                    headers=headers,
+                )
+
+        if not handler.etag or handler.version is not None:
+            return render
+
+        render_body = render
+
+        def render(rv):
+            response = render_body(rv)
+            response.headers["etag"] = strong_etag(response.body)
+            return response
+
+        return render
+
+    @property
+    def conditional(self):
+        """Whether If-None-Match and If-Modified-Since should be evaluated for this handler"""
+
+        return self.handler.method in [Method.GET.value, Method.HEAD.value]
+
+    def _get_loader(self):
+        """Returns a coroutine function loading handler arguments from a Request,
+        or None if the handler takes the Request as-is"""
+
+        if self.handler.takes_request:
+            return None
+
+        load_header, load_path, load_body, load_query = self._get_loaders()
+        props = self._get_props()
+
+        async def load(request):
+            kwargs = {}
+
+            for name, getter in props:
+                kwargs[name] = getter(request)
+
+            if load_header:
+                kwargs["header"] = load_header(request.headers)
+
+            if load_path:
+                kwargs.update(load_path(request.path_params))
+
+            if load_body:
+                kwargs["body"] = await load_body(request)
+
+            if load_query:
+                kwargs["query"] = load_query(request.query_params)
+
+            return kwargs
+
+        return load
+
+    def _get_responder(self):
+        """Returns a coroutine function calling the handler and rendering its Response"""
+
+        func = self.func
+        is_asyncgen = inspect.isasyncgenfunction(func)
+        render = self._get_renderer()
+        conditional = self.conditional
+        version = self.handler.version
+        version_attr = version if isinstance(version, str) else None
+
+        def finish(request, rv):
+            if version_attr:
+                # Skip serialization if the client already has this version
+                etag, last_modified = get_validators(get_value(rv, version_attr, None))
+
+                if conditional and is_not_modified(request.headers, etag, last_modified):
+                    return not_modified(etag, last_modified)
+
+                response = render(rv)
+                set_validators(response, etag, last_modified)
+                return response
+
+            return render(rv) if render else rv
+
+        if self.metrics:
+            return self._get_measured_responder(func, is_asyncgen, finish)
+
+        async def respond(request, kwargs):
+            if kwargs is None:
+                rv = func(request) if is_asyncgen else await func(request)
+            else:
+                rv = func(**kwargs) if is_asyncgen else await func(**kwargs)
+
+            if version_attr:
+                return finish(request, rv)
+
+            return render(rv) if render else rv
+
+        return respond
+
+    def _get_measured_responder(self, func, is_asyncgen, finish):
+        clock = time.perf_counter_ns
+        handler_samples = self.metrics.pending["handler"]
+        returns_samples = self.metrics.pending["returns"]
+
+        async def respond_measured(request, kwargs):
+            started = clock()
+
+            if kwargs is None:
+                rv = func(request) if is_asyncgen else await func(request)
+            else:
+                rv = func(**kwargs) if is_asyncgen else await func(**kwargs)
+
+            called = clock()
+            response = finish(request, rv)
+            handler_samples.append(called - started)
+
+            if isinstance(response, StreamedResponse):
+                # Sending streamed bodies counts towards `returns`
+                response.body_iterator.on_close.append(lambda failed: returns_samples.append(clock() - called))
+            else:
+                returns_samples.append(clock() - called)
+
+            return response
+
+        return respond_measured
+
+    def _cache_stage(self, respond):
+        if not self.conditional:
+            # Keys never include the body, so only safe methods can share entries
+            raise BootstrapError(f"Handler {self.handler.name}: only GET and HEAD responses can be cached")
+
+        cache = self.controller.unit.cache
+        compressor = self.controller.unit.app.compressor if self.handler.compress else None
+        options = self.handler.cache
+        get_key = options["key"] or get_cache_key(self.handler.method, options["headers"])
+        ttl, tags = options["ttl"], options["tags"]
+
+        async def respond_cached(request, kwargs):
+            key = get_key(request, kwargs)
+            entry = cache.get(key)
+
+            if not entry:
+                response = await respond(request, kwargs)
+                entry = cache.put(key, response, ttl=ttl, tags=tags)
+
+                if not entry:
+                    return response
+
+            # Serve compressed variants of the entry, rather than compressing it on every hit
+            encoding = compressor and compressor.select(request.headers, len(entry.body))
+
+            if encoding:
+                return entry.to_compressed_response(compressor, encoding)
+
+            return entry.to_response()
+
+        return respond_cached
+
+    def _coalesce_stage(self, respond):
+        if self.handler.stream:
+            raise BootstrapError(f"Streaming handler {self.handler.name} cannot be coalesced")
+
+        if not self.conditional:
+            # Keys never include the body, so concurrent writes would be dropped
+            raise BootstrapError(f"Handler {self.handler.name}: only GET and HEAD requests can be coalesced")
+
+        flight = SingleFlight()
+
+        # Requests made with different credentials never share a Response
+        get_key = get_cache_key(self.handler.method, CREDENTIAL_HEADERS)
+
+        async def respond_shared(request, kwargs):
+            return CachedResponse.from_response(await respond(request, kwargs))
+
+        async def respond_coalesced(request, kwargs):
+            shared = await flight.run(get_key(request, None), respond_shared, request, kwargs)
+            return shared.to_response()
+
+        return respond_coalesced
+
+    def _conditional_stage(self, respond):
+        controller = self.controller
+        conditional = self.conditional
+        version = self.handler.version
+
+        if not callable(version):
+            async def respond_conditional(request, kwargs):
+                response = await respond(request, kwargs)
+                etag = response.headers.get("etag")
+
+                if etag and conditional and is_not_modified(request.headers, etag):
+                    return not_modified(etag)
+
+                return response
+
+            return respond_conditional
+
+        is_coroutine = asyncio.iscoroutinefunction(version)
+
+        async def respond_versioned(request, kwargs):
+            if kwargs is None:
+                value = version(controller, request)
+            else:
+                value = version(controller, **kwargs)
+
+            if is_coroutine:
+                value = await value
+
+            # Check the version before calling the handler
+            etag, last_modified = get_validators(value)
+
+            if conditional and is_not_modified(request.headers, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            response = await respond(request, kwargs)
+
+            if 200 <= response.status_code < 300:
+                set_validators(response, etag, last_modified)
+
+            return response
+
+        return respond_versioned
+
+    def _identity_stage(self, respond):
+        async def respond_identity(request, kwargs):
+            # Tells the CompressionMiddleware to leave the response as-is
+            request.scope["aioli.compress"] = False
+            return await respond(request, kwargs)
+
+        return respond_identity
+
+    def _get_stages(self):
+        """Returns functions wrapping the responder, outermost first"""
+
+        stages = []
+
+        if not self.handler.compress:
+            stages.append(self._identity_stage)
+
+        if self.handler.etag or callable(self.handler.version):
+            stages.append(self._conditional_stage)
+
+        if self.handler.cache:
+            stages.append(self._cache_stage)
+
+        if self.handler.coalesce:
+            stages.append(self._coalesce_stage)
+
+        return stages
+
+    def _get_measured_endpoint(self, on_request, load, respond):
+        clock = time.perf_counter_ns
+        metrics = self.metrics
+        takes_samples = metrics.pending["takes"]
+
+        def close_stream(failed):
+            if failed:
+                metrics.errors += 1
+
+            metrics.in_flight -= 1
+
+        async def endpoint(request):
+            metrics.begin()
+            streamed = False
+
+            try:
+                if on_request:
+                    await on_request(request)
+
+                if load:
+                    started = clock()
+                    kwargs = await load(request)
+                    takes_samples.append(clock() - started)
+                else:
+                    kwargs = None
+
+                response = await respond(request, kwargs)
+
+                if isinstance(response, StreamedResponse):
+                    # Requests are in flight until their streamed bodies are sent
+                    response.body_iterator.on_close.append(close_stream)
+                    streamed = True
+
+                return response
+            except Exception:
+                metrics.errors += 1
+                raise
+            finally:
+                if not streamed:
+                    metrics.in_flight -= 1
+
+        return endpoint
+
+    def _get_limiter(self):
+        """Returns the handler's ConcurrencyLimiter, the Unit's, or None"""
+
+        handler, unit = self.handler, self.controller.unit
+
+        if handler.max_concurrency is None:
+            if handler.max_queue is not None:
+                raise BootstrapError(f"Handler {handler.name}: max_queue requires max_concurrency")
+
+            return unit.limiter
+
+        limiter = ConcurrencyLimiter(handler.max_concurrency, handler.max_queue)
+        unit.handler_limiters[f"{type(self.controller).__name__}.{handler.name}"] = limiter
+
+        return limiter
+
+    def _limit_stage(self, endpoint, limiter):
+        def release(failed):
+            limiter.release()
+
+        async def limited_endpoint(request):
+            # Waits for a slot before reading the body or validating input
+            await limiter.acquire()
+
+            try:
+                response = await endpoint(request)
+            except BaseException:
+                limiter.release()
+                raise
+
+            if isinstance(response, StreamedResponse):
+                # Streamed bodies keep the slot until they're sent
+                response.body_iterator.on_close.append(release)
+            else:
+                limiter.release()
+
+            return response
+
+        return limited_endpoint
+
+    def _deadline_stage(self, endpoint, timeout):
+        async def deadline_endpoint(request):
+            # Nested requests, e.g. batch operations, keep the earlier deadline of their parent
+            token = set_deadline(timeout)
+
+            try:
+                response = await asyncio.wait_for(endpoint(request), remaining())
+
+                if isinstance(response, StreamedResponse):
+                    # Streamed bodies are produced within the deadline of the request
+                    response.body_iterator.deadline = get_deadline()
+
+                return response
+            except asyncio.TimeoutError:
+                raise GatewayTimeout()
+            finally:
+                reset_deadline(token)
+
+        return deadline_endpoint
+
+    def _shed_stage(self, endpoint, shedder):
+        priority = self.handler.priority
+        level = priority.value + 1
+
+        async def shedding_endpoint(request):
+            # Rejects before doing any work for the request, including waiting for a limiter
+            if shedder.level >= level:
+                shedder.reject(priority)
+
+            return await endpoint(request)
+
+        return shedding_endpoint
+
+    def compile(self, on_request=None):
+        """Returns a coroutine function taking a `Request` and returning a `Response`
+
+        :param on_request: Coroutine function to await with the Request before loading it
+        :return: Request coroutine
+        """
+
+        load = self._get_loader()
+        respond = self._get_responder()
+
+        for stage in reversed(self._get_stages()):
+            respond = stage(respond)
+
+        if self.metrics:
+            endpoint = self._get_measured_endpoint(on_request, load, respond)
+        else:
+            async def endpoint(request):
+                if on_request:
+                    await on_request(request)
+
+                return await respond(request, await load(request) if load else None)
+
+        limiter = self._get_limiter()
+
+        if limiter:
+            endpoint = self._limit_stage(endpoint, limiter)
+
+        timeout = self.handler.timeout
+
+        if timeout is None:
+            timeout = self.controller.config["timeout"]
+
+        if timeout is not None:
+            # Time spent waiting for the limiter counts towards the deadline
+            endpoint = self._deadline_stage(endpoint, timeout)
+
+        shedder = self.controller.unit.app.shedder
+
+        if shedder and self.handler.priority is not Priority.CRITICAL:
+            endpoint = self._shed_stage(endpoint, shedder)
+
+        endpoint.__name__ = self.handler.name
+        endpoint.__qualname__ = f"{self.controller.__class__.__name__}.{self.handler.name}"
+
+        return endpoint
@@ -1,14 +1,44 @@
-handlers = {}
+from .consts import Priority
+
+HANDLER_ATTR = "_aioli_handler"
 
 
 class HandlerMeta(type):
     def __call__(cls, func):
-        fid = hash(func.__module__ + func.__name__)
+        # Handlers live on their function until the Controller class is defined and indexes them
+        handler = func.__dict__.get(HANDLER_ATTR)
+
+        if handler is None:
+            handler = super(HandlerMeta, cls).__call__(func)
+            setattr(func, HANDLER_ATTR, handler)
+
+        return handler
+
+
+def get_handler(obj):
+    """Returns the Handler of a decorated route handler function, or None"""
+
+    return getattr(obj, "__dict__", {}).get(HANDLER_ATTR)
+
+
+def index_handlers(cls):
+    """Returns the route handlers of a Controller class and its bases, keyed by qualified name,
+    e.g. "VisitController.visit_get". Handlers of subclasses replace those with the same name in base classes.
+
+    :param cls: Controller class
+    :return: Dictionary of Handlers
+    """
 
-        if fid not in handlers:
-            handlers[fid] = super(HandlerMeta, cls).__call__(func)
+    by_name = {}
 
-        return handlers[fid]
+    for klass in reversed(cls.__mro__):
+        for name, value in klass.__dict__.items():
+            handler = get_handler(value)
+
+            if handler is not None:
+                by_name[name] = handler
+
+    return {f"{cls.__qualname__}.{name}": handler for name, handler in by_name.items()}
 
 
 class HandlerSchema:
@@ -35,8 +65,23 @@ class Handler(metaclass=HandlerMeta):
     path = None
     path_full = None
     status = None
+    many = False
+    stream = None
+    etag = False
+    version = None
+    props = None
+    max_body_size = None
+    stream_body = False
+    cache = None
+    coalesce = False
+    compress = True
+    max_concurrency = None
+    max_queue = None
+    priority = Priority.NORMAL
+    timeout = None
     method = None
     description = None
+    endpoint = None
     _schemas = None
 
     @property
@@ -46,6 +91,18 @@ class Handler(metaclass=HandlerMeta):
 
         return self._schemas
 
+    @property
+    def takes_request(self):
+        """Whether the `Request` object is passed as-is to the handler, i.e. @takes wasn't used"""
+
+        return self.props is None
+
+    @property
+    def has_response(self):
+        """Whether the handler return value should be transformed, i.e. @returns was used"""
+
+        return self.status is not None
+
     def __init__(self, func):
         self.func = func
         self.name = func.__name__
@@ -53,14 +110,18 @@ class Handler(metaclass=HandlerMeta):
     def __dict__(self):
         return self.__class__.__dict__
 
-    def register_route(self, path, method, description):
+    def register_route(self, path, method, description, **options):
         """Adds new route to the stack
 
         :param path: Route path
         :param method: Route method
         :param description: Endpoint description
+        :param options: Route options
         """
 
         self.path = path
         self.method = method
         self.description = description
+
+        for name, value in options.items():
+            setattr(self, name, value)
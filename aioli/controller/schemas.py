@@ -1,18 +1,23 @@
-import ujson
 import marshmallow
 
 from marshmallow import validate
 from marshmallow import *
 
+from aioli.engines import get_json_engine
+
+from .compiler import SchemaCompiler
+
 
 class JsonSerializer:
+    """Marshmallow `render_module` backed by the Application's JSON engine"""
+
     @staticmethod
-    def loads(data, **kwargs):
-        return ujson.loads(data, **kwargs)
+    def loads(data, **_):
+        return get_json_engine().loads(data)
 
     @staticmethod
-    def dumps(data, **kwargs):
-        return ujson.dumps(data, **kwargs)
+    def dumps(data, indent=0, **_):
+        return get_json_engine().dumps(data, indent=indent).decode("utf8")
 
 
 class SchemaOpts(marshmallow.schema.SchemaOpts):
@@ -22,12 +27,55 @@ class SchemaOpts(marshmallow.schema.SchemaOpts):
 
         super(SchemaOpts, self).__init__(meta, **kwargs)
         self.render_module = JsonSerializer
-        self.unknown = "EXCLUDE"
+        self.unknown = EXCLUDE
+        self.compiled = getattr(meta, "compiled", False)
 
 
 class Schema(marshmallow.schema.Schema):
+    """Aioli Schema
+
+    Setting `compiled = True` in the Schema's `Meta` makes it use generated load and dump
+    functions, specialised for its fields, in place of Marshmallow's generic field iteration.
+    Fields of unknown types are still passed to their own `serialize` and `deserialize` methods.
+    """
+
     OPTIONS_CLASS = SchemaOpts
 
+    def __init__(self, *args, **kwargs):
+        super(Schema, self).__init__(*args, **kwargs)
+
+        if self.opts.compiled:
+            compiler = SchemaCompiler(self)
+            self._dump_one = compiler.compile_dump()
+            self._load_one = compiler.compile_load()
+        else:
+            self._dump_one = self._load_one = None
+
+    def _serialize(self, obj, *, many=False):
+        dump_one = self._dump_one
+
+        if not dump_one:
+            return super(Schema, self)._serialize(obj, many=many)
+        elif many and obj is not None:
+            return [dump_one(item) for item in obj]
+
+        return dump_one(obj)
+
+    def _deserialize(self, data, *, error_store, many=False, partial=False, unknown=RAISE, index=None):
+        load_one = self._load_one
+
+        if not load_one or many or partial or unknown != EXCLUDE:
+            return super(Schema, self)._deserialize(
+                data,
+                error_store=error_store,
+                many=many,
+                partial=partial,
+                unknown=unknown,
+                index=index
+            )
+
+        return load_one(data, error_store, index if self.opts.index_errors else None)
+
 
 class HttpParams(Schema):
     limit = fields.Integer(missing=100, validate=validate.Range(min=0))
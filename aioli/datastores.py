@@ -1,7 +1,9 @@
 import shelve
 import math
 
+from collections import OrderedDict
 from datetime import datetime
+from time import monotonic
 
 
 class StoreMeta(type):
@@ -30,6 +32,78 @@ class MemoryStore(metaclass=StoreMeta):
         return self.__store.get(item)
 
 
+class LRUStore:
+    """Bounded in-memory store, evicting the least recently used entries when full
+
+    :param max_entries: Max number of entries
+    :param ttl: Default entry lifetime in seconds, None for no expiry
+
+    :var hits: Number of successful lookups
+    :var misses: Number of lookups for missing or expired entries
+    :var evictions: Number of entries evicted to make room for new ones
+    """
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires, value = entry
+
+        if expires is not None and expires <= monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        entries = self._entries
+
+        entries[key] = (monotonic() + ttl if ttl is not None else None), value
+        entries.move_to_end(key)
+
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def stats(self):
+        return dict(
+            entries=len(self._entries),
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+
 class FileStore(metaclass=StoreMeta):
     path = ".aioli"
 
@@ -0,0 +1,103 @@
+import abc
+import json
+
+from json.decoder import JSONDecodeError
+
+import ujson
+
+from .exceptions import BootstrapError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonEngine(abc.ABC):
+    """Encodes and decodes JSON
+
+    Engines encode directly to UTF-8 bytes, and raise `JSONDecodeError` on invalid input.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def dumps(self, obj, indent=0):
+        """Encodes an object to UTF-8 JSON, indented by `indent` spaces if non-zero"""
+
+    @abc.abstractmethod
+    def loads(self, data):
+        """Decodes UTF-8 JSON bytes or a string"""
+
+
+class StdlibEngine(JsonEngine):
+    name = "json"
+
+    def dumps(self, obj, indent=0):
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=indent).encode("utf8")
+
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class UjsonEngine(JsonEngine):
+    name = "ujson"
+
+    def dumps(self, obj, indent=0):
+        return ujson.dumps(obj, ensure_ascii=False, indent=indent).encode("utf8")
+
+    def loads(self, data):
+        try:
+            return ujson.loads(data)
+        except ValueError as e:
+            raise JSONDecodeError(str(e), data if isinstance(data, str) else "", 0)
+
+
+class OrjsonEngine(JsonEngine):
+    name = "orjson"
+
+    def __init__(self):
+        if not orjson:
+            raise BootstrapError("The orjson JSON engine requires the `orjson` package")
+
+    def dumps(self, obj, indent=0):
+        data = orjson.dumps(obj)
+
+        if indent:
+            # orjson only indents by 2, re-encode so that pretty output matches the other engines
+            return json.dumps(orjson.loads(data), ensure_ascii=False, indent=indent).encode("utf8")
+
+        return data
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+JSON_ENGINES = {engine.name: engine for engine in [StdlibEngine, UjsonEngine, OrjsonEngine]}
+
+_json_engine = UjsonEngine()
+
+
+def set_json_engine(name):
+    """Selects the JSON engine used for requests, responses and schemas in this process
+
+    :param name: One of JSON_ENGINES
+    :return: JsonEngine instance
+    """
+
+    global _json_engine
+
+    if name not in JSON_ENGINES:
+        raise BootstrapError(f"Unknown JSON engine {name}, available: {list(JSON_ENGINES)}")
+
+    _json_engine = JSON_ENGINES[name]()
+    return _json_engine
+
+
+def get_json_engine():
+    """Returns the JsonEngine currently in use"""
+
+    return _json_engine
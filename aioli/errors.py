@@ -19,5 +19,10 @@ async def decode_error(*_):
 
 
 async def http_error(_, exc):
-    return jsonify({"message": exc.detail}, status=exc.status_code)
+    response = jsonify({"message": exc.detail}, status=exc.status_code)
+
+    if getattr(exc, "headers", None):
+        response.headers.update(exc.headers)
+
+    return response
 
@@ -34,6 +34,24 @@ class AioliException(HTTPException):
         super(AioliException, self).__init__(status_code=status, detail=message)
 
 
+class ServiceUnavailable(AioliException):
+    """Raised when a request is shed, e.g. by a full ConcurrencyLimiter
+
+    :param retry_after: Seconds the client should wait before retrying
+    """
+
+    def __init__(self, message="Service Unavailable", retry_after=1):
+        super(ServiceUnavailable, self).__init__(status=503, message=message)
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class GatewayTimeout(AioliException):
+    """Raised when a request runs past its deadline"""
+
+    def __init__(self, message="Gateway Timeout"):
+        super(GatewayTimeout, self).__init__(status=504, message=message)
+
+
 class InvalidChannelError(HTTPException):
     def __init__(self):
         super(InvalidChannelError, self).__init__(
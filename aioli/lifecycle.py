@@ -0,0 +1,104 @@
+import ast
+import inspect
+import sys
+import textwrap
+
+from .exceptions import BootstrapError
+from .service import BaseService
+
+# Service methods whose first argument is a Service class the caller depends on
+USE_METHODS = ["connect", "integrate"]
+
+
+def _resolve(node, namespace):
+    if isinstance(node, ast.Name):
+        return namespace.get(node.id)
+    elif isinstance(node, ast.Attribute):
+        return getattr(_resolve(node.value, namespace), node.attr, None)
+
+    return None
+
+
+def _find_used(klass):
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(klass)))
+    except (OSError, TypeError, SyntaxError):
+        return
+
+    namespace = vars(sys.modules[klass.__module__])
+
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in USE_METHODS
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "self"
+            and node.args
+        ):
+            yield _resolve(node.args[0], namespace)
+
+
+def find_dependencies(cls):
+    """Returns the Service classes a Service class depends on: those listed in its `dependencies`,
+    and those its methods pass to `self.connect` or `self.integrate`, e.g. in `on_startup`.
+
+    :param cls: Service class
+    :return: Set of Service classes
+    """
+
+    found = set(cls.dependencies)
+
+    for klass in cls.__mro__:
+        if klass is BaseService or not issubclass(klass, BaseService):
+            continue
+
+        found.update(used for used in _find_used(klass) if isinstance(used, type) and issubclass(used, BaseService))
+
+    found.discard(cls)
+
+    return found
+
+
+def get_unit_dependencies(units):
+    """Maps each Unit to the Units whose Services its own Services depend on
+
+    :param units: List of registered Units
+    :return: Dictionary of Unit sets, by Unit
+    :raises: BootstrapError if Units depend on each other in a cycle
+    """
+
+    graph = {}
+
+    for unit in units:
+        graph[unit] = deps = set()
+
+        for svc in unit.services:
+            for cls in find_dependencies(type(svc)):
+                used = BaseService._instances.get(cls)
+
+                # Services of unregistered Units are reported by `connect` when used
+                if used is not None and used.unit is not unit and used.unit in units:
+                    deps.add(used.unit)
+
+    visiting, visited = [], set()
+
+    def visit(unit):
+        if unit in visited:
+            return
+        elif unit in visiting:
+            cycle = visiting[visiting.index(unit):] + [unit]
+            raise BootstrapError(f"Circular Unit dependencies: {' -> '.join(u.name for u in cycle)}")
+
+        visiting.append(unit)
+
+        for dep in graph[unit]:
+            visit(dep)
+
+        visiting.pop()
+        visited.add(unit)
+
+    for unit in units:
+        visit(unit)
+
+    return graph
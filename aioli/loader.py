@@ -0,0 +1,156 @@
+import asyncio
+
+from collections.abc import Mapping
+
+from .context import get_request_cache
+
+
+class DataLoader:
+    """Gathers `load(key)` calls made in the same event loop iteration into batched calls of `batch_fn`,
+    turning one lookup per key, e.g. of related records, into one lookup per batch.
+
+    The batch function takes a list of unique keys, and returns either a list of values in the same order,
+    or a mapping of keys to values, leaving out keys without a value. Exception instances in place of values
+    are raised by the corresponding `load` calls.
+
+    Values are cached for the duration of the request they were loaded for, when `cache` is enabled.
+    Loads made outside of requests, e.g. in startup handlers, are batched but not cached.
+
+    :param batch_fn: Coroutine function taking a list of keys
+    :param max_batch_size: Max number of keys per batch
+    :param cache: Cache values per request
+
+    :var loads: Number of `load` calls
+    :var batches: Number of `batch_fn` calls
+    """
+
+    def __init__(self, batch_fn, max_batch_size=100, cache=True):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self.loads = self.batches = 0
+        self._batch = None
+        self._tasks = set()
+
+    def _get_cache(self):
+        caches = get_request_cache() if self.cache else None
+
+        if caches is None:
+            return None
+
+        return caches.setdefault(self, {})
+
+    def _schedule(self, key):
+        batch = self._batch
+
+        if batch is not None and key in batch:
+            return batch[key]
+
+        loop = asyncio.get_event_loop()
+
+        if batch is None or len(batch) >= self.max_batch_size:
+            batch = self._batch = {}
+            loop.call_soon(self._dispatch, batch)
+
+        future = batch[key] = loop.create_future()
+
+        return future
+
+    def _dispatch(self, batch):
+        if self._batch is batch:
+            self._batch = None
+
+        # The loop only keeps weak references to tasks
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        keys = list(batch)
+        self.batches += 1
+
+        try:
+            values = await self.batch_fn(keys)
+
+            if isinstance(values, Mapping):
+                values = [values.get(key) for key in keys]
+            elif len(values) != len(keys):
+                raise ValueError(f"{self.batch_fn.__qualname__} returned {len(values)} values for {len(keys)} keys")
+        except asyncio.CancelledError:
+            # Before Python 3.8, CancelledError is an Exception
+            for future in batch.values():
+                future.cancel()
+
+            raise
+        except Exception as e:
+            values = [e] * len(keys)
+
+        for future, value in zip(batch.values(), values):
+            if isinstance(value, Exception):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+
+    async def load(self, key):
+        """Loads the value of a key, in the next batch
+
+        :param key: Hashable key
+        :return: Value, None if the batch function left it out
+        """
+
+        self.loads += 1
+        cache = self._get_cache()
+
+        if cache is None:
+            return await asyncio.shield(self._schedule(key))
+
+        future = cache.get(key)
+
+        if future is None:
+            future = cache[key] = self._schedule(key)
+
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Failed loads are retried by later calls
+            if cache.get(key) is future:
+                del cache[key]
+
+            raise
+
+    async def load_many(self, keys):
+        """Loads the values of a list of keys, in as few batches as possible
+
+        :param keys: List of hashable keys
+        :return: List of values
+        """
+
+        return list(await asyncio.gather(*[self.load(key) for key in keys]))
+
+    def prime(self, key, value):
+        """Caches a value for the current request, e.g. one loaded using another lookup
+
+        :param key: Hashable key
+        :param value: Value
+        """
+
+        cache = self._get_cache()
+
+        if cache is not None:
+            future = cache[key] = asyncio.get_event_loop().create_future()
+            future.set_result(value)
+
+    def clear(self, key=None):
+        """Removes a cached value of the current request, or all of them if no key is given
+
+        :param key: Hashable key
+        """
+
+        cache = self._get_cache()
+
+        if cache is None:
+            return
+        elif key is None:
+            cache.clear()
+        else:
+            cache.pop(key, None)
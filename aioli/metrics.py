@@ -0,0 +1,411 @@
+import re
+
+from array import array
+
+from starlette.responses import Response
+
+
+# Values below 2 ** SUB_BITS get buckets of their own, larger ones are recorded with
+# 2 ** (SUB_BITS - 1) buckets per power of two, i.e. with a relative error of ~3%.
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+HALF_COUNT = SUB_COUNT >> 1
+
+# Highest recorded value, in microseconds: ~19 hours
+MAX_BITS = 36
+BUCKET_COUNT = (MAX_BITS - SUB_BITS + 2) * HALF_COUNT
+
+QUANTILES = [0.5, 0.9, 0.99, 0.999]
+
+
+def bucket_index(value):
+    if value < SUB_COUNT:
+        return value if value > 0 else 0
+
+    shift = value.bit_length() - SUB_BITS
+    return min(shift * HALF_COUNT + (value >> shift), BUCKET_COUNT - 1)
+
+
+def bucket_value(idx):
+    """Returns the lowest value recorded in bucket `idx`"""
+
+    if idx < SUB_COUNT:
+        return idx
+
+    shift = idx // HALF_COUNT - 1
+    return (idx - shift * HALF_COUNT) << shift
+
+
+# Bucket indexes of values up to ~65ms, looked up rather than computed
+_INDEX_TABLE = array("H", map(bucket_index, range(1 << 16)))
+
+
+class Histogram:
+    """HDR-style histogram of durations in microseconds, using log-linear buckets of fixed precision"""
+
+    __slots__ = ["counts", "count", "total"]
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+
+    def record(self, value):
+        self.record_many([value])
+
+    def record_many(self, values):
+        """Records a list of durations in microseconds"""
+
+        counts, table, table_size = self.counts, _INDEX_TABLE, len(_INDEX_TABLE)
+
+        for value in values:
+            counts[table[value] if 0 <= value < table_size else bucket_index(value)] += 1
+
+        self.count += len(values)
+        self.total += sum(values)
+
+    def quantiles(self, qs):
+        """Returns the values at the given quantiles, in microseconds
+
+        :param qs: Ascending list of quantiles, e.g. [0.5, 0.99]
+        :return: List of values
+        """
+
+        values = []
+        targets = iter(q * self.count for q in qs)
+        target = next(targets, None)
+        seen = 0
+
+        for idx, count in enumerate(self.counts):
+            if not count:
+                continue
+
+            seen += count
+
+            while target is not None and seen >= target:
+                values.append(bucket_value(idx))
+                target = next(targets, None)
+
+            if target is None:
+                break
+
+        return values + [0] * (len(qs) - len(values))
+
+
+class RouteMetrics:
+    """Latency histograms and counters of a route handler
+
+    Durations are appended to per-phase lists of pending samples, in nanoseconds, and folded into
+    the histograms every `fold_every` requests and on export. Neither requires locking, as both take
+    place on the event loop thread.
+
+    :param labels: Dictionary of labels, i.e. unit, controller and handler names
+    """
+
+    PHASES = ["takes", "handler", "returns"]
+
+    fold_every = 1024
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.histograms = {phase: Histogram() for phase in self.PHASES}
+        self.pending = {phase: [] for phase in self.PHASES}
+
+    def begin(self):
+        """Counts a request, called when it arrives"""
+
+        self.requests += 1
+        self.in_flight += 1
+
+        if not self.requests % self.fold_every:
+            self.fold()
+
+    def fold(self):
+        """Records pending samples in the histograms"""
+
+        for phase, pending in self.pending.items():
+            if pending:
+                samples = pending[:]
+                del pending[:len(samples)]
+                self.histograms[phase].record_many([sample // 1000 for sample in samples])
+
+
+class MetricFamily:
+    """Named group of samples, rendered in the Prometheus text format
+
+    :param name: Metric name
+    :param kind: Prometheus type: counter, gauge or summary
+    :param description: Help text
+    """
+
+    def __init__(self, name, kind, description):
+        self.name = name
+        self.kind = kind
+        self.description = description
+        self.samples = []
+
+    def add(self, labels, value, suffix=""):
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+        for suffix, labels, value in self.samples:
+            label_str = ",".join('{0}="{1}"'.format(k, escape_label(v)) for k, v in labels.items())
+            lines.append(f"{self.name}{suffix}{{{label_str}}} {value}" if label_str else f"{self.name}{suffix} {value}")
+
+        return "\n".join(lines)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Keeps track of route metrics and collectors of other component stats
+
+    Collectors are functions returning a list of MetricFamily objects, called when metrics are exported.
+    """
+
+    def __init__(self):
+        self.routes = []
+        self.collectors = {}
+
+    def route(self, **labels):
+        """Returns new RouteMetrics with the given labels"""
+
+        metrics = RouteMetrics(labels)
+        self.routes.append(metrics)
+
+        return metrics
+
+    def register_collector(self, name, collector):
+        """Adds a function returning a list of MetricFamily objects to include when exporting
+
+        :param name: Collector name, replaces any collector of the same name
+        :param collector: Function
+        """
+
+        self.collectors[name] = collector
+
+    def collect(self):
+        """Returns a list of MetricFamily objects for routes and registered collectors"""
+
+        requests = MetricFamily("aioli_requests_total", "counter", "Requests handled")
+        errors = MetricFamily("aioli_request_errors_total", "counter", "Requests failed with an exception")
+        in_flight = MetricFamily("aioli_requests_in_flight", "gauge", "Requests being handled")
+        durations = MetricFamily("aioli_request_duration_seconds", "summary", "Duration of request phases")
+
+        for route in self.routes:
+            route.fold()
+            requests.add(route.labels, route.requests)
+            errors.add(route.labels, route.errors)
+            in_flight.add(route.labels, route.in_flight)
+
+            for phase, histogram in route.histograms.items():
+                labels = dict(route.labels, phase=phase)
+
+                for q, value in zip(QUANTILES, histogram.quantiles(QUANTILES)):
+                    durations.add(dict(labels, quantile=q), value / 1e6)
+
+                durations.add(labels, histogram.total / 1e6, "_sum")
+                durations.add(labels, histogram.count, "_count")
+
+        families = [requests, errors, in_flight, durations]
+
+        for collector in self.collectors.values():
+            families.extend(collector())
+
+        return families
+
+    def render(self):
+        """Returns metrics in the Prometheus text format"""
+
+        return "\n".join(family.render() for family in self.collect()) + "\n"
+
+    async def endpoint(self, request):
+        return Response(self.render(), headers={"content-type": "text/plain; version=0.0.4"})
+
+
+def collect_caches(app):
+    """Returns a collector of response cache stats of the Application's Units"""
+
+    def collector():
+        families = {
+            "entries": MetricFamily("aioli_cache_entries", "gauge", "Responses in cache"),
+            "hits": MetricFamily("aioli_cache_hits_total", "counter", "Response cache hits"),
+            "misses": MetricFamily("aioli_cache_misses_total", "counter", "Response cache misses"),
+            "evictions": MetricFamily("aioli_cache_evictions_total", "counter", "Response cache evictions"),
+        }
+
+        for unit in app.registry.imported:
+            if unit.cache is None:
+                continue
+
+            for stat, value in unit.cache.stats.items():
+                families[stat].add({"unit": unit.name}, value)
+
+        return list(families.values())
+
+    return collector
+
+
+def collect_limiters(app):
+    """Returns a collector of ConcurrencyLimiter stats of the Application's Units and route handlers"""
+
+    def collector():
+        families = {
+            "active": MetricFamily("aioli_limiter_active", "gauge", "Requests in progress"),
+            "queued": MetricFamily("aioli_limiter_queued", "gauge", "Requests waiting for a slot"),
+            "admitted": MetricFamily("aioli_limiter_admitted_total", "counter", "Requests admitted"),
+            "shed": MetricFamily("aioli_limiter_shed_total", "counter", "Requests rejected with a 503"),
+        }
+
+        for unit in app.registry.imported:
+            limiters = dict(unit.handler_limiters)
+
+            if unit.limiter:
+                limiters["*"] = unit.limiter
+
+            for handler, limiter in limiters.items():
+                for stat, value in limiter.stats.items():
+                    families[stat].add({"unit": unit.name, "handler": handler}, value)
+
+        return list(families.values())
+
+    return collector
+
+
+def collect_executors(app):
+    """Returns a collector of BlockingPool stats of the Application's Units"""
+
+    def collector():
+        families = {
+            "active": MetricFamily("aioli_executor_active", "gauge", "Blocking calls running"),
+            "queued": MetricFamily("aioli_executor_queued", "gauge", "Blocking calls waiting for a thread"),
+            "completed": MetricFamily("aioli_executor_completed_total", "counter", "Blocking calls completed"),
+            "rejected": MetricFamily("aioli_executor_rejected_total", "counter", "Blocking calls rejected with a 503"),
+        }
+        waits = MetricFamily("aioli_executor_wait_seconds", "summary", "Time blocking calls waited for a thread")
+
+        for unit in app.registry.imported:
+            if unit.executor is None:
+                continue
+
+            labels = {"unit": unit.name}
+
+            for stat, value in unit.executor.stats.items():
+                families[stat].add(labels, value)
+
+            histogram = unit.executor.wait_time
+
+            for q, value in zip(QUANTILES, histogram.quantiles(QUANTILES)):
+                waits.add(dict(labels, quantile=q), value / 1e6)
+
+            waits.add(labels, histogram.total / 1e6, "_sum")
+            waits.add(labels, histogram.count, "_count")
+
+        return list(families.values()) + [waits]
+
+    return collector
+
+
+def collect_memos(app):
+    """Returns a collector of stats of memoized Service methods of the Application's Units"""
+
+    def collector():
+        families = {
+            "entries": MetricFamily("aioli_memo_entries", "gauge", "Memoized results"),
+            "hits": MetricFamily("aioli_memo_hits_total", "counter", "Memoized result hits"),
+            "misses": MetricFamily("aioli_memo_misses_total", "counter", "Memoized result misses"),
+            "evictions": MetricFamily("aioli_memo_evictions_total", "counter", "Memoized results evicted"),
+            "coalesced": MetricFamily("aioli_memo_coalesced_total", "counter", "Calls sharing a call in flight"),
+        }
+
+        for unit in app.registry.imported:
+            for svc in unit.services:
+                if svc.unit is not unit:
+                    continue
+
+                for name, memo in svc.memos.items():
+                    labels = {"unit": unit.name, "method": f"{type(svc).__name__}.{name}"}
+
+                    for stat, value in memo.stats.items():
+                        families[stat].add(labels, value)
+
+        return list(families.values())
+
+    return collector
+
+
+def collect_processes(pool):
+    """Returns a collector of ProcessPool stats"""
+
+    def collector():
+        stats = pool.stats
+
+        return [
+            MetricFamily("aioli_process_in_flight", "gauge", "Offloaded calls awaited").add({}, stats["in_flight"]),
+            MetricFamily("aioli_process_queued", "gauge", "Offloaded calls waiting for a process").add(
+                {}, stats["queued"]
+            ),
+            MetricFamily("aioli_process_completed_total", "counter", "Offloaded calls completed").add(
+                {}, stats["completed"]
+            ),
+            MetricFamily("aioli_process_rejected_total", "counter", "Offloaded calls rejected with a 503").add(
+                {}, stats["rejected"]
+            ),
+        ]
+
+    return collector
+
+
+def collect_shedding(shedder):
+    """Returns a collector of LoadShedder stats"""
+
+    def collector():
+        shed = MetricFamily("aioli_requests_shed_total", "counter", "Requests rejected by load shedding")
+
+        for priority, value in shedder.shed.items():
+            shed.add({"priority": priority.lower()}, value)
+
+        return [
+            MetricFamily("aioli_loop_lag_seconds", "gauge", "Event loop lag").add({}, shedder.lag),
+            MetricFamily("aioli_shedding_level", "gauge", "Load shedding level").add({}, shedder.level),
+            shed,
+        ]
+
+    return collector
+
+
+SAMPLE_REGEX = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:{(.*)})? (\S+)$')
+LABEL_REGEX = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_samples(text):
+    """Parses samples from metrics in the Prometheus text format
+
+    :param text: Metrics text
+    :return: List of (name, labels, value) tuples
+    """
+
+    samples = []
+
+    for line in text.splitlines():
+        match = SAMPLE_REGEX.match(line)
+
+        if line.startswith("#") or not match:
+            continue
+
+        name, label_str, value = match.groups()
+        labels = {
+            key: value.replace('\\"', '"').replace("\\n", "\n").replace("\\\\", "\\")
+            for key, value in LABEL_REGEX.findall(label_str or "")
+        }
+        samples.append((name, labels, float(value)))
+
+    return samples
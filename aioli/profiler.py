@@ -0,0 +1,295 @@
+import asyncio
+import cProfile
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+
+from collections import Counter
+
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from starlette.responses import Response
+from starlette.routing import Route, request_response
+
+from .engines import get_json_engine
+from .exceptions import AioliException
+from .utils import jsonify
+
+
+class ProfileOptions(Schema):
+    mode = fields.String(missing="sample", validate=validate.OneOf(["sample", "cprofile"]))
+    seconds = fields.Float(missing=None, allow_none=True, validate=validate.Range(min=0, min_inclusive=False))
+    requests = fields.Integer(missing=None, allow_none=True, validate=validate.Range(min=1))
+    unit = fields.String(missing=None, allow_none=True)
+    handler = fields.String(missing=None, allow_none=True)
+    interval = fields.Float(missing=0.005, validate=validate.Range(min=0.0001, max=1))
+
+    @validates_schema
+    def validate_limits(self, data, **_):
+        if data["seconds"] is None and data["requests"] is None:
+            raise ValidationError("Either seconds or requests must be provided")
+
+
+class StackSampler(threading.Thread):
+    """Periodically records the call stack of another thread
+
+    :param thread_id: Identifier of the thread to sample
+    :param interval: Seconds between samples
+    :param marker: Only record stacks containing this code object, if provided
+    """
+
+    def __init__(self, thread_id, interval, marker=None):
+        super(StackSampler, self).__init__(name="aioli-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.marker = marker
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+
+            if stack and (self.marker is None or self.marker in stack):
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self):
+        """Returns recorded stacks in the collapsed format used by flamegraph tools"""
+
+        lines = []
+
+        for stack, count in self.stacks.most_common():
+            names = [f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})" for code in stack]
+            lines.append(";".join(names) + f" {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+class ProfileSession:
+    """Profiles requests to a set of routes, for a number of seconds or requests
+
+    :param profiler: Profiler instance
+    :param routes: List of Starlette Routes to profile requests of
+    :param options: Validated ProfileOptions
+    :param filtered: Whether to record only stacks of profiled requests, in sample mode
+    """
+
+    def __init__(self, profiler, routes, options, filtered):
+        self.profiler = profiler
+        self.routes = routes
+        self.options = options
+        self.filtered = filtered
+        self.started = time.time()
+        self.requests = 0
+        self.in_flight = 0
+        self.sampler = None
+        self.profile = None
+        self.timer = None
+        self.done = asyncio.Event()
+        self.path = None
+        self._apps = []
+
+    def _wrap(self, endpoint):
+        async def profiled_endpoint(request):
+            if self.profile and not self.in_flight:
+                self.profile.enable()
+
+            self.in_flight += 1
+
+            try:
+                return await endpoint(request)
+            finally:
+                self.in_flight -= 1
+                self.requests += 1
+
+                if self.profile and not self.in_flight:
+                    self.profile.disable()
+
+                if self.options["requests"] and self.requests >= self.options["requests"]:
+                    self.stop()
+
+        return profiled_endpoint
+
+    def start(self):
+        for route in self.routes:
+            self._apps.append((route, route.app))
+            route.app = request_response(self._wrap(route.endpoint))
+
+        if self.options["mode"] == "cprofile":
+            self.profile = cProfile.Profile()
+        else:
+            self.sampler = StackSampler(threading.get_ident(), self.options["interval"], self._marker)
+            self.sampler.start()
+
+        if self.options["seconds"]:
+            self.timer = asyncio.get_event_loop().call_later(self.options["seconds"], self.stop)
+
+    @property
+    def _marker(self):
+        if not self.filtered:
+            return None
+
+        # Code object of `profiled_endpoint`, present in the stack of each profiled request
+        for const in self._wrap.__code__.co_consts:
+            if hasattr(const, "co_name") and const.co_name == "profiled_endpoint":
+                return const
+
+    def stop(self):
+        if self.done.is_set():
+            return
+
+        for route, app in self._apps:
+            route.app = app
+
+        if self.timer:
+            self.timer.cancel()
+
+        self.path = self.profiler.write(self)
+        self.done.set()
+
+    @property
+    def info(self):
+        return dict(
+            self.options,
+            started=self.started,
+            requests_profiled=self.requests,
+            done=self.done.is_set(),
+            result=os.path.basename(self.path) if self.path else None,
+        )
+
+
+class Profiler:
+    """Samples or cProfiles live requests, writing results to `directory`
+
+    Sampling records the stacks of the event loop thread at an interval, in the collapsed format read by
+    flamegraph tools. When limited to a unit or handler, only stacks of its requests are recorded.
+
+    cProfile is enabled while requests to the selected routes are in flight, and may include other tasks
+    running concurrently. Results are written in the pstats format.
+
+    :param app: Application instance
+    :param directory: Results directory
+    :param token: Token required by the admin routes
+    """
+
+    log = logging.getLogger("aioli.profiler")
+
+    def __init__(self, app, directory, token=None):
+        self.app = app
+        self.directory = directory
+        self.token = token
+        self.session = None
+
+    def get_routes(self, unit=None, handler=None):
+        """Returns Starlette Routes of handlers matching the given unit name and handler name
+
+        :param unit: Unit name
+        :param handler: Handler name, optionally qualified with its Controller class name
+        :return: List of Routes
+        """
+
+        endpoints = set()
+
+        for imported in self.app.registry.imported:
+            if unit and imported.name != unit:
+                continue
+
+            for controller in imported.controllers:
+                for qualname, obj in controller.handler_index.items():
+                    if not handler or handler in [qualname, obj.name]:
+                        endpoints.add(obj.endpoint)
+
+        return [route for route in self.app.routes if isinstance(route, Route) and route.endpoint in endpoints]
+
+    def start(self, **options):
+        """Starts a new profiling session
+
+        :param options: ProfileOptions
+        :return: ProfileSession
+        """
+
+        if self.session and not self.session.done.is_set():
+            raise AioliException(status=409, message="A profiling session is already running")
+
+        options = ProfileOptions().load(options)
+        routes = self.get_routes(options["unit"], options["handler"])
+
+        if not routes:
+            raise AioliException(status=404, message="No matching route handlers")
+
+        self.session = ProfileSession(self, routes, options, filtered=bool(options["unit"] or options["handler"]))
+        self.session.start()
+        self.log.info(f"Profiling {len(routes)} routes: {options}")
+
+        return self.session
+
+    def write(self, session):
+        os.makedirs(self.directory, exist_ok=True)
+        name = "aioli-{0}-{1}".format(time.strftime("%Y%m%d-%H%M%S", time.localtime(session.started)), session.options["mode"])
+
+        if session.profile:
+            path = os.path.join(self.directory, f"{name}.prof")
+            session.profile.dump_stats(path)
+        else:
+            session.sampler.stop()
+            path = os.path.join(self.directory, f"{name}.folded")
+
+            with open(path, "w") as fh:
+                fh.write(session.sampler.collapsed())
+
+        self.log.info(f"Profile written to {path}")
+        return path
+
+    @property
+    def results(self):
+        if not os.path.isdir(self.directory):
+            return []
+
+        return sorted(name for name in os.listdir(self.directory) if name.endswith((".folded", ".prof")))
+
+    def _authorize(self, request):
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), self.token.encode()):
+            raise AioliException(status=401, message="Invalid profiler token")
+
+    async def start_endpoint(self, request):
+        self._authorize(request)
+        body = await request.body()
+        session = self.start(**(get_json_engine().loads(body) if body else {}))
+
+        return jsonify(session.info, status=202)
+
+    async def status_endpoint(self, request):
+        self._authorize(request)
+
+        return jsonify(dict(
+            session=self.session.info if self.session else None,
+            results=self.results,
+        ))
+
+    async def result_endpoint(self, request):
+        self._authorize(request)
+        name = request.path_params["name"]
+
+        if name not in self.results:
+            raise AioliException(status=404, message="No such profile")
+
+        with open(os.path.join(self.directory, name), "rb") as fh:
+            body = fh.read()
+
+        return Response(body, headers={
+            "content-type": "application/octet-stream",
+            "content-disposition": f'attachment; filename="{name}"',
+        })
@@ -1,4 +1,4 @@
-from aioli.controller import BaseHttpController, RequestProp, Method, schemas, route, takes, returns
+from aioli.controller import BaseHttpController, RequestProp, Method, schemas, route, takes, returns, cached
 
 from .service import VisitService, VisitorService
 from .schema import Visit, Visitor, VisitorPath, VisitNew, VisitPath
@@ -25,19 +25,20 @@ class HttpController(BaseHttpController):
     async def visit_add(self, client_addr, body):
         return await self.visit.create(body, client_addr)
 
-    @route("/{visit_id}", Method.GET, "Visit details")
+    @route("/{visit_id:int}", Method.GET, "Visit details")
     @takes(path=VisitPath)
+    @cached(ttl=60, tags=["visits"])
     @returns(Visit)
     async def visit_get(self, visit_id):
         return await self.visit.get_one(visit_id)
 
-    @route("/{visit_id}", Method.PUT, "Update entry")
+    @route("/{visit_id:int}", Method.PUT, "Update entry")
     @takes(body=Visit, path=VisitPath, props=[RequestProp.client_addr])
     @returns(Visit)
     async def visit_update(self, visit_id, body, client_addr):
         return await self.visit.update(visit_id, body, client_addr)
 
-    @route("/{visit_id}", Method.DELETE, "Delete entry")
+    @route("/{visit_id:int}", Method.DELETE, "Delete entry")
     @takes(path=VisitPath, props=[RequestProp.client_addr])
     @returns(status=204)
     async def visit_delete(self, visit_id, client_addr):
@@ -45,19 +46,20 @@ class HttpController(BaseHttpController):
 
     @route("/visitors", Method.GET, "List of visitors")
     @takes(query=schemas.HttpParams)
+    @cached(ttl=60, tags=["visitors"])
     @returns(Visitor, many=True)
     async def visitors_get(self, query):
         return await self.visitor.get_many(**query)
 
-    @route("/visitors/{visitor_id}", Method.GET, "Visitor details")
+    @route("/visitors/{visitor_id:int}", Method.GET, "Visitor details")
     @takes(path=VisitorPath)
     @returns(Visitor)
     async def visitor_get(self, visitor_id):
         return await self.visitor.get_one(visitor_id)
 
-    @route("/visitors/{visitor_id}/visits", Method.GET, "Visits by visitor")
+    @route("/visitors/{visitor_id:int}/visits", Method.GET, "Visits by visitor")
     @takes(path=VisitorPath, query=schemas.HttpParams)
-    @returns(Visit)
+    @returns(Visit, many=True)
     async def visitor_entries(self, visitor_id, query):
         query.update({"visitor": visitor_id})
         return await self.visit.get_many(**query)
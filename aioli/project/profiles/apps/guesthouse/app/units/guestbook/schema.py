@@ -7,6 +7,9 @@ class Visitor(Schema):
     location = fields.String()
     ip_addr = fields.String()
 
+    class Meta:
+        compiled = True
+
 
 class VisitPath(Schema):
     visit_id = fields.Integer()
@@ -23,6 +26,7 @@ class Visit(Schema):
     message = fields.String()
 
     class Meta:
+        compiled = True
         dump_only = ["id", "visitor", "visited_on", "created_on"]
         load_only = ["visit_id", "visitor_id"]
 
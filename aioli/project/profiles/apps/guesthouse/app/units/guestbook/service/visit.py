@@ -60,7 +60,8 @@ class VisitService(BaseService):
 
         visit = await self.db.get_one(pk=visit_id)
         self.raise_if_unauthorized(visit, remote_addr)
-        return await visit.delete()
+        await visit.delete()
+        self.invalidate_cache(tags=["visits"])
 
     async def update(self, visit_id, payload, remote_addr):
         """Updates a Visit using id after ensuring addresses matches
@@ -73,7 +74,10 @@ class VisitService(BaseService):
 
         visit = await self.db.get_one(pk=visit_id)
         self.raise_if_unauthorized(visit, remote_addr)
-        return await self.db.update(visit, payload)
+        visit = await self.db.update(visit, payload)
+        self.invalidate_cache(tags=["visits"])
+
+        return visit
 
     async def create(self, visit, remote_addr):
         """Register new visit
@@ -105,6 +109,7 @@ class VisitService(BaseService):
                 visit["visitor"] = await self.visitor.db.get_one(**visitor)
             except NoMatchFound:
                 visit["visitor"] = await self.visitor.db.create(**visitor)
+                self.invalidate_cache(tags=["visitors"])
                 self.unit.log.info(f"New visitor: {visit['visitor'].name}")
 
             visit_new = await self.db.create(**visit)
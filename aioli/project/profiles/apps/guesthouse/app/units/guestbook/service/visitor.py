@@ -1,8 +1,6 @@
-import asyncio
-
 from geolite2 import geolite2
 
-from aioli.service import BaseService
+from aioli.service import BaseService, memoize
 from aioli_rdbms import DatabaseService
 
 from .. import database
@@ -37,6 +35,7 @@ class VisitorService(BaseService):
 
         return await self.db.get_many(**query)
 
+    @memoize(ttl=3600, maxsize=4096)
     async def ipaddr_location(self, remote_addr):
         """Resolve the given IP address' geographical location
 
@@ -48,13 +47,12 @@ class VisitorService(BaseService):
             for loc in locations:
                 yield loc["names"]["en"]
 
-        # Run the blocking geolite2 function in the executor
-        loop = asyncio.get_running_loop()
-        geoip = await loop.run_in_executor(None, self.geoip.get, remote_addr)
+        # Run the blocking geolite2 function in the Unit's thread pool
+        geoip = await self.run_blocking(self.geoip.get, remote_addr)
 
         if remote_addr in ["127.0.0.1", "::1"]:
             return "Localhost", "Localdomain"
         if not geoip:
             return "Unknown City", "Unknown Country"
 
-        return in_english(geoip["city"], geoip["country"])
+        return tuple(in_english(geoip["city"], geoip["country"]))
@@ -1,6 +1,8 @@
 import os
+import asyncio
 import logging
 import configparser
+import time
 
 from enum import Enum
 
@@ -13,6 +15,9 @@ from .exceptions import (
     UnitConfigError
 )
 
+from .component import ComponentMeta
+from .lifecycle import get_unit_dependencies
+from .service import BaseService
 from .unit import Unit, UnitMetadata
 
 
@@ -47,6 +52,9 @@ class ImportRegistry:
     def __init__(self, app, config):
         self._config = config
         self._app = app
+        self.dependencies = {}
+        self.startup_timings = {}
+        self.shutdown_timings = {}
 
     def declare_unit(self, unit):
         if unit not in self.imported:
@@ -108,17 +116,80 @@ class ImportRegistry:
 
             self.declare_unit(unit)
 
-    async def call_startup_handlers(self):
-        total = failed = 0
+        self.dependencies = get_unit_dependencies(self.imported)
 
-        for unit in self.imported:
-            total += 1
+    async def call_startup_handlers(self, timeout=None):
+        """Calls the startup handlers of Units concurrently, each Unit once the Units it depends on have started.
+        Units depending on a Unit that failed to start are skipped.
+
+        :param timeout: Seconds each handler may take, None for no limit
+        :return: Number of Units, number of Units that failed or were skipped
+        """
+
+        tasks = {}
+        started = time.perf_counter()
+        self.startup_timings = {}
+
+        async def start(unit):
+            if not all(await asyncio.gather(*[tasks[dep] for dep in self.dependencies.get(unit, [])])):
+                self.log.error(f"Skipped startup hooks for {unit.name}: a Unit it depends on failed")
+                return False
 
             try:
-                await unit.call_startup_handlers()
+                self.startup_timings[unit.name] = await unit.call_startup_handlers(timeout)
             except Exception:
-                failed += 1
-                unit_name = unit.meta['name']
-                self.log.exception(f"When calling startup hooks for {unit_name}:")
+                self.log.exception(f"When calling startup hooks for {unit.name}:")
+                return False
+
+            return True
+
+        for unit in self.imported:
+            tasks[unit] = asyncio.ensure_future(start(unit))
+
+        results = await asyncio.gather(*tasks.values())
+        self.log.info(self._format_timings("Startup", time.perf_counter() - started, self.startup_timings))
+
+        return len(results), results.count(False)
+
+    async def call_shutdown_handlers(self, timeout=None):
+        """Calls the shutdown handlers of Units concurrently, each Unit once the Units depending on it have shut down
+
+        :param timeout: Seconds each handler may take, None for no limit
+        """
+
+        tasks = {}
+        started = time.perf_counter()
+        self.shutdown_timings = {}
+
+        dependents = {unit: [] for unit in self.imported}
+
+        for unit, deps in self.dependencies.items():
+            for dep in deps:
+                dependents[dep].append(unit)
+
+        async def stop(unit):
+            await asyncio.gather(*[tasks[dependent] for dependent in dependents[unit]])
+            self.shutdown_timings[unit.name] = await unit.call_shutdown_handlers(timeout)
+
+        for unit in self.imported:
+            tasks[unit] = asyncio.ensure_future(stop(unit))
+
+        await asyncio.gather(*tasks.values())
+        self.log.info(self._format_timings("Shutdown handlers", time.perf_counter() - started, self.shutdown_timings))
+
+    def _format_timings(self, phase, elapsed, units):
+        lines = [f"{phase} took {elapsed:.3f}s"]
+
+        for name, timings in units.items():
+            lines.append(f"  {name}: {sum(seconds for _, seconds in timings):.3f}s")
+            lines.extend(f"    {component}: {seconds:.3f}s" for component, seconds in timings)
+
+        return "\n".join(lines)
+
+
+def reset_registries():
+    """Clears the process-wide registries of Components and imported Units, before building another Application"""
 
-        return total, failed
+    ComponentMeta._instances.clear()
+    BaseService._instances.clear()
+    ImportRegistry.imported.clear()
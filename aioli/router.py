@@ -0,0 +1,191 @@
+import re
+
+from starlette.convertors import CONVERTOR_TYPES
+from starlette.routing import Router, Route, Match, PARAM_REGEX
+
+
+class RouteNode:
+    __slots__ = ["static", "params", "routes"]
+
+    def __init__(self):
+        self.static = {}
+        self.params = []
+        self.routes = []
+
+    def get_param(self, name, convertor_type):
+        for param_name, param_type, regex, convertor, child in self.params:
+            if param_name == name and param_type == convertor_type:
+                return child
+
+        convertor = CONVERTOR_TYPES[convertor_type]
+        child = RouteNode()
+        self.params.append((name, convertor_type, re.compile(convertor.regex), convertor, child))
+
+        return child
+
+
+class RouteTree:
+    """Prefix tree of routes, with one level per path segment
+
+    Path parameters are typed using Starlette convertors, e.g. "/visits/{visit_id:int}", and
+    must make up whole segments. Where several routes match a path, the earliest added wins.
+    """
+
+    def __init__(self):
+        self.root = RouteNode()
+
+    @staticmethod
+    def parse(path):
+        """Returns a list of (static segment, param name, convertor type) tuples, or None if
+        the path can't be represented in the tree
+
+        :param path: Route path
+        """
+
+        segments = []
+
+        for segment in path.split("/")[1:]:
+            if "{" not in segment:
+                segments.append((segment, None, None))
+                continue
+
+            match = PARAM_REGEX.fullmatch(segment)
+
+            if not match:
+                return None
+
+            name, convertor_type = match.groups("str")
+            convertor_type = convertor_type.lstrip(":")
+
+            # Path params may span multiple segments
+            if convertor_type == "path" or convertor_type not in CONVERTOR_TYPES:
+                return None
+
+            segments.append((None, name, convertor_type))
+
+        return segments
+
+    def insert(self, path, methods, value, order):
+        """Adds a route to the tree
+
+        :param path: Route path
+        :param methods: Set of HTTP methods, or None for any
+        :param value: Value returned on lookup
+        :param order: Route precedence, lower is matched first
+        :return: True if the path could be added
+        """
+
+        segments = self.parse(path)
+
+        if segments is None:
+            return False
+
+        node = self.root
+
+        for static, name, convertor_type in segments:
+            if static is not None:
+                node = node.static.setdefault(static, RouteNode())
+            else:
+                node = node.get_param(name, convertor_type)
+
+        node.routes.append((order, methods, value))
+        return True
+
+    def _search(self, node, segments, idx, params, method, found):
+        if idx == len(segments):
+            for order, methods, value in node.routes:
+                if (methods is None or method in methods) and (not found or order < found[0]):
+                    found[:] = [order, value, dict(params)]
+
+            return
+
+        segment = segments[idx]
+        child = node.static.get(segment)
+
+        if child is not None:
+            self._search(child, segments, idx + 1, params, method, found)
+
+        for name, _, regex, convertor, child in node.params:
+            if regex.fullmatch(segment):
+                params[name] = convertor.convert(segment)
+                self._search(child, segments, idx + 1, params, method, found)
+                del params[name]
+
+    def lookup(self, method, path):
+        """Finds the earliest added route matching a method and path
+
+        :param method: HTTP method
+        :param path: Request path
+        :return: List of [order, value, path params], or None
+        """
+
+        found = []
+        self._search(self.root, path.split("/")[1:], 0, {}, method, found)
+
+        return found or None
+
+
+class RadixRouter(Router):
+    """Starlette Router matching HTTP routes using a RouteTree, instead of trying each route in turn
+
+    Requests not matching a route in the tree, or matching it with the wrong method, are passed on to
+    the regular Router, which takes care of 404 and 405 responses, slash redirects, mounts and lifespan.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RadixRouter, self).__init__(*args, **kwargs)
+        self.tree = None
+        self.other_routes = []
+        self._compiled_count = None
+
+    def compile(self):
+        """Compiles the tree from the current list of routes"""
+
+        self.tree = RouteTree()
+        self.other_routes = []
+
+        for order, route in enumerate(self.routes):
+            if not isinstance(route, Route) or not self.tree.insert(route.path, route.methods, route, order):
+                self.other_routes.append((order, route))
+
+        self._compiled_count = len(self.routes)
+
+    def match(self, scope):
+        """Returns the Route and path params for a HTTP request scope, or None"""
+
+        if self._compiled_count != len(self.routes):
+            self.compile()
+
+        found = self.tree.lookup(scope["method"], scope["path"])
+
+        if found is None:
+            return None
+
+        order, route, params = found
+
+        # Routes outside the tree, e.g. mounts, take precedence if they were added first
+        for other_order, other in self.other_routes:
+            if other_order > order:
+                break
+            elif other.matches(scope)[0] is Match.FULL:
+                return None
+
+        return route, params
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            match = self.match(scope)
+
+            if match is not None:
+                route, params = match
+
+                if "router" not in scope:
+                    scope["router"] = self
+
+                scope["endpoint"] = route.endpoint
+                scope["path_params"] = dict(scope.get("path_params", {}), **params)
+
+                await route(scope, receive, send)
+                return
+
+        await super(RadixRouter, self).__call__(scope, receive, send)
@@ -1,5 +1,19 @@
+import functools
+import importlib
+import inspect
+import pickle
+
+from . import context
 from .component import Component, ComponentMeta
+from .concurrency import SingleFlight
+from .datastores import LRUStore
 from .exceptions import BootstrapError
+from .loader import DataLoader
+
+OFFLOAD_ATTR = "_aioli_offload"
+MEMO_ATTR = "_aioli_memo"
+
+_MISSING = object()
 
 
 class ServiceMeta(ComponentMeta):
@@ -25,10 +39,13 @@ class BaseService(Component, metaclass=ServiceMeta):
     :var unit: Parent Unit
     :var config: Unit configuration
     :var log: Unit logger
+    :var dependencies: Service classes of other Units to start before this Service's Unit, in addition to
+        those passed to `connect` or `integrate` in its methods
     """
 
     _instances = {}
     loggers = []
+    dependencies = []
 
     def connect(self, cls):
         """Reuses existing instance of the given Service class, in the context of
@@ -55,3 +72,258 @@ class BaseService(Component, metaclass=ServiceMeta):
         """
 
         return self.unit.integrate_service(cls)
+
+    def invalidate_cache(self, prefix=None, tags=None):
+        """Removes cached responses of the current Unit, matching a key prefix or any of the given tags.
+        Removes all cached responses of the Unit if neither is provided.
+
+        :param prefix: Key prefix, e.g. "GET /api/guestbook/visitors"
+        :param tags: List of tags
+        :return: Number of removed entries
+        """
+
+        return self.unit.cache.invalidate(prefix=prefix, tags=tags)
+
+    @property
+    def memos(self):
+        """Memos of the Service's methods decorated with @memoize, by method name"""
+
+        cls = type(self)
+        memos = {}
+
+        for name in dir(cls):
+            memo = getattr(getattr(cls, name, None), MEMO_ATTR, None)
+
+            if memo is not None:
+                memos[name] = memo
+
+        return memos
+
+    def create_loader(self, batch_fn, max_batch_size=100, cache=True):
+        """Creates a DataLoader, gathering `load(key)` calls made in the same event loop iteration
+        into batched calls of `batch_fn`, e.g. to look up related records in one query rather than one each.
+
+        :param batch_fn: Coroutine function taking a list of keys, returning a list of values or a mapping
+        :param max_batch_size: Max number of keys per batch
+        :param cache: Cache values for the duration of the request
+        :return: DataLoader
+        """
+
+        return DataLoader(batch_fn, max_batch_size=max_batch_size, cache=cache)
+
+    def budget(self, timeout=None):
+        """Shrinks a downstream timeout, e.g. of a query or HTTP call, to the time left before the deadline
+        of the current request, if the route handler or Unit has a `timeout`.
+
+        :param timeout: Timeout in seconds, None for no timeout
+        :return: The smallest of `timeout` and the remaining time, None if neither is set
+        """
+
+        return context.budget(timeout)
+
+    async def run_in_executor(self, executor, func, *args):
+        """Runs a blocking function in an executor, skipping it if the deadline of the current request
+        passes while it's queued. The function runs in a copy of the current context, and can read the deadline.
+
+        :param executor: concurrent.futures.Executor, None for the loop's default executor
+        :param func: Blocking function
+        :param args: Positional arguments
+        :return: Return value of the call
+        """
+
+        return await context.run_in_executor(executor, func, *args)
+
+    async def run_blocking(self, func, *args):
+        """Runs a blocking function in the thread pool of the Service's Unit, sized using `executor_workers`,
+        keeping the Unit's blocking calls from holding up those of other Units.
+
+        :param func: Blocking function
+        :param args: Positional arguments
+        :return: Return value of the call
+        """
+
+        return await self.unit.executor.run(func, *args)
+
+
+def _call_offloaded(module_name, qualname, payload):
+    # Runs in a worker process: looks up the undecorated function by its qualified name, e.g. Class.method
+    func = importlib.import_module(module_name)
+
+    for name in qualname.split("."):
+        func = getattr(func, name)
+
+    if getattr(func, OFFLOAD_ATTR, None):
+        func = func.__wrapped__
+
+    args, kwargs = pickle.loads(payload)
+    return func(*args, **kwargs)
+
+
+def uses_processes(svc):
+    """Returns whether a Service has methods offloaded to worker processes
+
+    :param svc: Service instance
+    """
+
+    cls = type(svc)
+
+    return any(getattr(getattr(cls, name, None), OFFLOAD_ATTR, None) == "process" for name in dir(cls))
+
+
+def offload(process=False):
+    """Runs a blocking Service method off the event loop, returning a coroutine function: in the thread pool
+    of the Service's Unit, or with `process`, in the Application's process pool, for CPU-bound work.
+
+    Worker processes have no Service instance: functions offloaded to a process are either staticmethods,
+    decorated using `@offload(process=True)` above `@staticmethod`, or module-level functions, and must be
+    importable by their qualified name. Their arguments and return value must be picklable.
+
+    :param process: Run in a worker process, rather than a thread
+    :return: Service method
+    :raises: BootstrapError if a function offloaded to a process is neither a staticmethod nor a module-level function
+    """
+
+    def wrapper(fn):
+        if process:
+            if isinstance(fn, staticmethod):
+                fn = fn.__func__
+            elif "." in fn.__qualname__:
+                raise BootstrapError(
+                    f"Cannot offload {fn.__qualname__} to a process: worker processes have no Service instance, "
+                    f"use a staticmethod or a module-level function"
+                )
+
+            if "<" in fn.__qualname__:
+                raise BootstrapError(f"Cannot offload {fn.__qualname__} to a process: it's not importable")
+
+            async def offloaded(self, *args, **kwargs):
+                try:
+                    payload = pickle.dumps((args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+                except (pickle.PicklingError, TypeError, AttributeError) as e:
+                    raise TypeError(f"Arguments of {fn.__qualname__} can't be sent to a worker process: {e}")
+
+                return await self.app.processes.run(_call_offloaded, fn.__module__, fn.__qualname__, payload)
+        else:
+            async def offloaded(self, *args, **kwargs):
+                return await self.unit.executor.run(functools.partial(fn, self, *args, **kwargs))
+
+        functools.update_wrapper(offloaded, fn)
+        setattr(offloaded, OFFLOAD_ATTR, "process" if process else "thread")
+
+        return offloaded
+
+    return wrapper
+
+
+class Memo:
+    """Results of an async Service method, keyed by arguments
+
+    Arguments are bound to the method's signature, so that positional and keyword arguments make the same key.
+    Concurrent calls with the same key share a single call, and results of calls started before an
+    invalidation of their key aren't stored. Results are shared by all callers, rather than copied.
+
+    :param func: Coroutine function
+    :param ttl: Result lifetime in seconds, None for no expiry
+    :param maxsize: Max number of results, least recently used ones are evicted
+
+    :var store: LRUStore of results
+    :var coalesced: Number of calls that shared a call in flight
+    """
+
+    def __init__(self, func, ttl=60, maxsize=1024):
+        self.func = func
+        self.store = LRUStore(maxsize, ttl=ttl)
+        self.coalesced = 0
+        self._signature = inspect.signature(func)
+        self._flight = SingleFlight()
+
+        # Token of the call in flight, by key: invalidations replace it, rather than tracking every key
+        self._tokens = {}
+
+    def get_key(self, args, kwargs):
+        bound = self._signature.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+
+        return tuple(bound.arguments.values())[1:]
+
+    async def _call(self, key, token, svc, args, kwargs):
+        try:
+            value = await self.func(svc, *args, **kwargs)
+        finally:
+            valid = self._tokens.get(key) is token
+
+            if valid:
+                del self._tokens[key]
+
+        if valid:
+            self.store.set(key, value)
+
+        return value
+
+    async def call(self, svc, args, kwargs):
+        key = self.get_key(args, kwargs)
+        value = self.store.get(key, _MISSING)
+
+        if value is not _MISSING:
+            return value
+
+        token = self._tokens.get(key)
+
+        if token is None:
+            token = self._tokens[key] = object()
+        elif token in self._flight:
+            self.coalesced += 1
+
+        return await self._flight.run(token, self._call, key, token, svc, args, kwargs)
+
+    def invalidate(self, *args, **kwargs):
+        """Removes the result of a call with the given arguments, or all results if none are given
+
+        :return: Number of removed results
+        """
+
+        if not args and not kwargs:
+            self._tokens.clear()
+            count = len(self.store)
+            self.store.clear()
+            return count
+
+        key = self.get_key(args, kwargs)
+        self._tokens.pop(key, None)
+
+        return int(self.store.delete(key))
+
+    @property
+    def stats(self):
+        return dict(self.store.stats, coalesced=self.coalesced)
+
+
+def memoize(ttl=60, maxsize=1024):
+    """Caches results of an async Service method by arguments, for `ttl` seconds.
+    Concurrent calls with the same arguments share a single call.
+
+    Results are invalidated using the method's `invalidate` function, e.g. `self.get_name.invalidate(visitor_id)`,
+    or `self.get_name.invalidate()` to remove all of them. Exceptions aren't cached. Results are shared by all
+    callers rather than copied, and should be immutable.
+
+    :param ttl: Result lifetime in seconds, None for no expiry
+    :param maxsize: Max number of results, least recently used ones are evicted
+    :return: Service method
+    """
+
+    def wrapper(fn):
+        if not inspect.iscoroutinefunction(fn):
+            raise BootstrapError(f"Memoized method {fn.__qualname__} must be a coroutine function")
+
+        memo = Memo(fn, ttl=ttl, maxsize=maxsize)
+
+        async def memoized(self, *args, **kwargs):
+            return await memo.call(self, args, kwargs)
+
+        functools.update_wrapper(memoized, fn)
+        memoized.invalidate = memo.invalidate
+        setattr(memoized, MEMO_ATTR, memo)
+
+        return memoized
+
+    return wrapper
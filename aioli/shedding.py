@@ -0,0 +1,81 @@
+import asyncio
+import logging
+
+from .exceptions import ServiceUnavailable
+
+# Requests of priorities below the shedding level are rejected. Critical requests never are.
+MAX_LEVEL = 2
+
+
+class LoadShedder:
+    """Rejects low priority requests while the event loop lags behind, CoDel-style
+
+    Lag is measured as the delay of a timer callback scheduled every `interval` seconds, i.e. the time
+    callbacks ready to run spend queueing behind others. Once lag has stayed above `target` for an
+    interval, the shedding level goes up by one, and it keeps going up for each further interval above
+    target. Each interval with lag below target brings it down by one.
+
+    :param target: Acceptable lag in seconds
+    :param interval: Seconds between measurements
+
+    :var lag: Last measured lag, in seconds
+    :var level: Requests with a priority below this level are rejected
+    :var shed: Number of rejected requests, by priority name
+    """
+
+    log = logging.getLogger("aioli.shedding")
+
+    def __init__(self, target=0.05, interval=0.1):
+        self.target = target
+        self.interval = interval
+        self.lag = 0.0
+        self.level = 0
+        self.shed = {}
+        self._above_since = None
+        self._timer = None
+
+    def update(self, lag, now):
+        """Records a lag measurement, adjusting the shedding level
+
+        :param lag: Lag in seconds
+        :param now: Loop time of the measurement
+        """
+
+        self.lag = lag
+        level = self.level
+
+        if lag <= self.target:
+            self._above_since = None
+            self.level = max(0, level - 1)
+        elif self._above_since is None:
+            self._above_since = now
+        elif now - self._above_since >= self.interval:
+            self._above_since = now
+            self.level = min(MAX_LEVEL, level + 1)
+
+        if self.level != level:
+            self.log.warning(f"Loop lag {lag * 1e3:.1f}ms, shedding level {level} -> {self.level}")
+
+    def _tick(self, loop, expected):
+        now = loop.time()
+        self.update(max(0.0, now - expected), now)
+        self._timer = loop.call_later(self.interval, self._tick, loop, now + self.interval)
+
+    def start(self):
+        loop = asyncio.get_event_loop()
+        self._timer = loop.call_later(self.interval, self._tick, loop, loop.time() + self.interval)
+
+    def stop(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def reject(self, priority):
+        """Counts and rejects a request
+
+        :param priority: Route Priority
+        :raises: ServiceUnavailable
+        """
+
+        self.shed[priority.name] = self.shed.get(priority.name, 0) + 1
+        raise ServiceUnavailable(message="Overloaded, try again later")
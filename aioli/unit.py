@@ -1,11 +1,15 @@
+import asyncio
 import logging
 import importlib
 import inspect
+import time
 
 from marshmallow import Schema, fields, ValidationError
 
+from .concurrency import ConcurrencyLimiter, BlockingPool
 from .config import UnitConfigSchema
 from .controller import BaseHttpController
+from .controller.cache import ResponseCache
 from .datastores import MemoryStore
 from .exceptions import BootstrapError, UnitConfigError
 from .service import BaseService
@@ -47,6 +51,10 @@ class Unit:
     :ivar config: Unit config
     :ivar controllers: List of Controllers registered with the Unit
     :ivar services: List of Services registered with the Unit
+    :ivar cache: Unit ResponseCache, used by @cached route handlers
+    :ivar limiter: ConcurrencyLimiter shared by the Unit's route handlers, if `max_concurrency` is set
+    :ivar handler_limiters: ConcurrencyLimiters of route handlers with limits of their own, by handler name
+    :ivar executor: BlockingPool running blocking calls of the Unit's Services
     """
 
     app = None
@@ -56,6 +64,9 @@ class Unit:
     config = {}
 
     memory = None
+    cache = None
+    limiter = None
+    executor = None
 
     def __init__(
         self,
@@ -157,14 +168,58 @@ class Unit:
         for cls in self._controllers:
             self._register_controller(cls)
 
-    async def call_startup_handlers(self):
-        """Call startup handlers in the order they were registered (integrated services last)"""
+    async def call_startup_handlers(self, timeout=None):
+        """Call startup handlers in the order they were registered (integrated services last)
 
-        for svc in self.services:
-            await svc.on_startup()
+        :param timeout: Seconds each handler may take, None for no limit
+        :return: List of (component name, seconds taken) tuples
+        """
 
-        for ctrl in self.controllers:
-            await ctrl.on_startup()
+        timings = []
+
+        # Services integrated by startup handlers are appended to `self.services`, and started in turn
+        for components in [self.services, self.controllers]:
+            for component in components:
+                name = type(component).__name__
+                started = time.perf_counter()
+
+                try:
+                    await asyncio.wait_for(component.on_startup(), timeout)
+                except asyncio.TimeoutError:
+                    raise BootstrapError(f"{name}.on_startup of {self.name} timed out after {timeout}s")
+
+                timings.append((name, time.perf_counter() - started))
+
+        return timings
+
+    async def call_shutdown_handlers(self, timeout=None):
+        """Call shutdown handlers concurrently, those of Controllers before those of the Services they use,
+        then shut down the executor. Services integrated from other Units are left to their own Unit.
+
+        :param timeout: Seconds each handler may take, None for no limit
+        :return: List of (component name, seconds taken) tuples, of handlers that completed
+        """
+
+        timings = []
+
+        async def call(component):
+            name = type(component).__name__
+            started = time.perf_counter()
+
+            try:
+                await asyncio.wait_for(component.on_shutdown(), timeout)
+            except asyncio.TimeoutError:
+                self.log.error(f"{name}.on_shutdown of {self.name} timed out after {timeout}s")
+            except Exception:
+                self.log.exception(f"When calling {name}.on_shutdown of {self.name}:")
+            else:
+                timings.append((name, time.perf_counter() - started))
+
+        await asyncio.gather(*[call(ctrl) for ctrl in self.controllers])
+        await asyncio.gather(*[call(svc) for svc in self.services if svc.unit is self])
+        self.executor.shutdown()
+
+        return timings
 
     def register(self, app):
         self.name = name = self.meta["name"]
@@ -179,5 +234,13 @@ class Unit:
         except ValidationError as e:
             raise UnitConfigError(e.__dict__, unit=self.name)
 
+        self.cache = ResponseCache(config["cache_max_entries"])
+        self.handler_limiters = {}
+
+        if config["max_concurrency"]:
+            self.limiter = ConcurrencyLimiter(config["max_concurrency"], config["max_queue"])
+
+        self.executor = BlockingPool(f"aioli-{name}", config["executor_workers"], config["executor_max_queue"])
+
         self._register_services()
         self._register_controllers()
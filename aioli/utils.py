@@ -1,13 +1,13 @@
 import re
 
-import ujson
-
 from starlette.responses import Response
 
+from .engines import get_json_engine
+
 
-def jsonify(content, status=200, **kwargs):
+def jsonify(content, status=200, indent=0):
     return Response(
-        content=ujson.dumps(content, ensure_ascii=False, **kwargs).encode("utf8"),
+        content=get_json_engine().dumps(content, indent=indent),
         status_code=status,
         headers={"content-type": "application/json"},
     )
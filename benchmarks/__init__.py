@@ -0,0 +1,4 @@
+"""Aioli benchmarks
+
+Each module can be run using `python -m benchmarks.<name>` from the repository root.
+"""
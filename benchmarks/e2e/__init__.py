@@ -0,0 +1,8 @@
+"""End-to-end load benchmarks of the bundled template profiles
+
+Apps are built from the Units of each profile in TEMPLATE_PROFILES, and driven either in-process using the
+ASGI interface, or over HTTP with a uvicorn worker on localhost. Results can be saved as JSON baselines, and
+later runs compared against them to flag regressions.
+
+Run using `python -m benchmarks.e2e --help` from the repository root.
+"""
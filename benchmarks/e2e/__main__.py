@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from .apps import SCENARIOS, SEEDS
+from .drivers import AsgiDriver, UvicornDriver
+from .report import summarize, save_baseline, load_baseline, compare, format_table
+
+
+async def run_scenario(driver, scenario, concurrency, duration, warmup):
+    """Makes requests using `concurrency` sessions for `duration` seconds, after warming up
+
+    :return: Summary of the measured requests
+    """
+
+    sessions = [await driver.session() for _ in range(concurrency)]
+    latencies = []
+    errors = 0
+
+    async def worker(session, until, record):
+        nonlocal errors
+
+        while time.monotonic() < until:
+            started = time.perf_counter_ns()
+            status = await session.request(scenario)
+
+            if record:
+                latencies.append(time.perf_counter_ns() - started)
+                errors += status != scenario.status
+
+    await asyncio.gather(*[worker(session, time.monotonic() + warmup, False) for session in sessions])
+
+    started = time.monotonic()
+    await asyncio.gather(*[worker(session, started + duration, True) for session in sessions])
+    elapsed = time.monotonic() - started
+
+    for session in sessions:
+        await session.close()
+
+    return summarize(latencies, elapsed, errors)
+
+
+async def run_profile(profile_name, driver, args):
+    results = {}
+    await driver.start()
+
+    try:
+        session = await driver.session()
+
+        for scenario in SEEDS.get(profile_name, []):
+            status = await session.request(scenario)
+
+            if status != scenario.status:
+                raise RuntimeError(f"Seeding {profile_name} failed: {scenario.method} {scenario.path} -> {status}")
+
+        await session.close()
+
+        for scenario in SCENARIOS[profile_name]:
+            if args.scenarios and scenario.name not in args.scenarios:
+                continue
+
+            key = f"{profile_name}/{driver.name}/{scenario.name}"
+            results[key] = await run_scenario(driver, scenario, args.concurrency, args.duration, args.warmup)
+    finally:
+        await driver.stop()
+
+    return results
+
+
+def get_driver(name, profile_name, args):
+    core_config = dict(router=args.router)
+
+    if name == "uvicorn":
+        return UvicornDriver(profile_name, core_config, port=args.port)
+
+    return AsgiDriver(profile_name, core_config)
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Measures throughput and latency of template profile apps")
+    parser.add_argument("--profiles", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--drivers", nargs="+", choices=["asgi", "uvicorn"], default=["asgi", "uvicorn"])
+    parser.add_argument("--scenarios", nargs="+", help="Only run scenarios with these names")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent sessions")
+    parser.add_argument("--duration", type=float, default=3, help="Seconds to measure each scenario")
+    parser.add_argument("--warmup", type=float, default=0.5, help="Seconds to warm up before measuring")
+    parser.add_argument("--router", choices=["linear", "radix"], default="linear")
+    parser.add_argument("--port", type=int, default=8765, help="uvicorn listen port")
+    parser.add_argument("--save", metavar="PATH", help="Save results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare results to a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change flagged as a regression")
+    args = parser.parse_args()
+
+    # Route registration and requests are logged
+    logging.disable(logging.WARNING)
+
+    results = {}
+
+    for profile_name in args.profiles:
+        for driver_name in args.drivers:
+            driver = get_driver(driver_name, profile_name, args)
+            results.update(asyncio.run(run_profile(profile_name, driver, args)))
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    print(format_table(results, baseline))
+
+    if args.save:
+        options = {k: v for k, v in vars(args).items() if k not in ["save", "baseline"]}
+        save_baseline(args.save, results, options)
+        print(f"\nBaseline saved to {args.save}")
+
+    if baseline:
+        regressions = compare(baseline, results, args.threshold)
+
+        print(f"\nCompared to {args.baseline} (commit {baseline['commit']}): {len(regressions)} regressions")
+
+        for name in ["concurrency", "duration", "router"]:
+            if baseline["options"].get(name) != getattr(args, name):
+                print(f"  Warning: baseline was recorded with {name}={baseline['options'].get(name)}")
+
+        for key, metric, old, new, change in regressions:
+            print(f"  {key} {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,119 @@
+import importlib
+import importlib.util
+import os
+import sys
+
+from collections import namedtuple
+
+from aioli import Application
+from aioli.project import TEMPLATE_PROFILES
+from aioli.registry import reset_registries
+
+STANDINS_DIR = os.path.join(os.path.dirname(__file__), "standins")
+
+Scenario = namedtuple("Scenario", ["name", "method", "path", "status", "body"])
+Scenario.__new__.__defaults__ = (200, b"")
+
+VISIT_NEW = b'{"message": "Hello from the benchmark", "visitor_name": "Benchmark"}'
+
+# Units of each template profile, along with Units it depends on. The aioli-openapi Unit is left out:
+# it only serves the generated schema and isn't installed here.
+PROFILE_UNITS = {
+    "minimal": [],
+    "whoami": ["whoami"],
+    "guesthouse": ["aioli_rdbms", "guestbook"],
+}
+
+PROFILE_CONFIG = {
+    "guesthouse": {
+        # Allow the POST scenario to keep creating visits from localhost
+        "guestbook": dict(visits_max=2 ** 31),
+        "aioli-rdbms": dict(database=":memory:"),
+    },
+}
+
+SCENARIOS = {
+    "minimal": [
+        Scenario("not_found", "GET", "/api/v1/missing", 404),
+    ],
+    "whoami": [
+        Scenario("whoami", "GET", "/api/v1/whoami"),
+    ],
+    "guesthouse": [
+        Scenario("visits_get", "GET", "/api/v1/guestbook"),
+        Scenario("visits_get_10", "GET", "/api/v1/guestbook?limit=10"),
+        Scenario("visit_get", "GET", "/api/v1/guestbook/1"),
+        Scenario("visitors_get", "GET", "/api/v1/guestbook/visitors"),
+        Scenario("visitor_get", "GET", "/api/v1/guestbook/visitors/1"),
+        Scenario("visitor_entries", "GET", "/api/v1/guestbook/visitors/1/visits"),
+        Scenario("visit_add", "POST", "/api/v1/guestbook", 201, VISIT_NEW),
+    ],
+}
+
+# Requests made before measuring, e.g. to populate databases
+SEEDS = {
+    "guesthouse": [Scenario("seed", "POST", "/api/v1/guestbook", 201, VISIT_NEW)] * 100,
+}
+
+
+def import_fresh(name, path=None):
+    """Imports a package, replacing any previously imported version of it and its modules
+
+    :param name: Package name
+    :param path: Package directory, if not on sys.path
+    :return: Package module
+    """
+
+    for module_name in list(sys.modules):
+        if module_name == name or module_name.startswith(f"{name}."):
+            del sys.modules[module_name]
+
+    if path is None:
+        return importlib.import_module(name)
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(path, "__init__.py"), submodule_search_locations=[path])
+    module = sys.modules[name] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def load_units(profile_name):
+    """Imports the Units of a template profile
+
+    Units are imported from the template directory as top-level packages: the template app packages
+    themselves load `app.toml` from the working directory, and import Units not available here.
+    """
+
+    # Stand-ins for aioli_rdbms, using SQLite, and geolite2
+    if STANDINS_DIR not in sys.path:
+        sys.path.insert(0, STANDINS_DIR)
+
+    units_dir = os.path.join(TEMPLATE_PROFILES[profile_name].abspath, "app", "units")
+    units = []
+
+    for name in PROFILE_UNITS[profile_name]:
+        path = os.path.join(units_dir, name)
+        units.append(import_fresh(name, path if os.path.isdir(path) else None))
+
+    return units
+
+
+def build_app(profile_name, core_config=None):
+    """Builds an Application with the Units and config of a template profile
+
+    :param profile_name: Name of a profile in TEMPLATE_PROFILES
+    :param core_config: Application config overrides, e.g. {"router": "radix"}
+    :return: Application with its Units loaded
+    """
+
+    reset_registries()
+    params = TEMPLATE_PROFILES[profile_name].params
+
+    config = dict(PROFILE_CONFIG.get(profile_name, {}))
+    config["aioli-core"] = dict(api_base=params.http_api, **(core_config or {}))
+
+    app = Application(units=load_units(profile_name), config=config)
+    app.load_units()
+
+    return app
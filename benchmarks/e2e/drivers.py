@@ -0,0 +1,189 @@
+import asyncio
+import multiprocessing
+import socket
+import sys
+import time
+
+from .apps import build_app
+
+
+class AsgiSession:
+    """Calls the Application directly, bypassing the network and HTTP parsing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, scenario):
+        path, _, query_string = scenario.path.partition("?")
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": scenario.method,
+            "scheme": "http",
+            "path": path,
+            "query_string": query_string.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("127.0.0.1", 80),
+        }
+        request_sent = False
+        status = None
+
+        async def receive():
+            nonlocal request_sent
+
+            if request_sent:
+                return {"type": "http.disconnect"}
+
+            request_sent = True
+            return {"type": "http.request", "body": scenario.body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await self.app(scope, receive, send)
+        return status
+
+    async def close(self):
+        pass
+
+
+class AsgiDriver:
+    """Drives an Application in-process, using the ASGI interface
+
+    :param profile_name: Template profile name
+    :param core_config: Application config overrides
+    """
+
+    name = "asgi"
+
+    def __init__(self, profile_name, core_config=None):
+        self.app = build_app(profile_name, core_config)
+        self._lifespan = None
+        self._events = asyncio.Queue()
+
+    async def start(self):
+        started = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            return await self._events.get()
+
+        async def send(message):
+            if message["type"] == "lifespan.startup.complete" and not started.done():
+                started.set_result(None)
+            elif message["type"] == "lifespan.startup.failed" and not started.done():
+                started.set_exception(RuntimeError(message.get("message")))
+
+        self._lifespan = asyncio.ensure_future(self.app({"type": "lifespan"}, receive, send))
+        await self._events.put({"type": "lifespan.startup"})
+        await started
+
+    async def session(self):
+        return AsgiSession(self.app)
+
+    async def stop(self):
+        await self._events.put({"type": "lifespan.shutdown"})
+
+        # Results are in by now, don't discard them if shutdown fails
+        try:
+            await self._lifespan
+        except Exception as e:
+            print(f"Application shutdown failed: {e!r}", file=sys.stderr)
+
+
+class HttpSession:
+    """HTTP/1.1 keep-alive connection, making one request at a time"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, scenario):
+        head = (
+            f"{scenario.method} {scenario.path} HTTP/1.1\r\n"
+            f"host: {self.host}:{self.port}\r\n"
+            f"content-type: application/json\r\n"
+            f"content-length: {len(scenario.body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode() + scenario.body)
+
+        lines = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        headers = dict(line.lower().split(": ", 1) for line in lines[1:] if line)
+
+        if "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+
+                if not size:
+                    break
+
+        return status
+
+    async def close(self):
+        self.writer.close()
+
+
+def serve(profile_name, core_config, host, port):
+    import uvicorn
+
+    app = build_app(profile_name, core_config)
+    uvicorn.run(app, host=host, port=port, log_level="warning", access_log=False, lifespan="on")
+
+
+class UvicornDriver:
+    """Drives an Application served by a uvicorn worker process, over HTTP on localhost
+
+    :param profile_name: Template profile name
+    :param core_config: Application config overrides
+    :param port: Listen port
+    """
+
+    name = "uvicorn"
+    host = "127.0.0.1"
+
+    def __init__(self, profile_name, core_config=None, port=8765):
+        self.process = multiprocessing.Process(
+            target=serve,
+            args=(profile_name, core_config, self.host, port),
+            daemon=True,
+        )
+        self.port = port
+
+    async def start(self, timeout=30):
+        self.process.start()
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            if not self.process.is_alive():
+                raise RuntimeError(f"uvicorn worker exited with code {self.process.exitcode}")
+
+            try:
+                socket.create_connection((self.host, self.port), timeout=1).close()
+                return
+            except OSError:
+                await asyncio.sleep(0.1)
+
+        raise RuntimeError(f"uvicorn worker not listening on port {self.port} after {timeout}s")
+
+    async def session(self):
+        session = HttpSession(self.host, self.port)
+        await session.connect()
+
+        return session
+
+    async def stop(self):
+        self.process.terminate()
+        self.process.join()
+
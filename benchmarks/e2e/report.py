@@ -0,0 +1,113 @@
+import json
+import platform
+import subprocess
+import time
+
+METRICS = ["rps", "p50", "p95", "p99"]
+
+
+def percentile(values, q):
+    """Returns the value at quantile `q` of a sorted list, using the nearest-rank method"""
+
+    if not values:
+        return 0
+
+    return values[min(len(values) - 1, max(0, int(round(q * len(values))) - 1))]
+
+
+def summarize(latencies, elapsed, errors):
+    """Returns throughput and latency percentiles (ms) of a scenario run
+
+    :param latencies: List of request durations, in nanoseconds
+    :param elapsed: Run duration, in seconds
+    :param errors: Number of requests with an unexpected status
+    """
+
+    latencies = sorted(latencies)
+
+    return dict(
+        requests=len(latencies),
+        errors=errors,
+        rps=len(latencies) / elapsed if elapsed else 0,
+        p50=percentile(latencies, 0.5) / 1e6,
+        p95=percentile(latencies, 0.95) / 1e6,
+        p99=percentile(latencies, 0.99) / 1e6,
+    )
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_baseline(path, results, options):
+    """Writes results to a JSON baseline file, along with the environment they were recorded in"""
+
+    data = dict(
+        commit=get_commit(),
+        recorded=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        options=options,
+        results=results,
+    )
+
+    with open(path, "w") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(baseline, results, threshold):
+    """Returns regressions of results compared to a baseline
+
+    Throughput regresses when it drops, latencies when they rise, by more than `threshold`.
+
+    :param baseline: Loaded baseline
+    :param results: Dictionary of summaries, keyed by profile/driver/scenario
+    :param threshold: Relative change, e.g. 0.1 for 10%
+    :return: List of (key, metric, baseline value, value, relative change) tuples
+    """
+
+    regressions = []
+
+    for key, summary in results.items():
+        previous = baseline["results"].get(key)
+
+        if not previous:
+            continue
+
+        for metric in METRICS:
+            old, new = previous[metric], summary[metric]
+
+            if not old:
+                continue
+
+            change = (new - old) / old
+
+            if (metric == "rps" and change < -threshold) or (metric != "rps" and change > threshold):
+                regressions.append((key, metric, old, new, change))
+
+    return regressions
+
+
+def format_table(results, baseline=None):
+    lines = ["{0:<44} {1:>9} {2:>7} {3:>10} {4:>9} {5:>9} {6:>9}".format(
+        "scenario", "requests", "errors", "rps", "p50 (ms)", "p95 (ms)", "p99 (ms)"
+    )]
+
+    for key, summary in results.items():
+        line = "{0:<44} {requests:>9} {errors:>7} {rps:>10.1f} {p50:>9.3f} {p95:>9.3f} {p99:>9.3f}".format(key, **summary)
+        previous = baseline and baseline["results"].get(key)
+
+        if previous and previous["rps"]:
+            line += " {0:>+7.1%} rps".format((summary["rps"] - previous["rps"]) / previous["rps"])
+
+        lines.append(line)
+
+    return "\n".join(lines)
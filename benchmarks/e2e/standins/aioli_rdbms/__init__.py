@@ -0,0 +1,20 @@
+"""SQLite stand-in for the aioli_rdbms Unit, implementing the subset of its API used by the guesthouse template
+
+Queries run synchronously against an in-memory database, which keeps benchmarks free of network and
+database server noise. Statements are autocommitted; transactions don't provide isolation.
+"""
+
+from aioli import Unit
+
+from .config import ConfigSchema
+from .service import DatabaseService
+
+export = Unit(
+    services=[DatabaseService],
+    config=ConfigSchema,
+    meta={
+        "name": "aioli-rdbms",
+        "version": "0.0.0",
+        "description": "SQLite stand-in for aioli-rdbms",
+    }
+)
@@ -0,0 +1,12 @@
+from aioli.config import UnitConfigSchema, fields
+
+
+class ConfigSchema(UnitConfigSchema):
+    database = fields.String(missing=":memory:")
+
+    # Accepted for compatibility with aioli-rdbms configs, unused
+    type = fields.String()
+    username = fields.String()
+    password = fields.String()
+    host = fields.String()
+    port = fields.Integer()
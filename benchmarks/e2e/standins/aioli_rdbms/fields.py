@@ -0,0 +1,37 @@
+class Field:
+    sql_type = "TEXT"
+
+    def __init__(self, primary_key=False, index=False, max_length=None, allow_null=False, default=None):
+        self.primary_key = primary_key
+        self.index = index
+        self.default = default
+
+    def get_default(self):
+        return self.default() if callable(self.default) else self.default
+
+    def to_db(self, value):
+        return value
+
+
+class Integer(Field):
+    sql_type = "INTEGER"
+
+
+class String(Field):
+    pass
+
+
+class DateTime(Field):
+    def to_db(self, value):
+        return value.isoformat() if value is not None else None
+
+
+class ForeignKey(Field):
+    sql_type = "INTEGER"
+
+    def __init__(self, model, **kwargs):
+        super(ForeignKey, self).__init__(**kwargs)
+        self.model = model
+
+    def to_db(self, value):
+        return getattr(value, "id", value)
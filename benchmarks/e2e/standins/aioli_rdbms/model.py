@@ -0,0 +1,11 @@
+from . import fields
+
+
+class ModelMeta(type):
+    def __init__(cls, name, bases, attrs):
+        super(ModelMeta, cls).__init__(name, bases, attrs)
+        cls.__fields__ = {k: v for k, v in attrs.items() if isinstance(v, fields.Field)}
+
+
+class Model(metaclass=ModelMeta):
+    __tablename__ = None
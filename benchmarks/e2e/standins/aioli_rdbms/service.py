@@ -0,0 +1,154 @@
+import sqlite3
+
+from contextlib import asynccontextmanager
+
+from aioli.service import BaseService
+from aioli.exceptions import NoMatchFound
+
+OPERATORS = ["exact", "iexact"]
+
+
+class Record:
+    """Row of a Model, with related rows loaded as Records"""
+
+    def __init__(self, manager, values):
+        self._manager = manager
+        self.__dict__.update(values)
+
+    async def delete(self):
+        self._manager.execute(f"DELETE FROM {self._manager.table} WHERE id = ?", [self.id])
+
+
+class Database:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class ModelManager:
+    """Queries the table of a Model
+
+    :param manager: DatabaseService instance
+    :param model: Model class
+    """
+
+    def __init__(self, manager, model):
+        self.manager = manager
+        self.model = model
+        self.table = model.__tablename__
+        self.fields = model.__fields__
+
+        columns = ", ".join(
+            f"{name} {field.sql_type}" + (" PRIMARY KEY" if field.primary_key else "")
+            for name, field in self.fields.items()
+        )
+        self.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({columns})")
+
+        for name, field in self.fields.items():
+            if field.index:
+                self.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_{name} ON {self.table} ({name})")
+
+    def execute(self, sql, params=()):
+        return self.manager.database.connection.execute(sql, params)
+
+    def _where(self, filters):
+        clauses, params = [], []
+
+        for key, value in filters.items():
+            parts = key.split("__")
+            operator = parts.pop() if len(parts) > 1 and parts[-1] in OPERATORS else "exact"
+            name = "id" if parts[0] == "pk" else parts[0]
+            field = self.fields[name]
+
+            if len(parts) > 1:
+                related = self.manager.use_model(field.model)
+                sql, related_params = related._where({"__".join(parts[1:] + [operator]): value})
+                clauses.append(f"{name} IN (SELECT id FROM {related.table} WHERE {sql})")
+                params.extend(related_params)
+            else:
+                clauses.append(f"{name} = ?" + (" COLLATE NOCASE" if operator == "iexact" else ""))
+                params.append(field.to_db(value))
+
+        return " AND ".join(clauses) or "1", params
+
+    def _to_record(self, row):
+        values = dict(row)
+
+        for name, field in self.fields.items():
+            if hasattr(field, "model") and values[name] is not None:
+                values[name] = self.manager.use_model(field.model)._get(id=values[name])
+
+        return Record(self, values)
+
+    def _get(self, **filters):
+        sql, params = self._where(filters)
+        row = self.execute(f"SELECT * FROM {self.table} WHERE {sql} LIMIT 1", params).fetchone()
+
+        if row is None:
+            raise NoMatchFound
+
+        return self._to_record(row)
+
+    async def get_one(self, **filters):
+        return self._get(**filters)
+
+    async def get_many(self, limit=100, offset=0, sort="", query="", **filters):
+        sql, params = self._where(filters)
+        order = "id"
+
+        if sort.lstrip("-") in self.fields:
+            order = sort.lstrip("-") + (" DESC" if sort.startswith("-") else "")
+
+        rows = self.execute(
+            f"SELECT * FROM {self.table} WHERE {sql} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+
+        return [self._to_record(row) for row in rows]
+
+    async def count(self, **filters):
+        sql, params = self._where(filters)
+        return self.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {sql}", params).fetchone()[0]
+
+    async def create(self, **values):
+        for name, field in self.fields.items():
+            if name not in values and field.default is not None:
+                values[name] = field.get_default()
+
+        columns = [name for name in values if name in self.fields]
+        cursor = self.execute(
+            f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [self.fields[name].to_db(values[name]) for name in columns]
+        )
+
+        return self._get(id=cursor.lastrowid)
+
+    async def update(self, record, payload):
+        columns = [name for name in payload if name in self.fields and name != "id"]
+
+        if columns:
+            self.execute(
+                f"UPDATE {self.table} SET {', '.join(f'{name} = ?' for name in columns)} WHERE id = ?",
+                [self.fields[name].to_db(payload[name]) for name in columns] + [record.id]
+            )
+
+        return self._get(id=record.id)
+
+
+class DatabaseService(BaseService):
+    """Provides ModelManagers backed by a shared SQLite database"""
+
+    def __init__(self, *args, **kwargs):
+        super(DatabaseService, self).__init__(*args, **kwargs)
+        self.database = Database(self.config["database"])
+        self.managers = {}
+
+    def use_model(self, model):
+        if model not in self.managers:
+            self.managers[model] = ModelManager(self, model)
+
+        return self.managers[model]
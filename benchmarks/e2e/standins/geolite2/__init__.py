@@ -0,0 +1,14 @@
+"""Stand-in for the geolite2 package, without the GeoLite2 database: lookups find nothing"""
+
+
+class Reader:
+    def get(self, ip_addr):
+        return None
+
+
+class GeoLite2:
+    def reader(self):
+        return Reader()
+
+
+geolite2 = GeoLite2()
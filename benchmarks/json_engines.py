@@ -0,0 +1,58 @@
+import datetime
+import timeit
+
+from aioli.engines import JSON_ENGINES
+from aioli.exceptions import BootstrapError
+
+
+def get_payloads():
+    visitor = dict(id=1, name="Visitor Name", location="Gothenburg, Sweden", ip_addr="127.0.0.1")
+    visit = dict(
+        id=1,
+        visitor=visitor,
+        visited_on=datetime.datetime(2019, 1, 1).isoformat(),
+        message="Hello world, ÅÄÖ",
+    )
+
+    return {
+        "error": {"message": "Not found"},
+        "visit": visit,
+        "visits_100": [dict(visit, id=idx) for idx in range(100)],
+        "visits_1000": [dict(visit, id=idx) for idx in range(1000)],
+    }
+
+
+def measure(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def run():
+    payloads = get_payloads()
+    rows = []
+
+    for name, engine_cls in JSON_ENGINES.items():
+        try:
+            engine = engine_cls()
+        except BootstrapError:
+            print(f"Skipping {name}: not installed")
+            continue
+
+        for payload_name, payload in payloads.items():
+            encoded = engine.dumps(payload)
+            number = max(10, 100000 // len(encoded))
+            rows.append((
+                name,
+                payload_name,
+                len(encoded),
+                measure(lambda: engine.dumps(payload), number),
+                measure(lambda: engine.loads(encoded), number),
+            ))
+
+    print(f"{'engine':<8} {'payload':<12} {'bytes':>8} {'dumps (us)':>12} {'loads (us)':>12}")
+
+    for row in rows:
+        print("{0:<8} {1:<12} {2:>8} {3:>12.2f} {4:>12.2f}".format(*row))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,9 @@
+"""Micro-benchmarks of code run per request
+
+Run using `python -m pytest benchmarks/micro` from the repository root. Options:
+
+- `--bench-save PATH`: save results as a JSON baseline
+- `--bench-baseline PATH`: compare results to a baseline, failing the run on regressions
+- `--bench-threshold`: relative slowdown flagged as a regression, default 0.25
+- `--bench-time`: seconds spent timing each repeat, default 0.05
+"""
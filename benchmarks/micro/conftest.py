@@ -0,0 +1,195 @@
+import asyncio
+import gc
+import inspect
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import pytest
+
+from aioli import Application, Unit
+from aioli.component import ComponentMeta
+from aioli.registry import reset_registries
+
+from benchmarks.e2e.report import get_commit
+
+REPEAT = 7
+
+results = {}
+
+
+class Bench:
+    """Times calls to a function, reporting nanoseconds and peak allocated bytes per call
+
+    Calls are made in batches sized to take at least `min_time` seconds, with the garbage collector
+    disabled. The fastest of `REPEAT` batches is reported, along with the median. Coroutine functions
+    are awaited in a single event loop.
+
+    :param name: Result name
+    :param min_time: Seconds per batch
+    """
+
+    def __init__(self, name, min_time):
+        self.name = name
+        self.min_time = min_time
+        self.loop = asyncio.new_event_loop()
+
+    def _get_timer(self, func, args, kwargs):
+        if inspect.iscoroutinefunction(func):
+            async def batch(number):
+                started = time.perf_counter_ns()
+
+                for _ in range(number):
+                    await func(*args, **kwargs)
+
+                return time.perf_counter_ns() - started
+
+            return lambda number: self.loop.run_until_complete(batch(number))
+
+        def timer(number):
+            started = time.perf_counter_ns()
+
+            for _ in range(number):
+                func(*args, **kwargs)
+
+            return time.perf_counter_ns() - started
+
+        return timer
+
+    def _measure_allocations(self, timer):
+        # Tracing starts after a warm-up call, rather than using tracemalloc.reset_peak(), which requires Python 3.9
+        timer(1)
+        tracemalloc.start()
+
+        try:
+            current, _ = tracemalloc.get_traced_memory()
+            timer(1)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return peak - current
+
+    def __call__(self, func, *args, **kwargs):
+        timer = self._get_timer(func, args, kwargs)
+        number = 1
+
+        # Warm up, then find a batch size taking at least `min_time`
+        while timer(number) < self.min_time * 1e9:
+            number *= 2
+
+        gc.collect()
+        gc.disable()
+
+        try:
+            per_call = [timer(number) / number for _ in range(REPEAT)]
+        finally:
+            gc.enable()
+
+        results[self.name] = dict(
+            number=number,
+            min_ns=min(per_call),
+            median_ns=statistics.median(per_call),
+            peak_bytes=self._measure_allocations(timer),
+        )
+
+        return results[self.name]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("micro-benchmarks")
+    group.addoption("--bench-save", metavar="PATH", help="Save results as a JSON baseline")
+    group.addoption("--bench-baseline", metavar="PATH", help="Compare results to a JSON baseline")
+    group.addoption("--bench-threshold", type=float, default=0.25, help="Relative slowdown flagged as a regression")
+    group.addoption("--bench-time", type=float, default=0.05, help="Seconds spent timing each repeat")
+
+
+@pytest.fixture
+def bench(request):
+    bench = Bench(request.node.name, request.config.getoption("bench_time"))
+    yield bench
+    bench.loop.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_registries():
+    yield
+    reset_registries()
+
+
+@pytest.fixture
+def load_controller():
+    """Returns a function registering a Controller class with a new Application, returning the Controller"""
+
+    def _loaded(controller_cls, **app_config):
+        unit = Unit(meta=dict(name="bench", version="0.1.0"), controllers=[controller_cls])
+        app = Application(units=[unit], config={"aioli-core": app_config})
+        app.load_units()
+
+        return ComponentMeta._instances[controller_cls]
+
+    return _loaded
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def get_regressions(baseline, threshold):
+    regressions = []
+
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+
+        if previous and (result["min_ns"] - previous["min_ns"]) / previous["min_ns"] > threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not results:
+        return
+
+    path = config.getoption("bench_baseline")
+    baseline = load_baseline(path) if path else {"results": {}}
+
+    terminalreporter.section("micro-benchmarks")
+    terminalreporter.write_line("{0:<48} {1:>12} {2:>12} {3:>12} {4:>10}".format(
+        "benchmark", "min (ns)", "median (ns)", "peak (B)", "change"
+    ))
+
+    for name, result in sorted(results.items()):
+        previous = baseline["results"].get(name)
+        change = "{0:+.1%}".format(result["min_ns"] / previous["min_ns"] - 1) if previous else ""
+        terminalreporter.write_line("{0:<48} {min_ns:>12.0f} {median_ns:>12.0f} {peak_bytes:>12} {1:>10}".format(
+            name, change, **result
+        ))
+
+    if path:
+        regressions = get_regressions(baseline, config.getoption("bench_threshold"))
+        terminalreporter.write_line(f"\n{len(regressions)} regressions compared to {path}: {', '.join(regressions)}")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+
+    if config.getoption("bench_save") and results:
+        with open(config.getoption("bench_save"), "w") as fh:
+            json.dump(dict(
+                commit=get_commit(),
+                recorded=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                python=platform.python_version(),
+                platform=platform.platform(),
+                results=results,
+            ), fh, indent=2, sort_keys=True)
+
+    if config.getoption("bench_baseline") and results:
+        baseline = load_baseline(config.getoption("bench_baseline"))
+        regressions = get_regressions(baseline, config.getoption("bench_threshold"))
+
+        if regressions and exitstatus == 0:
+            session.exitstatus = 1
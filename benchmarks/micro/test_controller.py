@@ -0,0 +1,109 @@
+import pytest
+
+from starlette.requests import Request
+
+from aioli.controller import BaseHttpController, Method, route, takes, returns
+from aioli.controller.registry import get_handler
+from aioli.controller.schemas import Schema, HttpHeader, fields
+
+THING = dict(id=1, name="Thing name", tags=["one", "two", "three"])
+THING_JSON = b'{"name": "Thing name", "tags": ["one", "two", "three"]}'
+
+
+class Thing(Schema):
+    id = fields.Integer(dump_only=True)
+    name = fields.String(required=True)
+    tags = fields.List(fields.String())
+
+
+class ThingPath(Schema):
+    thing_id = fields.Integer()
+
+
+class ThingQuery(Schema):
+    limit = fields.Integer(missing=100)
+    offset = fields.Integer(missing=0)
+    sort = fields.String(missing="")
+
+
+class HttpController(BaseHttpController):
+    @route("/path/{thing_id}", Method.GET)
+    @takes(path=ThingPath)
+    @returns()
+    async def takes_path(self, thing_id):
+        return {}
+
+    @route("/query", Method.GET)
+    @takes(query=ThingQuery)
+    @returns()
+    async def takes_query(self, query):
+        return {}
+
+    @route("/body", Method.POST)
+    @takes(body=Thing)
+    @returns()
+    async def takes_body(self, body):
+        return {}
+
+    @route("/header", Method.GET)
+    @takes(header=HttpHeader)
+    @returns()
+    async def takes_header(self, header):
+        return {}
+
+    @route("/returns", Method.GET)
+    @returns()
+    async def returns_no_schema(self, request):
+        return THING
+
+    @route("/returns-schema", Method.GET)
+    @returns(Thing)
+    async def returns_schema(self, request):
+        return THING
+
+    @route("/returns-many", Method.GET)
+    @returns(Thing, many=True)
+    async def returns_many(self, request):
+        return [THING] * 100
+
+
+REQUESTS = {
+    "takes_path": dict(path_params={"thing_id": "1"}),
+    "takes_query": dict(query_string=b"limit=10&offset=20&sort=name"),
+    "takes_body": dict(method="POST", body=THING_JSON),
+    "takes_header": dict(headers=[(b"host", b"localhost"), (b"user-agent", b"bench")]),
+    "returns_no_schema": {},
+    "returns_schema": {},
+    "returns_many": {},
+}
+
+
+def get_endpoint_caller(endpoint, method="GET", path_params=None, query_string=b"", headers=None, body=b""):
+    """Returns a function calling a compiled route endpoint with a new Request"""
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "path_params": path_params or {},
+        "query_string": query_string,
+        "headers": headers or [],
+    }
+    message = {"type": "http.request", "body": body, "more_body": False}
+
+    async def receive():
+        return message
+
+    async def call():
+        return await endpoint(Request(scope, receive))
+
+    return call
+
+
+@pytest.mark.parametrize("name", list(REQUESTS))
+def test_handler(bench, load_controller, name):
+    load_controller(HttpController)
+    call = get_endpoint_caller(get_handler(getattr(HttpController, name)).endpoint, **REQUESTS[name])
+
+    assert bench.loop.run_until_complete(call()).status_code == 200
+    bench(call)
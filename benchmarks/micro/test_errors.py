@@ -0,0 +1,20 @@
+from json.decoder import JSONDecodeError
+
+import pytest
+
+from marshmallow import ValidationError
+
+from aioli import errors
+from aioli.exceptions import AioliException
+
+EXCEPTIONS = {
+    "http_error": AioliException(status=404, message="Thing not found"),
+    "validation_error": ValidationError({"name": ["Missing data for required field."]}),
+    "decode_error": JSONDecodeError("Expecting value", "{", 1),
+    "server_error": RuntimeError("Failure"),
+}
+
+
+@pytest.mark.parametrize("name", list(EXCEPTIONS))
+def test_error_handler(bench, name):
+    bench(getattr(errors, name), None, EXCEPTIONS[name])
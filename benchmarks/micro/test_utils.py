@@ -0,0 +1,41 @@
+import pytest
+
+from aioli.config import ApplicationConfigSchema
+from aioli.datastores import MemoryStore
+from aioli.utils import jsonify, format_path
+
+THING = dict(id=1, name="Thing name", tags=["one", "two", "three"])
+
+
+@pytest.mark.parametrize("count", [1, 100])
+def test_jsonify(bench, count):
+    bench(jsonify, [THING] * count)
+
+
+def test_format_path(bench):
+    bench(format_path, "/api", "unit", "/things/{thing_id}")
+
+
+@pytest.mark.parametrize("environ", [False, True])
+def test_format_data(bench, monkeypatch, environ):
+    if environ:
+        monkeypatch.setenv("AIOLI_CORE_DEBUG", "true")
+        monkeypatch.setenv("AIOLI_CORE_DEV_PORT", "5001")
+
+    schema = ApplicationConfigSchema()
+    data = schema.load({})
+
+    bench(schema.format_data, data)
+
+
+def test_memory_store_get(bench):
+    store = MemoryStore("bench")
+    store["key"] = THING
+
+    bench(store.__getitem__, "key")
+
+
+def test_memory_store_set(bench):
+    store = MemoryStore("bench")
+
+    bench(store.__setitem__, "key", THING)
@@ -0,0 +1,56 @@
+import timeit
+
+from starlette.routing import Router, Match
+
+from aioli.router import RadixRouter
+
+
+async def endpoint(request):
+    pass  # pragma: no cover
+
+
+def make_routes(router, count):
+    # Spread routes across units, as mounted under api_base
+    for idx in range(count):
+        unit, resource = divmod(idx, 10)
+        router.add_route(f"/api/unit-{unit}/resource-{resource}/{{item_id:int}}", endpoint, ["GET"])
+
+    return router
+
+
+def linear_match(router, scope):
+    for route in router.routes:
+        match, child_scope = route.matches(scope)
+
+        if match is Match.FULL:
+            return route, child_scope
+
+
+def measure(func, number=20000):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def run():
+    print(f"{'routes':>8} {'position':<10} {'linear (us)':>12} {'radix (us)':>12}")
+
+    for count in [10, 100, 1000]:
+        linear = make_routes(Router(), count)
+        radix = make_routes(RadixRouter(), count)
+        radix.compile()
+
+        positions = {"first": 0, "middle": count // 2, "last": count - 1}
+
+        for position, idx in positions.items():
+            unit, resource = divmod(idx, 10)
+            scope = {"type": "http", "method": "GET", "path": f"/api/unit-{unit}/resource-{resource}/1"}
+
+            print("{0:>8} {1:<10} {2:>12.2f} {3:>12.2f}".format(
+                count,
+                position,
+                measure(lambda: linear_match(linear, scope)),
+                measure(lambda: radix.match(scope)),
+            ))
+
+
+if __name__ == "__main__":
+    run()
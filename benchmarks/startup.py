@@ -0,0 +1,56 @@
+import argparse
+import logging
+import time
+
+from aioli import Application, Unit
+from aioli.controller import BaseHttpController, Method, route, returns
+
+
+def make_controller(unit_idx, routes):
+    namespace = {}
+
+    for idx in range(routes):
+        async def handler(self, request):
+            return {}
+
+        handler.__name__ = f"route_{idx}"
+        handler.__qualname__ = f"Controller{unit_idx}.route_{idx}"
+        namespace[handler.__name__] = route(f"/r{idx}/{{item_id}}", Method.GET, "Route")(returns()(handler))
+
+    return type(f"Controller{unit_idx}", (BaseHttpController,), namespace)
+
+
+def make_units(count, routes):
+    return [
+        Unit(
+            meta=dict(name=f"unit-{idx}", version="0.1.0", description="Benchmark unit"),
+            controllers=[make_controller(idx, routes)],
+        )
+        for idx in range(count)
+    ]
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Measures time spent defining and registering units")
+    parser.add_argument("--units", type=int, default=1000)
+    parser.add_argument("--routes", type=int, default=20)
+    args = parser.parse_args()
+
+    # Route registration logs one line per route
+    logging.disable(logging.INFO)
+
+    started = time.perf_counter()
+    units = make_units(args.units, args.routes)
+    defined = time.perf_counter()
+
+    app = Application(units=units)
+    app.load_units()
+    registered = time.perf_counter()
+
+    print(f"{args.units} units, {args.units * args.routes} routes, {len(app.routes)} registered")
+    print(f"{'define (ms)':<16} {(defined - started) * 1e3:>10.1f}")
+    print(f"{'register (ms)':<16} {(registered - defined) * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    run()
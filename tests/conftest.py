@@ -1,6 +1,15 @@
 import pytest
 
 from aioli import Unit, Application
+from aioli.registry import reset_registries
+
+
+@pytest.fixture(autouse=True)
+def clean_registries():
+    """Components and imports are registered process-wide; start each test from a clean slate"""
+
+    yield
+    reset_registries()
 
 
 @pytest.fixture
@@ -36,13 +45,16 @@ def get_app():
 
 @pytest.fixture
 def unit(get_app, get_unit, logger):
-    def _loaded(*args, conf_path=None, **kwargs):
+    def _loaded(*args, conf_path=None, app_config=None, **kwargs):
         export = get_unit(*args, **kwargs)
         config = {}
 
         if conf_path:
             config = {export._meta["name"]: dict(path=conf_path)}
 
+        if app_config:
+            config["aioli-core"] = app_config
+
         app = get_app([export], config=config)
         app.load_units()
 
@@ -55,3 +67,65 @@ def unit(get_app, get_unit, logger):
 def logger():
     import logging
     return logging.getLogger("aioli-test")
+
+
+class AsgiResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        import json
+        return json.loads(self.body)
+
+
+async def asgi_call(app, method, path, query_string=b"", headers=None, body=b""):
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": query_string,
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+    }
+    messages = []
+    parts = body if isinstance(body, list) else [body]
+    chunks = [
+        {"type": "http.request", "body": part, "more_body": idx < len(parts) - 1}
+        for idx, part in enumerate(parts)
+    ]
+
+    async def receive():
+        return chunks.pop(0) if chunks else {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+
+    start = messages[0]
+    return AsgiResponse(
+        status=start["status"],
+        headers={k.decode(): v.decode() for k, v in start["headers"]},
+        body=b"".join(m.get("body", b"") for m in messages[1:]),
+    )
+
+
+@pytest.fixture
+def acall():
+    return asgi_call
+
+
+@pytest.fixture
+def call():
+    import asyncio
+
+    def _call(*args, **kwargs):
+        return asyncio.run(asgi_call(*args, **kwargs))
+
+    return _call
@@ -0,0 +1,91 @@
+import json
+
+from starlette.responses import JSONResponse
+
+from aioli.controller import BaseHttpController, Method, route, takes, returns
+from aioli.controller.schemas import Schema, fields
+
+
+class Thing(Schema):
+    thing_id = fields.Integer()
+    name = fields.String(required=True)
+
+
+class ThingPath(Schema):
+    thing_id = fields.Integer()
+
+
+class ThingQuery(Schema):
+    name = fields.String(missing="thing")
+
+
+class HttpController(BaseHttpController):
+    @route("/{thing_id}", Method.GET, "Thing details")
+    @takes(path=ThingPath, query=ThingQuery)
+    @returns(Thing)
+    async def thing_get(self, thing_id, query):
+        return dict(thing_id=thing_id, **query)
+
+    @route("/", Method.POST, "Create thing")
+    @takes(body=Thing)
+    @returns(Thing, status=201)
+    async def thing_add(self, body):
+        return body
+
+    @route("/", Method.GET, "List things")
+    @returns(Thing, many=True, stream=True)
+    async def things_get(self, request):
+        return [dict(thing_id=1, name="a"), dict(thing_id=2, name="b")]
+
+    @route("/missing", Method.DELETE, "Delete missing thing")
+    @returns()
+    async def thing_missing(self, request):
+        raise KeyError("missing")
+
+
+def test_batch(unit, call):
+    app = unit(controllers=[HttpController], name="things", app_config=dict(batch=True)).app
+    operations = [
+        dict(path="/api/things/1", query=dict(name="first")),
+        dict(method="POST", path="/api/things", body=dict(thing_id=2, name="second")),
+        dict(path="/api/things"),
+        dict(method="POST", path="/api/things", body={}),
+        dict(method="DELETE", path="/api/things/1"),
+        dict(path="/api/unknown"),
+    ]
+
+    rv = call(app, "POST", "/api/batch", body=json.dumps(operations).encode())
+    assert rv.status == 200
+    assert rv.json() == [
+        dict(status=200, body=dict(thing_id=1, name="first")),
+        dict(status=201, body=dict(thing_id=2, name="second")),
+        dict(status=200, body=[dict(thing_id=1, name="a"), dict(thing_id=2, name="b")]),
+        dict(status=422, body=dict(message=dict(name=["Missing data for required field."]))),
+        dict(status=405, body=dict(message="Method Not Allowed")),
+        dict(status=404, body=dict(message="Not Found")),
+    ]
+
+
+def test_batch_limits(unit, call):
+    config = dict(batch=True, batch_max_operations=2)
+    app = unit(controllers=[HttpController], name="things", app_config=config).app
+
+    assert call(app, "POST", "/api/batch", body=json.dumps([dict(path="/")] * 3).encode()).status == 413
+    assert call(app, "POST", "/api/batch", body=json.dumps([dict(method="GET")]).encode()).status == 422
+    assert call(app, "POST", "/api/batch", body=b"{").status == 400
+
+
+def test_batch_exception_handlers(unit, call):
+    app = unit(controllers=[HttpController], name="things", app_config=dict(batch=True)).app
+
+    async def lookup_error(request, exc):
+        return JSONResponse(dict(message="Gone"), status_code=410)
+
+    # Handlers are resolved by the exception's class hierarchy, as for regular requests
+    app.add_exception_handler(LookupError, lookup_error)
+    operations = [dict(method="DELETE", path="/api/things/missing")]
+
+    assert call(app, "DELETE", "/api/things/missing").status == 410
+    assert call(app, "POST", "/api/batch", body=json.dumps(operations).encode()).json() == [
+        dict(status=410, body=dict(message="Gone")),
+    ]
@@ -0,0 +1,48 @@
+import gzip
+
+import pytest
+
+from aioli.compression import Compressor, Encoder, parse_accept_encoding
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.5, *;q=0") == {"gzip": 1.0, "br": 0.5, "*": 0.0}
+    assert parse_accept_encoding("GZIP;q=invalid") == {"gzip": 0.0}
+
+
+def test_negotiate():
+    compressor = Compressor(["gzip"])
+
+    assert compressor.negotiate("gzip, deflate") == "gzip"
+    assert compressor.negotiate("*") == "gzip"
+    assert compressor.negotiate("gzip;q=0") is None
+    assert compressor.negotiate("deflate") is None
+    assert compressor.negotiate(None) is None
+
+
+def test_select_minimum_size():
+    compressor = Compressor(["gzip"], minimum_size=100)
+    headers = {"accept-encoding": "gzip"}
+
+    assert compressor.select(headers, 99) is None
+    assert compressor.select(headers, 100) == "gzip"
+
+
+def test_stream():
+    compress, finish = Compressor(["gzip"]).stream("gzip")
+    chunks = [compress(b"[1, 2, "), compress(b"3]"), finish()]
+
+    # Chunks are flushed as they're written
+    assert chunks[0]
+    assert gzip.decompress(b"".join(chunks)) == b"[1, 2, 3]"
+
+
+def test_encoder_incomplete():
+    class IncompleteEncoder(Encoder):
+        name = "incomplete"
+
+        def compress(self, data, static=False):
+            return data
+
+    with pytest.raises(TypeError):
+        IncompleteEncoder()
@@ -0,0 +1,256 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from aioli.concurrency import SingleFlight, ConcurrencyLimiter, BlockingPool, ProcessPool
+from aioli.controller import BaseHttpController, Method, route, returns
+from aioli.exceptions import ServiceUnavailable
+from aioli.metrics import parse_samples
+from aioli.service import BaseService
+
+
+def test_single_flight_shared():
+    flight = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def run():
+        results = await asyncio.gather(*[flight.run("key", work, idx) for idx in range(5)])
+        assert flight.in_flight == 0
+        return results
+
+    assert asyncio.run(run()) == [0] * 5
+    assert calls == [0]
+
+
+def test_single_flight_exception():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def run():
+        return await asyncio.gather(*[flight.run("key", fail) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(rv, ValueError) for rv in asyncio.run(run()))
+
+
+def test_single_flight_leader_cancelled():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        return await follower
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_limiter_queue_and_shed():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1)
+    order = []
+
+    async def work(idx):
+        await limiter.acquire()
+
+        try:
+            order.append(idx)
+            await asyncio.sleep(0.01)
+        finally:
+            limiter.release()
+
+    async def run():
+        results = await asyncio.gather(*[work(idx) for idx in range(3)], return_exceptions=True)
+        assert limiter.stats == dict(active=0, queued=0, admitted=2, shed=1)
+        return results
+
+    results = asyncio.run(run())
+
+    assert order == [0, 1]
+    assert isinstance(results[2], ServiceUnavailable)
+    assert results[2].headers == {"Retry-After": "1"}
+
+
+def test_limiter_cancelled_waiter():
+    limiter = ConcurrencyLimiter(max_concurrency=1)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert limiter.queued == 0
+
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(run())
+
+
+class LimitedController(BaseHttpController):
+    release = None
+
+    @route("/", Method.GET, "Limited", max_concurrency=1, max_queue=1)
+    @returns()
+    async def limited(self, request):
+        await self.release.wait()
+        return {}
+
+    @route("/unlimited", Method.GET, "Unit limited")
+    @returns()
+    async def unlimited(self, request):
+        await self.release.wait()
+        return {}
+
+
+def test_handler_limits(unit, acall):
+    app = unit(controllers=[LimitedController], name="limited", app_config=dict(metrics=True)).app
+
+    async def run():
+        LimitedController.release = asyncio.Event()
+        requests = [asyncio.ensure_future(acall(app, "GET", "/api/limited")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        LimitedController.release.set()
+        return await asyncio.gather(*requests)
+
+    first, second, third = asyncio.run(run())
+
+    assert first.status == second.status == 200
+    assert third.status == 503
+    assert third.headers["retry-after"] == "1"
+    assert app.registry.imported[0].limiter is None
+
+    rv = asyncio.run(acall(app, "GET", "/metrics"))
+    samples = {(name, labels.get("handler")): value for name, labels, value in parse_samples(rv.body.decode())}
+    assert samples[("aioli_limiter_shed_total", "LimitedController.limited")] == 1
+    assert samples[("aioli_limiter_admitted_total", "LimitedController.limited")] == 2
+
+
+def test_unit_limits(get_unit, get_app, acall):
+    export = get_unit(controllers=[LimitedController], name="limited")
+    app = get_app([export], config={"limited": dict(max_concurrency=2, max_queue=0)})
+    app.load_units()
+
+    async def run():
+        LimitedController.release = asyncio.Event()
+        requests = [asyncio.ensure_future(acall(app, "GET", "/api/limited/unlimited")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        LimitedController.release.set()
+        return [rv.status for rv in await asyncio.gather(*requests)]
+
+    assert asyncio.run(run()) == [200, 200, 503]
+    assert export.limiter.stats == dict(active=0, queued=0, admitted=2, shed=1)
+
+
+def test_blocking_pool_queue():
+    pool = BlockingPool("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        calls = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert pool.stats == dict(active=1, queued=1, completed=0, rejected=1)
+
+        # The waiting call is dropped when cancelled, rather than left to run
+        calls[1].cancel()
+        await asyncio.sleep(0)
+        assert pool.queued == 0
+
+        release.set()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    first, second, third = asyncio.run(run())
+    pool.shutdown()
+
+    assert first is True
+    assert isinstance(second, asyncio.CancelledError)
+    assert isinstance(third, ServiceUnavailable)
+    assert pool.stats == dict(active=0, queued=0, completed=1, rejected=1)
+    assert pool.wait_time.count == 1
+
+
+def test_blocking_pool_shutdown():
+    pool = BlockingPool("test", max_workers=1)
+    release = threading.Event()
+
+    async def run():
+        calls = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        # Waiting calls are dropped, while running ones complete
+        pool.shutdown()
+        release.set()
+
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    first, second = asyncio.run(run())
+
+    assert first is True
+    assert isinstance(second, asyncio.CancelledError)
+    assert pool.stats == dict(active=0, queued=0, completed=1, rejected=0)
+
+
+def test_process_pool_shutdown():
+    pool = ProcessPool(max_workers=1)
+
+    async def run():
+        await pool.start()
+
+        # Calls are handed to workers ahead of time, one more than there are workers
+        calls = [asyncio.ensure_future(pool.run(time.sleep, 0.05)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        await pool.shutdown()
+
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert results[0] is None
+    assert isinstance(results[-1], asyncio.CancelledError)
+    assert pool.stats["in_flight"] == 0
+
+
+class BlockingService(BaseService):
+    async def thread_name(self):
+        return await self.run_blocking(lambda: threading.current_thread().name)
+
+
+def test_run_blocking(get_unit, get_app):
+    export = get_unit(services=[BlockingService], name="blocking")
+    app = get_app([export], config={"blocking": dict(executor_workers=2), "aioli-core": dict(metrics=True)})
+    app.load_units()
+
+    assert asyncio.run(BlockingService(export).thread_name()).startswith("aioli-blocking")
+    assert export.executor.max_workers == 2
+
+    samples = {name: value for name, labels, value in parse_samples(app.metrics.render()) if not labels.get("quantile")}
+    assert samples["aioli_executor_completed_total"] == 1
+    assert samples["aioli_executor_wait_seconds_count"] == 1
+
+    asyncio.run(app.registry.call_shutdown_handlers())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(BlockingService(export).thread_name())
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+
+from aioli import context
+from aioli.controller import BaseHttpController, Method, route, returns
+from aioli.exceptions import GatewayTimeout
+from aioli.metrics import parse_samples
+from aioli.service import BaseService
+
+RESULTS = {}
+
+
+class SlowService(BaseService):
+    async def wait(self, seconds):
+        RESULTS["budget"] = self.budget(10)
+        await asyncio.sleep(seconds)
+        RESULTS["finished"] = True
+
+
+class HttpController(BaseHttpController):
+    def __init__(self, unit):
+        super(HttpController, self).__init__(unit)
+        self.slow = SlowService(unit)
+
+    @route("/fast", Method.GET, "Fast")
+    @returns()
+    async def fast(self, request):
+        return {"remaining": context.remaining() is not None}
+
+    @route("/slow", Method.GET, "Slow")
+    @returns()
+    async def slow_get(self, request):
+        await self.slow.wait(0.2)
+        return {}
+
+    @route("/patient", Method.GET, "Patient", timeout=0.5)
+    @returns()
+    async def patient(self, request):
+        await self.slow.wait(0.1)
+        return {}
+
+    @route("/stream", Method.GET, "Stream", max_concurrency=1)
+    @returns(stream=True)
+    async def stream(self, request):
+        yield {"remaining": context.remaining() is not None}
+        RESULTS["active"] = self.unit.handler_limiters["HttpController.stream"].active
+        await self.slow.wait(0.2)
+        yield {}
+
+
+@pytest.fixture
+def app(get_app, get_unit):
+    RESULTS.clear()
+    unit = get_unit(controllers=[HttpController], name="things")
+    app = get_app([unit], config={"aioli-core": dict(metrics=True), "things": dict(timeout=0.05)})
+    app.load_units()
+
+    return app
+
+
+def test_budget():
+    assert context.budget() is None
+    assert context.budget(5) == 5
+
+    token = context.set_deadline(1)
+
+    try:
+        assert context.budget() <= 1
+        assert context.budget(0.5) == 0.5
+
+        # Nested deadlines keep the earlier one
+        inner = context.set_deadline(10)
+        assert context.remaining() <= 1
+        context.reset_deadline(inner)
+    finally:
+        context.reset_deadline(token)
+
+    assert context.get_deadline() is None
+
+
+def test_run_in_executor_deadline():
+    async def run():
+        token = context.set_deadline(1)
+
+        try:
+            assert await context.run_in_executor(None, context.remaining) > 0
+        finally:
+            context.reset_deadline(token)
+
+        context.set_deadline(0)
+
+        with pytest.raises(GatewayTimeout):
+            await context.run_in_executor(None, time.sleep, 1)
+
+    asyncio.run(run())
+
+
+def test_route_timeouts(app, call):
+    response = call(app, "GET", "/api/things/slow")
+    assert response.status == 504
+    assert 0 < RESULTS["budget"] <= 0.05
+    assert "finished" not in RESULTS
+
+    assert call(app, "GET", "/api/things/fast").json() == {"remaining": True}
+    assert call(app, "GET", "/api/things/patient").status == 200
+    assert RESULTS["finished"]
+
+
+def test_zero_timeout(get_app, get_unit, call):
+    # A timeout of 0 is a deadline that has already passed, not a missing one
+    RESULTS.clear()
+    unit = get_unit(controllers=[HttpController], name="things")
+    app = get_app([unit], config={"things": dict(timeout=0)})
+    app.load_units()
+
+    assert call(app, "GET", "/api/things/slow").status == 504
+    assert "finished" not in RESULTS
+
+
+def test_stream_timeout(app, acall):
+    # Streamed bodies are cancelled at the deadline, aborting responses whose headers were sent
+    with pytest.raises(RuntimeError, match="response already started"):
+        asyncio.run(acall(app, "GET", "/api/things/stream"))
+
+    assert 0 < RESULTS["budget"] <= 0.05
+    assert "finished" not in RESULTS
+
+    # The limiter slot is held, and the request counted in flight, until the body ends
+    assert RESULTS["active"] == 1
+    assert app.registry.imported[0].handler_limiters["HttpController.stream"].active == 0
+
+    samples = {
+        name: value for name, labels, value in parse_samples(app.metrics.render())
+        if labels.get("handler") == "stream"
+    }
+    assert (samples["aioli_requests_in_flight"], samples["aioli_request_errors_total"]) == (0, 1)
@@ -0,0 +1,449 @@
+import asyncio
+import gzip
+import json
+
+from datetime import datetime
+
+import pytest
+
+from aioli.controller import (
+    BaseHttpController, RequestProp, Method, StreamFormat, route, takes, returns, cached
+)
+from aioli.controller.body import JsonArrayParser
+from aioli.exceptions import BootstrapError
+from aioli.service import BaseService
+from aioli.controller.schemas import Schema, fields
+
+
+class ItemPath(Schema):
+    item_id = fields.Integer()
+
+
+class Item(Schema):
+    id = fields.Integer()
+    name = fields.String()
+
+
+class ItemNew(Schema):
+    name = fields.String(required=True)
+
+
+class ItemQuery(Schema):
+    name = fields.String(missing="")
+
+
+class ItemService(BaseService):
+    calls = 0
+
+    async def get_counted(self, name):
+        self.calls += 1
+        return dict(id=self.calls, name=name)
+
+
+class HttpController(BaseHttpController):
+    def __init__(self, unit):
+        super(HttpController, self).__init__(unit)
+        self.item = ItemService(unit)
+
+    @route("/coalesced", Method.GET, "Coalesced item", coalesce=True)
+    @returns(Item)
+    async def item_coalesced(self, request):
+        await asyncio.sleep(0.01)
+        return await self.item.get_counted(request.query_params.get("name"))
+
+    @route("/cached", Method.GET, "Cached item")
+    @takes(query=ItemQuery)
+    @cached(ttl=60, tags=["items"])
+    @returns(Item)
+    async def item_cached(self, query):
+        return await self.item.get_counted(query["name"])
+
+    @route("/", Method.GET, "List of items")
+    @takes(query=ItemPath)
+    @returns(Item, many=True)
+    async def items_get(self, query):
+        return [dict(id=i, name=f"item-{i}") for i in range(3)]
+
+    @route("/{item_id}", Method.GET, "Item details")
+    @takes(path=ItemPath, props=[RequestProp.client_addr])
+    @returns(Item)
+    async def item_get(self, item_id, client_addr):
+        return dict(id=item_id, name=client_addr)
+
+    @route("/", Method.POST, "Create item")
+    @takes(body=ItemNew)
+    @returns(Item, status=201)
+    async def item_add(self, body):
+        return dict(id=1, **body)
+
+    @route("/stream/json", Method.GET, "Stream items as a JSON array")
+    @returns(Item, stream=True)
+    async def items_stream(self, request):
+        for idx in range(3000):
+            yield dict(id=idx, name=f"item-{idx}")
+
+    @route("/stream/ndjson", Method.GET, "Stream items as NDJSON")
+    @takes(query=ItemPath)
+    @returns(Item, stream=StreamFormat.NDJSON)
+    async def items_stream_ndjson(self, query):
+        return [dict(id=idx, name=f"item-{idx}") for idx in range(3)]
+
+    @route("/bulk", Method.POST, "Create items in bulk")
+    @takes(body=ItemNew, stream_body=True, max_body_size=64)
+    @returns()
+    async def items_bulk(self, body):
+        return [item["name"] async for item in body]
+
+    @route("/limited", Method.POST, "Create item with limited body size")
+    @takes(body=ItemNew, max_body_size=16)
+    @returns(Item, status=201)
+    async def item_add_limited(self, body):
+        return dict(id=1, **body)
+
+    async def item_version(self, item_id):
+        return 3
+
+    @route("/etag/{item_id}", Method.GET, "Item with strong ETag")
+    @takes(path=ItemPath)
+    @returns(Item, etag=True)
+    async def item_tagged(self, item_id):
+        return dict(id=item_id, name="tagged")
+
+    @route("/versioned/{item_id}", Method.GET, "Item with cheap version check")
+    @takes(path=ItemPath)
+    @returns(Item, version=item_version)
+    async def item_versioned(self, item_id):
+        return await self.item.get_counted("versioned")
+
+    @route("/modified/request", Method.GET, "Item with modification date")
+    @returns(Item, version="updated_at")
+    async def item_modified(self, request):
+        return dict(id=1, name="modified", updated_at=datetime(2020, 1, 1, 12))
+
+    @route("/identity/request", Method.GET, "Uncompressed handler", compress=False)
+    @returns()
+    async def raw_identity(self, request):
+        return {"path": request.url.path}
+
+    @route("/raw/request", Method.GET, "Raw handler")
+    @returns()
+    async def raw_get(self, request):
+        return {"path": request.url.path}
+
+
+def test_pipeline_compiled(unit):
+    ctrl = unit(controllers=[HttpController], name="items").controllers[0]
+    handlers = {handler.name: handler for _, handler in ctrl.handlers}
+
+    assert handlers["item_get"].endpoint is not None
+    assert handlers["item_get"].path_full == "/api/items/{item_id}"
+
+
+def test_pipeline_returns_many(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "GET", "/api/items")
+
+    assert rv.status == 200
+    assert rv.headers["content-type"] == "application/json"
+    assert rv.json() == [dict(id=i, name=f"item-{i}") for i in range(3)]
+
+
+def test_pipeline_takes_path_and_props(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "GET", "/api/items/7")
+
+    assert rv.status == 200
+    assert rv.json() == dict(id=7, name="127.0.0.1")
+
+
+def test_pipeline_takes_body(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "POST", "/api/items", body=b'{"name": "test", "unknown": 1}')
+
+    assert rv.status == 201
+    assert rv.json() == dict(id=1, name="test")
+
+
+def test_pipeline_validation_error(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "POST", "/api/items", body=b"{}")
+
+    assert rv.status == 422
+    assert "name" in rv.json()["message"]
+
+
+def test_pipeline_passes_request(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "GET", "/api/items/raw/request")
+
+    assert rv.json() == {"path": "/api/items/raw/request"}
+
+
+def test_pipeline_stream_json(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "GET", "/api/items/stream/json")
+
+    assert rv.status == 200
+    assert rv.headers["content-type"] == "application/json"
+    assert rv.json() == [dict(id=idx, name=f"item-{idx}") for idx in range(3000)]
+
+
+def test_pipeline_stream_ndjson(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "GET", "/api/items/stream/ndjson")
+
+    assert rv.headers["content-type"] == "application/x-ndjson"
+    assert rv.body.endswith(b"\n")
+    assert [json.loads(line) for line in rv.body.splitlines()] == [
+        dict(id=idx, name=f"item-{idx}") for idx in range(3)
+    ]
+
+
+def test_pipeline_decode_error(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "POST", "/api/items", body=b"{invalid")
+
+    assert rv.status == 400
+    assert rv.json() == {"message": "Error decoding JSON"}
+
+
+def test_pipeline_body_limit(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+
+    assert call(app, "POST", "/api/items/limited", body=b'{"name": "ok"}').status == 201
+    assert call(app, "POST", "/api/items/limited", body=[b'{"name": ', b'"too long"}']).status == 413
+
+    rv = call(app, "POST", "/api/items/limited", headers={"content-length": "17"}, body=b"")
+    assert rv.status == 413
+
+
+def test_pipeline_body_limit_zero(get_app, get_unit, call):
+    export = get_unit(controllers=[HttpController], name="items")
+    app = get_app([export], config={"items": dict(max_body_size=0)})
+    app.load_units()
+
+    assert call(app, "POST", "/api/items", body=b'{"name": "test"}').status == 413
+
+
+def test_pipeline_body_stream(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+    rv = call(app, "POST", "/api/items/bulk", body=[b'[{"name": "a"}, {"na', b'me": "b"}, {"name"', b': "c"}]'])
+
+    assert rv.status == 200
+    assert rv.json() == ["a", "b", "c"]
+
+    rv = call(app, "POST", "/api/items/bulk", body=[b'[{"name": "a"}, {}]'])
+    assert rv.status == 422
+    assert "1" in rv.json()["message"]
+
+    assert call(app, "POST", "/api/items/bulk", body=[b'[{"name": "a"}', b", {"]).status == 400
+    assert call(app, "POST", "/api/items/bulk", body=[b"[", b"{}, " * 20, b"]"]).status == 413
+
+
+def test_json_array_parser():
+    items = [
+        {"name": "a [b] {c}", "tags": ["\\", "\"]", "ü€"], "nested": [[], {}, [{"x": [1]}]]},
+        "quote \" and backslash \\",
+        -1.5e3, 0, True, False, None, [], {},
+    ]
+    body = json.dumps(items, indent=2, ensure_ascii=False).encode("utf8")
+    parser = JsonArrayParser()
+    raw_decode = parser._decoder.raw_decode
+    decodes = []
+
+    def count_decode(*args):
+        decodes.append(args)
+        return raw_decode(*args)
+
+    parser._decoder.raw_decode = count_decode
+
+    # Items split at every byte come out whole, without decoding them again on every chunk
+    received = [item for idx in range(len(body)) for item in parser.feed(body[idx:idx + 1])]
+    received += parser.feed(b"", final=True)
+
+    assert received == items
+    assert len(decodes) <= 2 * len(items)
+
+    for invalid in [b"[1, 2", b'["a]', b"[tru]", b"[1,, 2]", b"[1 2]", b"[{]}"]:
+        parser = JsonArrayParser()
+
+        with pytest.raises(json.JSONDecodeError):
+            parser.feed(invalid[:3])
+            parser.feed(invalid[3:], final=True)
+
+
+def test_pipeline_cached_unsafe_method(unit):
+    class CachedPostController(BaseHttpController):
+        @route("/", Method.POST, "Cached creation")
+        @cached()
+        @returns()
+        async def create(self, request):
+            return {}
+
+    with pytest.raises(BootstrapError):
+        unit(controllers=[CachedPostController])
+
+
+def test_pipeline_coalesced_unsafe_method(unit):
+    class CoalescedPostController(BaseHttpController):
+        @route("/", Method.POST, "Coalesced creation", coalesce=True)
+        @returns()
+        async def create(self, request):
+            return {}
+
+    with pytest.raises(BootstrapError):
+        unit(controllers=[CoalescedPostController])
+
+
+def test_pipeline_cached(unit, call):
+    loaded = unit(controllers=[HttpController], services=[ItemService], name="items")
+    app, service = loaded.app, loaded.services[0]
+
+    first = call(app, "GET", "/api/items/cached", query_string=b"name=a")
+    assert call(app, "GET", "/api/items/cached", query_string=b"name=a").body == first.body
+    assert service.calls == 1
+
+    assert call(app, "GET", "/api/items/cached", query_string=b"name=b").json()["id"] == 2
+    assert loaded.cache.stats["hits"] == 1
+    assert loaded.cache.stats["entries"] == 2
+
+    assert service.invalidate_cache(prefix="GET /api/items/cached?name=b") == 1
+    assert service.invalidate_cache(tags=["items"]) == 1
+    assert call(app, "GET", "/api/items/cached", query_string=b"name=a").json()["id"] == 3
+
+
+def test_pipeline_coalesced(unit, acall):
+    loaded = unit(controllers=[HttpController], services=[ItemService], name="items")
+    app, service = loaded.app, loaded.services[0]
+
+    async def run():
+        return await asyncio.gather(
+            *[acall(app, "GET", "/api/items/coalesced", query_string=b"name=a") for _ in range(5)],
+            acall(app, "GET", "/api/items/coalesced", query_string=b"name=b"),
+        )
+
+    responses = asyncio.run(run())
+
+    assert service.calls == 2
+    assert len(set(rv.body for rv in responses[:5])) == 1
+    assert responses[5].json() == dict(id=2, name="b")
+
+
+def test_pipeline_coalesced_credentials(unit, acall):
+    loaded = unit(controllers=[HttpController], services=[ItemService], name="items")
+    app, service = loaded.app, loaded.services[0]
+
+    def get_as(user):
+        return acall(app, "GET", "/api/items/coalesced", query_string=b"name=a", headers={"authorization": user})
+
+    async def run():
+        return await asyncio.gather(get_as("alice"), get_as("bob"), get_as("alice"))
+
+    alice, bob, shared = asyncio.run(run())
+
+    assert service.calls == 2
+    assert alice.body == shared.body
+    assert alice.json()["id"] != bob.json()["id"]
+
+
+def test_pipeline_etag(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+
+    first = call(app, "GET", "/api/items/etag/1")
+    etag = first.headers["etag"]
+    assert etag.startswith('"')
+
+    rv = call(app, "GET", "/api/items/etag/1", headers={"if-none-match": etag})
+    assert rv.status == 304
+    assert rv.body == b""
+    assert rv.headers["etag"] == etag
+
+    assert call(app, "GET", "/api/items/etag/1", headers={"if-none-match": '"other"'}).status == 200
+    assert call(app, "GET", "/api/items/etag/2", headers={"if-none-match": etag}).status == 200
+
+
+def test_pipeline_etag_version(unit, call):
+    loaded = unit(controllers=[HttpController], services=[ItemService], name="items")
+    app, service = loaded.app, loaded.services[0]
+
+    rv = call(app, "GET", "/api/items/versioned/1")
+    assert rv.headers["etag"] == 'W/"3"'
+    assert service.calls == 1
+
+    assert call(app, "GET", "/api/items/versioned/1", headers={"if-none-match": 'W/"3"'}).status == 304
+    assert service.calls == 1
+
+
+def test_pipeline_last_modified(unit, call):
+    app = unit(controllers=[HttpController], name="items").app
+
+    rv = call(app, "GET", "/api/items/modified/request")
+    assert rv.headers["last-modified"] == "Wed, 01 Jan 2020 12:00:00 GMT"
+
+    headers = {"if-modified-since": "Thu, 02 Jan 2020 00:00:00 GMT"}
+    assert call(app, "GET", "/api/items/modified/request", headers=headers).status == 304
+
+    headers = {"if-modified-since": "Tue, 31 Dec 2019 00:00:00 GMT"}
+    assert call(app, "GET", "/api/items/modified/request", headers=headers).status == 200
+
+
+def test_pipeline_compressed(unit, call):
+    compression = dict(compression=True, compression_encodings=["gzip"], compression_min_size=0)
+    loaded = unit(controllers=[HttpController], services=[ItemService], name="items", app_config=compression)
+    app, service = loaded.app, loaded.services[0]
+    accept = {"accept-encoding": "gzip, deflate"}
+
+    rv = call(app, "GET", "/api/items", headers=accept)
+    assert rv.headers["content-encoding"] == "gzip"
+    assert rv.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(rv.body)) == [dict(id=i, name=f"item-{i}") for i in range(3)]
+
+    rv = call(app, "GET", "/api/items/stream/json", headers=accept)
+    assert "content-length" not in rv.headers
+    assert len(json.loads(gzip.decompress(rv.body))) == 3000
+
+    assert "content-encoding" not in call(app, "GET", "/api/items/identity/request", headers=accept).headers
+    assert "content-encoding" not in call(app, "GET", "/api/items").headers
+
+    # Cached responses are compressed once, and served as-is on subsequent hits
+    first = call(app, "GET", "/api/items/cached", query_string=b"name=a", headers=accept)
+    entry = loaded.cache.get("GET /api/items/cached?name=a")
+    assert first.headers["content-encoding"] == "gzip"
+    assert entry.variants["gzip"] == first.body
+    assert call(app, "GET", "/api/items/cached", query_string=b"name=a", headers=accept).body == first.body
+    assert call(app, "GET", "/api/items/cached", query_string=b"name=a").body == entry.body
+    assert service.calls == 1
+
+
+class FirstController(BaseHttpController):
+    @route("/first", Method.GET, "First")
+    @returns()
+    async def get(self, request):
+        return {"controller": "first"}
+
+
+class SecondController(BaseHttpController):
+    @route("/second", Method.GET, "Second")
+    @returns()
+    async def get(self, request):
+        return {"controller": "second"}
+
+
+class ExtendedController(FirstController):
+    @route("/extended", Method.GET, "Extended")
+    @returns()
+    async def extended_get(self, request):
+        return {"controller": "extended"}
+
+
+def test_handler_index():
+    assert list(FirstController.handler_index) == ["FirstController.get"]
+    assert list(SecondController.handler_index) == ["SecondController.get"]
+    assert list(ExtendedController.handler_index) == ["ExtendedController.get", "ExtendedController.extended_get"]
+
+
+def test_handler_index_same_module(unit, call):
+    app = unit(controllers=[FirstController, SecondController], name="multi").app
+
+    assert call(app, "GET", "/api/multi/first").json() == {"controller": "first"}
+    assert call(app, "GET", "/api/multi/second").json() == {"controller": "second"}
@@ -0,0 +1,32 @@
+import time
+
+from aioli.datastores import LRUStore
+
+
+def test_lru_store_eviction():
+    store = LRUStore(max_entries=2)
+    store.set("a", 1)
+    store.set("b", 2)
+
+    assert store.get("a") == 1
+
+    store.set("c", 3)
+
+    assert "b" not in store
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+    assert store.stats == dict(entries=2, hits=3, misses=0, evictions=1)
+
+
+def test_lru_store_ttl():
+    store = LRUStore(ttl=0.01)
+    store.set("a", 1)
+    store.set("b", 2, ttl=60)
+
+    time.sleep(0.02)
+
+    assert store.get("a") is None
+    assert store.get("b") == 2
+    assert store.stats["misses"] == 1
+    assert store.delete("b")
+    assert not store.delete("b")
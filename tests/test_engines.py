@@ -0,0 +1,61 @@
+import pytest
+
+from json.decoder import JSONDecodeError
+
+from aioli.engines import JSON_ENGINES, JsonEngine, get_json_engine, set_json_engine
+from aioli.exceptions import BootstrapError
+
+
+@pytest.fixture(autouse=True)
+def reset_engine():
+    yield
+    set_json_engine("ujson")
+
+
+@pytest.mark.parametrize("name", JSON_ENGINES.keys())
+def test_engine_roundtrip(name):
+    engine = set_json_engine(name)
+    data = {"name": "åäö", "items": [1, 2.5, None, True], "nested": {"key": "value"}}
+
+    encoded = engine.dumps(data)
+    assert isinstance(encoded, bytes)
+    assert engine.loads(encoded) == data
+    assert engine.loads(engine.dumps(data, indent=4)) == data
+
+
+def test_engine_indent():
+    data = {"items": [1, None], "nested": {"key": "åäö"}}
+    pretty = {engine().dumps(data, indent=4) for engine in JSON_ENGINES.values()}
+
+    assert len(pretty) == 1
+    assert b'\n    "items": [\n        1,' in pretty.pop()
+
+
+def test_engine_incomplete():
+    class IncompleteEngine(JsonEngine):
+        name = "incomplete"
+
+        def loads(self, data):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteEngine()
+
+
+@pytest.mark.parametrize("name", JSON_ENGINES.keys())
+def test_engine_decode_error(name):
+    with pytest.raises(JSONDecodeError):
+        set_json_engine(name).loads(b"{invalid")
+
+
+def test_engine_invalid():
+    with pytest.raises(BootstrapError):
+        set_json_engine("invalid")
+
+
+def test_engine_from_config(get_app):
+    get_app([], config={"aioli-core": {"json_engine": "json"}})
+    assert get_json_engine().name == "json"
+
+    with pytest.raises(BootstrapError):
+        get_app([], config={"aioli-core": {"json_engine": "invalid"}})
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from aioli.controller import BaseHttpController, Method, route, returns
+from aioli.exceptions import BootstrapError
+from aioli.lifecycle import find_dependencies
+from aioli.service import BaseService
+
+EVENTS = []
+
+
+class DatabaseService(BaseService):
+    async def on_startup(self):
+        EVENTS.append("database started")
+        await asyncio.sleep(0.02)
+        EVENTS.append("database ready")
+
+    async def on_shutdown(self):
+        EVENTS.append("database shutdown")
+
+
+class VisitService(BaseService):
+    async def on_startup(self):
+        self.db = self.connect(DatabaseService)
+        EVENTS.append("visit")
+
+    async def on_shutdown(self):
+        await asyncio.sleep(0.01)
+        EVENTS.append("visit shutdown")
+
+
+class OtherService(BaseService):
+    async def on_startup(self):
+        EVENTS.append("other")
+
+
+class SlowService(BaseService):
+    async def on_startup(self):
+        await asyncio.sleep(1)
+
+
+class DependentService(BaseService):
+    dependencies = [SlowService]
+
+    async def on_startup(self):
+        EVENTS.append("dependent")
+
+
+class CircularService(BaseService):
+    dependencies = [VisitService]
+
+
+class HttpController(BaseHttpController):
+    @route("/slow", Method.GET, "Slow")
+    @returns()
+    async def slow(self, request):
+        await asyncio.sleep(0.05)
+        EVENTS.append("request finished")
+        return {}
+
+    async def on_shutdown(self):
+        raise RuntimeError("Failure")
+
+
+@pytest.fixture
+def load_app(get_app, get_unit):
+    EVENTS.clear()
+
+    def _loaded(**services):
+        app = get_app([get_unit(services=classes, name=name) for name, classes in services.items()])
+        app.load_units()
+
+        return app
+
+    return _loaded
+
+
+def test_find_dependencies():
+    assert find_dependencies(VisitService) == {DatabaseService}
+    assert find_dependencies(DependentService) == {SlowService}
+    assert find_dependencies(OtherService) == set()
+
+
+def test_startup_order(load_app):
+    app = load_app(visits=[VisitService], database=[DatabaseService], other=[OtherService])
+    total, failed = asyncio.run(app.registry.call_startup_handlers())
+
+    assert (total, failed) == (3, 0)
+    assert EVENTS.index("other") < EVENTS.index("database ready") < EVENTS.index("visit")
+    assert set(app.registry.startup_timings) == {"visits", "database", "other"}
+    assert app.registry.startup_timings["database"][0][0] == "DatabaseService"
+
+
+def test_startup_timeout(load_app):
+    app = load_app(slow=[SlowService], dependent=[DependentService], other=[OtherService])
+    total, failed = asyncio.run(app.registry.call_startup_handlers(timeout=0.01))
+
+    assert (total, failed) == (3, 2)
+    assert EVENTS == ["other"]
+
+
+def test_circular_dependencies(load_app):
+    VisitService.dependencies = [CircularService]
+
+    try:
+        with pytest.raises(BootstrapError, match="Circular"):
+            load_app(visits=[VisitService], circular=[CircularService])
+    finally:
+        VisitService.dependencies = []
+
+
+def test_shutdown(get_app, get_unit, acall):
+    EVENTS.clear()
+    units = [
+        get_unit(services=[DatabaseService], name="database"),
+        get_unit(controllers=[HttpController], services=[VisitService], name="visits"),
+    ]
+    app = get_app(units, config={"aioli-core": dict(drain_timeout=1)})
+    app.load_units()
+
+    async def run():
+        await app.router.lifespan.startup()
+        request = asyncio.ensure_future(acall(app, "GET", "/api/visits/slow"))
+        await asyncio.sleep(0.01)
+
+        shutdown = asyncio.ensure_future(app.router.lifespan.shutdown())
+        await asyncio.sleep(0)
+        rejected = await acall(app, "GET", "/api/visits/slow")
+
+        await shutdown
+        return (await request).status, rejected.status
+
+    assert asyncio.run(run()) == (200, 503)
+    assert EVENTS[-3:] == ["request finished", "visit shutdown", "database shutdown"]
+    assert [name for name, _ in app.registry.shutdown_timings["visits"]] == ["VisitService"]
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from aioli.controller import BaseHttpController, Method, route, returns
+from aioli.loader import DataLoader
+from aioli.service import BaseService
+
+
+class VisitorService(BaseService):
+    calls = []
+
+    async def on_startup(self):
+        self.visitors = self.create_loader(self.get_by_ids)
+
+    async def get_by_ids(self, visitor_ids):
+        self.calls.append(visitor_ids)
+        return {visitor_id: dict(id=visitor_id) for visitor_id in visitor_ids if visitor_id > 0}
+
+
+class HttpController(BaseHttpController):
+    def __init__(self, unit):
+        super(HttpController, self).__init__(unit)
+        self.visitor = VisitorService(unit)
+
+    @route("/", Method.GET, "Visitors")
+    @returns()
+    async def visitors_get(self, request):
+        first = await self.visitor.visitors.load_many([1, 2])
+        second = await self.visitor.visitors.load_many([2, 3])
+        return first + second
+
+
+def test_batches():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(keys)
+        return [key * 10 for key in keys]
+
+    async def run():
+        loader = DataLoader(batch_fn, max_batch_size=2)
+        values = await asyncio.gather(*[loader.load(key) for key in [1, 2, 2, 3]])
+        return loader, values
+
+    loader, values = asyncio.run(run())
+
+    assert values == [10, 20, 20, 30]
+    assert calls == [[1, 2], [3]]
+    assert (loader.loads, loader.batches) == (4, 2)
+
+
+def test_errors():
+    async def batch_fn(keys):
+        if 0 in keys:
+            raise RuntimeError("Failure")
+
+        return [ValueError(key) if key < 0 else key for key in keys]
+
+    async def run():
+        loader = DataLoader(batch_fn)
+        results = await asyncio.gather(loader.load(1), loader.load(-1), return_exceptions=True)
+
+        with pytest.raises(RuntimeError):
+            await loader.load(0)
+
+        return results
+
+    value, error = asyncio.run(run())
+
+    assert value == 1
+    assert isinstance(error, ValueError)
+
+
+def test_cancelled():
+    async def batch_fn(keys):
+        await asyncio.sleep(1)
+
+    async def run():
+        loader = DataLoader(batch_fn)
+        load = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0.01)
+
+        batch, = loader._tasks
+        batch.cancel()
+        await asyncio.gather(batch, load, return_exceptions=True)
+
+        return batch, load
+
+    batch, load = asyncio.run(run())
+
+    # Cancelled batches cancel their loads, rather than failing them
+    assert batch.cancelled() and load.cancelled()
+
+
+def test_request_cache(get_app, get_unit, acall):
+    VisitorService.calls = []
+    app = get_app([get_unit(controllers=[HttpController], services=[VisitorService], name="visitors")])
+    app.load_units()
+
+    async def run():
+        await app.router.lifespan.startup()
+        responses = [await acall(app, "GET", "/api/visitors") for _ in range(2)]
+        await app.router.lifespan.shutdown()
+
+        return responses
+
+    for response in asyncio.run(run()):
+        assert response.json() == [dict(id=1), dict(id=2), dict(id=2), dict(id=3)]
+
+    # Keys loaded earlier in the same request are served from its cache
+    assert VisitorService.calls == [[1, 2], [3], [1, 2], [3]]
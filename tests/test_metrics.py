@@ -0,0 +1,71 @@
+from aioli.controller import BaseHttpController, Method, route, takes, returns
+from aioli.controller.schemas import Schema, fields
+from aioli.metrics import Histogram, MetricsRegistry, bucket_index, bucket_value, parse_samples
+
+
+class Ping(Schema):
+    message = fields.String(required=True)
+
+
+class HttpController(BaseHttpController):
+    @route("/", Method.POST, "Ping")
+    @takes(body=Ping)
+    @returns(Ping)
+    async def ping(self, body):
+        return body
+
+
+def test_histogram_buckets():
+    for value in [0, 1, 31, 32, 33, 1000, 123456, 10 ** 9]:
+        lowest = bucket_value(bucket_index(value))
+
+        assert lowest <= value
+        assert value - lowest <= value * 0.07
+
+
+def test_histogram_quantiles():
+    histogram = Histogram()
+
+    for value in range(1, 1001):
+        histogram.record(value)
+
+    p50, p99, p100 = histogram.quantiles([0.5, 0.99, 1.0])
+
+    assert 480 <= p50 <= 500
+    assert 960 <= p99 <= 990
+    assert 960 <= p100 <= 1000
+    assert histogram.total == 500500
+    assert Histogram().quantiles([0.5]) == [0]
+
+
+def test_registry_render():
+    registry = MetricsRegistry()
+    route = registry.route(unit="unit", controller="Controller", handler='say "hi"')
+    route.requests = 2
+    route.pending["handler"].append(1500000)
+
+    registry.register_collector("custom", lambda: [])
+    samples = parse_samples(registry.render())
+
+    assert ("aioli_requests_total", dict(route.labels), 2.0) in samples
+    assert samples[3] == ("aioli_request_duration_seconds", dict(route.labels, phase="takes", quantile="0.5"), 0.0)
+    assert ("aioli_request_duration_seconds_count", dict(route.labels, phase="handler"), 1.0) in samples
+
+
+def test_route_metrics(unit, call):
+    app = unit(controllers=[HttpController], name="pings", app_config=dict(metrics=True)).app
+
+    assert call(app, "POST", "/api/pings", body=b'{"message": "hello"}').status == 200
+    assert call(app, "POST", "/api/pings", body=b"{}").status == 422
+
+    rv = call(app, "GET", "/metrics")
+    assert rv.headers["content-type"].startswith("text/plain")
+
+    samples = {(name, labels.get("phase"), labels.get("quantile")): value for name, labels, value in parse_samples(rv.body.decode())}
+    assert samples[("aioli_requests_total", None, None)] == 2
+    assert samples[("aioli_request_errors_total", None, None)] == 1
+    assert samples[("aioli_requests_in_flight", None, None)] == 0
+    assert samples[("aioli_request_duration_seconds_count", "takes", None)] == 1
+    assert samples[("aioli_request_duration_seconds_count", "handler", None)] == 1
+    assert samples[("aioli_request_duration_seconds_count", "returns", None)] == 1
+    assert samples[("aioli_cache_entries", None, None)] == 0
@@ -0,0 +1,133 @@
+import asyncio
+import pstats
+import time
+
+import pytest
+
+from aioli.controller import BaseHttpController, Method, route, returns
+from aioli.exceptions import BootstrapError
+from aioli.profiler import StackSampler
+
+TOKEN = "0123456789abcdef"
+AUTH = {"authorization": f"Bearer {TOKEN}"}
+
+
+def spin(seconds):
+    until = time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        pass
+
+
+class HttpController(BaseHttpController):
+    @route("/slow", Method.GET, "Slow")
+    @returns()
+    async def slow(self, request):
+        spin(0.05)
+        return {"slow": True}
+
+    @route("/fast", Method.GET, "Fast")
+    @returns()
+    async def fast(self, request):
+        return {"fast": True}
+
+
+@pytest.fixture
+def profiled_app(unit, tmp_path):
+    def _loaded(**app_config):
+        config = dict(profiler_token=TOKEN, profiler_dir=str(tmp_path))
+        return unit(controllers=[HttpController], name="things", app_config=dict(config, **app_config)).app
+
+    return _loaded
+
+
+def test_sampler_collapsed():
+    sampler = StackSampler(0, 0.01)
+    code = spin.__code__
+    sampler.stacks[(test_sampler_collapsed.__code__, code)] = 3
+
+    assert sampler.collapsed() == (
+        f"test_sampler_collapsed (test_profiler.py:{test_sampler_collapsed.__code__.co_firstlineno});"
+        f"spin (test_profiler.py:{code.co_firstlineno}) 3\n"
+    )
+
+
+def test_profiler_auth(profiled_app, call):
+    app = profiled_app()
+
+    assert call(app, "GET", "/_profile").status == 401
+    assert call(app, "GET", "/_profile", headers={"authorization": "Bearer nope"}).status == 401
+    assert call(app, "GET", "/_profile", headers=AUTH).json() == {"session": None, "results": []}
+
+
+def test_profiler_disabled(unit, call):
+    app = unit(controllers=[HttpController], name="things").app
+
+    assert app.profiler is None
+    assert call(app, "GET", "/_profile", headers=AUTH).status == 404
+
+
+def test_profile_sample_handler(profiled_app, acall):
+    app = profiled_app()
+
+    async def run():
+        rv = await acall(app, "POST", "/_profile", headers=AUTH, body=b'{"requests": 2, "handler": "slow", "interval": 0.001}')
+        assert rv.status == 202
+
+        rv = await acall(app, "POST", "/_profile", headers=AUTH, body=b'{"requests": 1}')
+        assert rv.status == 409
+
+        await acall(app, "GET", "/api/things/fast")
+        await acall(app, "GET", "/api/things/slow")
+        await acall(app, "GET", "/api/things/slow")
+
+        return (await acall(app, "GET", "/_profile", headers=AUTH)).json()
+
+    status = asyncio.run(run())
+    session = status["session"]
+
+    assert session["done"] and session["requests_profiled"] == 2
+    assert status["results"] == [session["result"]]
+    assert session["result"].endswith(".folded")
+
+    stacks = app.profiler.session.sampler.stacks
+    marker = app.profiler.session.sampler.marker
+    assert all(marker in stack for stack in stacks)
+    assert any(spin.__code__ in stack for stack in stacks)
+
+    with open(app.profiler.session.path) as fh:
+        assert "slow (test_profiler.py" in fh.read()
+
+
+def test_profile_cprofile_seconds(profiled_app, acall):
+    app = profiled_app()
+
+    async def run():
+        await acall(app, "POST", "/_profile", headers=AUTH, body=b'{"seconds": 0.1, "mode": "cprofile", "unit": "things"}')
+        await acall(app, "GET", "/api/things/fast")
+        await asyncio.sleep(0.2)
+
+        return (await acall(app, "GET", "/_profile", headers=AUTH)).json()["session"]
+
+    session = asyncio.run(run())
+    assert session["done"] and session["requests_profiled"] == 1
+
+    stats = pstats.Stats(app.profiler.session.path)
+    assert any(name == "fast" for _, _, name in stats.stats)
+
+    rv = asyncio.run(acall(app, "GET", f"/_profile/{session['result']}", headers=AUTH))
+    assert rv.status == 200
+
+    with open(app.profiler.session.path, "rb") as fh:
+        assert rv.body == fh.read()
+
+    assert asyncio.run(acall(app, "GET", "/_profile/missing.prof", headers=AUTH)).status == 404
+
+
+def test_profile_invalid(profiled_app, call):
+    app = profiled_app()
+
+    assert call(app, "POST", "/_profile", headers=AUTH, body=b"{}").status == 422
+    assert call(app, "POST", "/_profile", headers=AUTH, body=b'{"seconds": 1, "unit": "other"}').status == 404
+
+    with pytest.raises(BootstrapError):
+        profiled_app(profile={"mode": "other"})
@@ -0,0 +1,56 @@
+import pytest
+
+from aioli.controller import BaseHttpController, Method, route, returns
+from aioli.router import RouteTree
+
+
+class HttpController(BaseHttpController):
+    @route("/{item_id}", Method.GET, "Item details")
+    @returns()
+    async def item_get(self, request):
+        return request.path_params
+
+    @route("/{item_id}", Method.DELETE, "Delete item")
+    @returns(status=204)
+    async def item_delete(self, request):
+        return None
+
+    @route("/{name:str}/tags", Method.GET, "Item tags")
+    @returns()
+    async def item_tags(self, request):
+        return request.path_params
+
+
+def test_tree_lookup():
+    tree = RouteTree()
+    tree.insert("/items/{item_id:int}", {"GET"}, "item", 0)
+    tree.insert("/items/new", {"GET"}, "new", 1)
+    tree.insert("/items/{name}", {"GET", "POST"}, "named", 2)
+    tree.insert("/", None, "root", 3)
+
+    assert tree.lookup("GET", "/items/1") == [0, "item", {"item_id": 1}]
+    assert tree.lookup("GET", "/items/new") == [1, "new", {}]
+    assert tree.lookup("POST", "/items/new") == [2, "named", {"name": "new"}]
+    assert tree.lookup("GET", "/") == [3, "root", {}]
+    assert tree.lookup("DELETE", "/items/1") is None
+    assert tree.lookup("GET", "/items/1/other") is None
+    assert tree.lookup("GET", "/items/") is None
+
+
+def test_tree_unsupported_paths():
+    tree = RouteTree()
+
+    assert not tree.insert("/files/{path:path}", None, "files", 0)
+    assert not tree.insert("/files/{name}.json", None, "json", 1)
+
+
+@pytest.mark.parametrize("router", ["linear", "radix"])
+def test_router_semantics(unit, call, router):
+    app = unit(controllers=[HttpController], name="items", app_config=dict(router=router)).app
+
+    assert call(app, "GET", "/api/items/1").json() == {"item_id": "1"}
+    assert call(app, "GET", "/api/items/a/tags").json() == {"name": "a"}
+    assert call(app, "DELETE", "/api/items/1").status == 204
+    assert call(app, "POST", "/api/items/1").status == 405
+    assert call(app, "GET", "/api/other/1/2").status == 404
+    assert call(app, "GET", "/api/items/1/").status == 404
@@ -0,0 +1,164 @@
+import datetime
+import decimal
+
+import pytest
+
+from aioli.controller.schemas import Schema, ValidationError, fields, validate
+
+
+class Visitor(Schema):
+    id = fields.Integer()
+    name = fields.String(required=True)
+    location = fields.String(allow_none=True)
+    ip_addr = fields.String(data_key="ip-addr")
+
+
+class Visit(Schema):
+    id = fields.Integer()
+    visitor = fields.Nested(Visitor)
+    visitors = fields.Nested(Visitor, many=True)
+    visited_on = fields.DateTime()
+    message = fields.String(validate=validate.Length(max=8))
+    score = fields.Float()
+    price = fields.Decimal(as_string=True)
+    active = fields.Boolean()
+    tags = fields.List(fields.String())
+    extra = fields.Raw()
+    count = fields.Integer(missing=0, default=-1)
+    owner_name = fields.String(attribute="owner.name")
+    greeting = fields.Method("get_greeting")
+
+    def get_greeting(self, obj):
+        return "hello"
+
+
+class CompiledVisitor(Visitor):
+    class Meta:
+        compiled = True
+
+
+class CompiledVisit(Visit):
+    visitor = fields.Nested(CompiledVisitor)
+    visitors = fields.Nested(CompiledVisitor, many=True)
+
+    class Meta:
+        compiled = True
+
+
+class Owner:
+    name = "owner"
+
+
+class VisitObject:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+def get_visit(idx):
+    return dict(
+        id=idx,
+        visitor=dict(id=idx, name=f"visitor-{idx}", location=None, ip_addr="127.0.0.1"),
+        visitors=[dict(id=1, name=b"bytes"), dict(id="2", name=3)],
+        visited_on=datetime.datetime(2019, 1, 2, 3, 4, 5),
+        message=f"msg-{idx}",
+        score=idx,
+        price=decimal.Decimal("1.50"),
+        active=1,
+        tags=["a", "b"],
+        extra={"nested": [1, 2]},
+        owner=dict(name="owner"),
+    )
+
+
+@pytest.mark.parametrize("obj", [
+    get_visit(1),
+    VisitObject(**dict(get_visit(2), owner=Owner())),
+    dict(id=None, message=None, active=None, score=None),
+    {},
+    None,
+])
+def test_compiled_dump_parity(obj):
+    assert CompiledVisit().dump(obj) == Visit().dump(obj)
+
+
+def test_compiled_dump_many_parity():
+    objs = [get_visit(idx) for idx in range(10)]
+    assert CompiledVisit(many=True).dumps(objs) == Visit(many=True).dumps(objs)
+
+
+def test_compiled_dump_only_exclude():
+    obj = get_visit(1)
+
+    assert CompiledVisit(only=["id", "visitor"]).dump(obj) == Visit(only=["id", "visitor"]).dump(obj)
+    assert CompiledVisit(exclude=["visitor"]).dump(obj) == Visit(exclude=["visitor"]).dump(obj)
+
+
+@pytest.mark.parametrize("data", [
+    dict(id="1", message="hello", score="1.5", active="yes", tags=["x"], extra=[1]),
+    dict(visitor=dict(name="test", **{"ip-addr": "10.0.0.1"}), unknown="value"),
+    dict(visitors=[dict(name="one"), dict(name="two", id="2")]),
+    dict(price="2.25", visited_on="2019-01-02T03:04:05"),
+    {},
+])
+def test_compiled_load_parity(data):
+    assert CompiledVisit().load(data) == Visit().load(data)
+
+
+@pytest.mark.parametrize("data", [
+    dict(id="x", message="too long message", active="maybe"),
+    dict(visitor=dict(id=1)),
+    dict(visitors=[dict(name="one"), dict(id="two")]),
+    dict(score="nan", tags="x"),
+    dict(count=None, location=None),
+    dict(extra=None),
+    dict(extra=None, visitor=dict(name="test", location=None), id=None),
+    [],
+    "invalid",
+])
+def test_compiled_load_errors_parity(data):
+    with pytest.raises(ValidationError) as expected:
+        Visit().load(data)
+
+    with pytest.raises(ValidationError) as compiled:
+        CompiledVisit().load(data)
+
+    assert compiled.value.messages == expected.value.messages
+    assert compiled.value.valid_data == expected.value.valid_data
+
+
+def test_compiled_load_many_parity():
+    data = [dict(id=str(idx), message="hello") for idx in range(5)] + [dict(id="x")]
+
+    with pytest.raises(ValidationError) as expected:
+        Visit(many=True).load(data)
+
+    with pytest.raises(ValidationError) as compiled:
+        CompiledVisit(many=True).load(data)
+
+    assert compiled.value.messages == expected.value.messages
+    assert CompiledVisit(many=True).load(data[:-1]) == Visit(many=True).load(data[:-1])
+
+
+def test_compiled_opt_in():
+    assert Visit()._dump_one is None
+    assert CompiledVisit()._dump_one is not None
+    assert CompiledVisit()._load_one is not None
+
+
+def test_compiled_load_used():
+    schema = CompiledVisit(many=True)
+    load_one = schema._load_one
+    loaded = []
+
+    def spy(data, error_store, index):
+        loaded.append(data)
+        return load_one(data, error_store, index)
+
+    schema._load_one = spy
+    data = [dict(id="1", extra=None, unknown="value")]
+
+    with pytest.raises(ValidationError):
+        schema.load(data)
+
+    assert schema.load([dict(id="1")]) == [dict(id=1, count=0)]
+    assert loaded == data + [dict(id="1")]
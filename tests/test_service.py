@@ -0,0 +1,178 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from aioli.metrics import parse_samples
+from aioli.exceptions import BootstrapError
+from aioli.service import BaseService, offload, memoize
+
+
+def count(values):
+    return len(list(values))
+
+
+class ReportService(BaseService):
+    @offload(process=True)
+    @staticmethod
+    def render(values, scale=1):
+        return os.getpid(), sum(values) * 3 * scale
+
+    count = offload(process=True)(count)
+
+    @offload()
+    def thread_name(self):
+        return threading.current_thread().name
+
+
+@pytest.fixture
+def app(get_app, get_unit):
+    app = get_app(
+        [get_unit(services=[ReportService], name="reports")],
+        config={"aioli-core": dict(metrics=True, process_workers=2)},
+    )
+    app.load_units()
+
+    return app
+
+
+def test_offload_process(app):
+    svc = ReportService(app.registry.imported[0])
+
+    async def run():
+        await app.router.lifespan.startup()
+
+        try:
+            return await asyncio.gather(svc.render([1, 2], scale=2), svc.render(range(3)), svc.count(range(3)))
+        finally:
+            await app.router.lifespan.shutdown()
+
+    (first_pid, first), (second_pid, second), counted = asyncio.run(run())
+
+    assert (first, second, counted) == (18, 9, 3)
+    assert os.getpid() not in [first_pid, second_pid]
+
+    samples = {name: value for name, _, value in parse_samples(app.metrics.render())}
+    assert samples["aioli_process_completed_total"] == 3
+    assert samples["aioli_process_in_flight"] == 0
+
+
+def test_offload_arguments(app):
+    svc = ReportService(app.registry.imported[0])
+
+    with pytest.raises(TypeError, match="ReportService.render"):
+        asyncio.run(svc.render(lambda: None))
+
+
+def test_offload_process_method():
+    # Methods of an instance can't be called in a worker process, which has no instance to call them on
+    with pytest.raises(BootstrapError, match="staticmethod"):
+        class MethodService(BaseService):
+            @offload(process=True)
+            def render(self, values):
+                return sum(values)
+
+    with pytest.raises(BootstrapError, match="importable"):
+        offload(process=True)(staticmethod(lambda values: sum(values)))
+
+
+def test_offload_thread(app):
+    svc = ReportService(app.registry.imported[0])
+
+    assert asyncio.run(svc.thread_name()).startswith("aioli-reports")
+
+
+class VisitService(BaseService):
+    calls = []
+
+    @memoize(ttl=60, maxsize=2)
+    async def get_one(self, visit_id, full=False):
+        self.calls.append(visit_id)
+        await asyncio.sleep(0.01)
+
+        if visit_id < 0:
+            raise ValueError("Invalid ID")
+
+        return dict(id=visit_id, full=full)
+
+    async def update(self, visit_id):
+        return self.get_one.invalidate(visit_id)
+
+
+def test_memoize(get_app, get_unit):
+    app = get_app([get_unit(services=[VisitService], name="visits")], config={"aioli-core": dict(metrics=True)})
+    app.load_units()
+    svc = VisitService(app.registry.imported[0])
+
+    async def run():
+        shared = await asyncio.gather(*[svc.get_one(1) for _ in range(3)], svc.get_one(visit_id=1, full=False))
+        assert shared == [dict(id=1, full=False)] * 4
+        assert svc.calls == [1]
+
+        await svc.get_one(1)
+        assert svc.calls == [1]
+
+        assert await svc.update(1) == 1
+        await svc.get_one(1)
+        assert svc.calls == [1, 1]
+
+        with pytest.raises(ValueError):
+            await svc.get_one(-1)
+
+        with pytest.raises(ValueError):
+            await svc.get_one(-1)
+
+    asyncio.run(run())
+
+    samples = {name: value for name, _, value in parse_samples(app.metrics.render()) if name.startswith("aioli_memo")}
+    assert samples == dict(
+        aioli_memo_entries=1,
+        aioli_memo_hits_total=1,
+        aioli_memo_misses_total=7,
+        aioli_memo_evictions_total=0,
+        aioli_memo_coalesced_total=3,
+    )
+
+
+def test_memoize_invalidated_in_flight():
+    svc = VisitService.__new__(VisitService)
+
+    async def run():
+        call = asyncio.ensure_future(svc.get_one(2))
+        await asyncio.sleep(0)
+        svc.get_one.invalidate()
+
+        # Results of calls started before an invalidation aren't stored
+        await call
+        return await svc.get_one(2)
+
+    VisitService.calls = []
+    VisitService.get_one.invalidate()
+    asyncio.run(run())
+
+    assert VisitService.calls == [2, 2]
+
+
+def test_memoize_invalidated_key_in_flight():
+    svc = VisitService.__new__(VisitService)
+
+    async def run():
+        calls = [asyncio.ensure_future(svc.get_one(visit_id)) for visit_id in [3, 4]]
+        await asyncio.sleep(0)
+        svc.get_one.invalidate(3)
+        await asyncio.gather(*calls)
+
+        # Only calls of the invalidated key don't store their results
+        return await asyncio.gather(svc.get_one(3), svc.get_one(4))
+
+    VisitService.calls = []
+    VisitService.get_one.invalidate()
+    asyncio.run(run())
+
+    assert VisitService.calls == [3, 4, 3]
+
+
+def test_memoize_sync():
+    with pytest.raises(BootstrapError):
+        memoize()(lambda self: None)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from aioli.controller import BaseHttpController, Method, Priority, route, returns
+from aioli.metrics import parse_samples
+from aioli.shedding import LoadShedder
+
+
+class HttpController(BaseHttpController):
+    @route("/low", Method.GET, "Low", priority=Priority.LOW)
+    @returns()
+    async def low(self, request):
+        return {}
+
+    @route("/normal", Method.GET, "Normal")
+    @returns()
+    async def normal(self, request):
+        return {}
+
+    @route("/critical", Method.GET, "Critical", priority=Priority.CRITICAL)
+    @returns()
+    async def critical(self, request):
+        return {}
+
+
+def test_shedding_levels():
+    shedder = LoadShedder(target=0.05, interval=0.1)
+
+    shedder.update(0.2, now=1.0)
+    assert shedder.level == 0
+
+    shedder.update(0.2, now=1.1)
+    assert shedder.level == 1
+
+    shedder.update(0.2, now=1.15)
+    assert shedder.level == 1
+
+    shedder.update(0.2, now=1.2)
+    shedder.update(0.2, now=1.3)
+    assert shedder.level == 2
+
+    shedder.update(0.01, now=1.4)
+    assert shedder.level == 1
+
+    shedder.update(0.2, now=1.5)
+    shedder.update(0.01, now=1.6)
+    assert shedder.level == 0
+
+
+def test_shedding_measures_lag():
+    async def run():
+        shedder = LoadShedder(target=0.005, interval=0.01)
+        shedder.start()
+
+        for _ in range(5):
+            time.sleep(0.03)
+            await asyncio.sleep(0.001)
+
+        shedder.stop()
+        return shedder
+
+    shedder = asyncio.run(run())
+
+    assert shedder.lag > 0.01
+    assert shedder.level == 2
+
+
+def test_shedding_priorities(unit, call):
+    app = unit(controllers=[HttpController], name="things", app_config=dict(load_shedding=True, metrics=True)).app
+
+    def statuses():
+        return [call(app, "GET", f"/api/things/{name}").status for name in ["low", "normal", "critical"]]
+
+    assert statuses() == [200, 200, 200]
+
+    app.shedder.level = 1
+    assert statuses() == [503, 200, 200]
+
+    app.shedder.level = 2
+    assert statuses() == [503, 503, 200]
+    assert call(app, "GET", "/api/things/low").headers["retry-after"] == "1"
+
+    samples = {(name, labels.get("priority")): value for name, labels, value in parse_samples(call(app, "GET", "/metrics").body.decode())}
+    assert samples[("aioli_requests_shed_total", "low")] == 3
+    assert samples[("aioli_requests_shed_total", "normal")] == 1
+    assert samples[("aioli_shedding_level", None)] == 2
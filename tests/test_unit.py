@@ -35,6 +35,14 @@ def test_configschema_invalid(get_unit):
         get_unit(config=[Exception])
 
 
+def test_config_environ(monkeypatch):
+    monkeypatch.setenv("THINGS_TIMEOUT", "0.5")
+    monkeypatch.setenv("THINGS_MAX_CONCURRENCY", "2")
+
+    config = UnitConfigSchema("THINGS_").load({})
+    assert (config["timeout"], config["max_concurrency"]) == (0.5, 2)
+
+
 def test_services_register_valid(unit):
     class Service1(BaseService):
         pass